@@ -0,0 +1,226 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .rag_context import normalize_question
+
+
+def answer_key(question: str, context: str, model: str, prompt_version: str, day: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_question(question), context, model, prompt_version, day):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class _Entry:
+    __slots__ = ("answer", "created_at", "llm_ms")
+
+    def __init__(self, answer: str, created_at: float, llm_ms: float):
+        self.answer = answer
+        self.created_at = created_at
+        self.llm_ms = llm_ms
+
+
+class AnswerCache:
+    """
+    LRU cache of LLM answers tagged with the document-cache generation they
+    were produced from. An entry is served only while that generation is
+    current and its TTL has not passed; the whole cache is dropped the first
+    time a newer generation is seen.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.saved_llm_ms = 0.0
+        self._generation: int | None = None
+        self._items: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _sync_generation(self, generation: int) -> bool:
+        """Advance to ``generation``; False if the caller is behind the cache."""
+        if self._generation is not None and generation < self._generation:
+            return False
+        if self._generation != generation:
+            self.invalidated += len(self._items)
+            self._items.clear()
+            self._generation = generation
+        return True
+
+    def get(self, key: str, generation: int) -> str | None:
+        with self._lock:
+            entry = self._items.get(key) if self._sync_generation(generation) else None
+            if entry is not None and self.ttl_seconds > 0 and time.monotonic() - entry.created_at > self.ttl_seconds:
+                del self._items[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            self.saved_llm_ms += entry.llm_ms
+            return entry.answer
+
+    def put(self, key: str, answer: str, generation: int, llm_ms: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if not self._sync_generation(generation):
+                # Answered from documents that have since been replaced.
+                return
+            self._items[key] = _Entry(answer, time.monotonic(), llm_ms)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "invalidated": self.invalidated,
+            "saved_llm_ms": round(self.saved_llm_ms, 1),
+        }
+
+
+class _SemanticEntry:
+    __slots__ = ("vector", "answer", "hits", "created_at", "llm_ms")
+
+    def __init__(self, vector: np.ndarray, answer: str, hits: list[dict], created_at: float, llm_ms: float):
+        self.vector = vector
+        self.answer = answer
+        self.hits = hits
+        self.created_at = created_at
+        self.llm_ms = llm_ms
+
+
+def _unit(vector: list[float]) -> np.ndarray | None:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm > 0 else None
+
+
+class SemanticAnswerCache:
+    """
+    Second-tier answer cache for paraphrases. Entries keep the question
+    embedding with the answer and the hits it cited; a lookup serves the
+    most similar entry whose filters are identical and whose cosine
+    similarity reaches ``threshold``, skipping retrieval and generation.
+    Generation and TTL rules match :class:`AnswerCache`.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, threshold: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.saved_llm_ms = 0.0
+        self.similarity_total = 0.0
+        self._generation: int | None = None
+        self._items: OrderedDict[tuple, _SemanticEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _sync_generation(self, generation: int) -> bool:
+        if self._generation is not None and generation < self._generation:
+            return False
+        if self._generation != generation:
+            self.invalidated += len(self._items)
+            self._items.clear()
+            self._generation = generation
+        return True
+
+    def get(
+        self,
+        filters: tuple,
+        embedding: list[float],
+        generation: int,
+    ) -> tuple[str, list[dict], float] | None:
+        """Return ``(answer, hits, similarity)`` of the closest match, if any."""
+        query = _unit(embedding)
+        with self._lock:
+            best_key = None
+            best_score = -1.0
+            if query is not None and self._sync_generation(generation):
+                now = time.monotonic()
+                for key, entry in list(self._items.items()):
+                    if self.ttl_seconds > 0 and now - entry.created_at > self.ttl_seconds:
+                        del self._items[key]
+                        continue
+                    if key[0] != filters or entry.vector.shape != query.shape:
+                        continue
+                    score = float(entry.vector @ query)
+                    if score > best_score:
+                        best_key, best_score = key, score
+            if best_key is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            entry = self._items[best_key]
+            self._items.move_to_end(best_key)
+            self.hits += 1
+            self.saved_llm_ms += entry.llm_ms
+            self.similarity_total += best_score
+            return entry.answer, entry.hits, best_score
+
+    def put(
+        self,
+        filters: tuple,
+        question: str,
+        embedding: list[float],
+        answer: str,
+        hits: list[dict],
+        generation: int,
+        llm_ms: float,
+    ) -> None:
+        vector = _unit(embedding)
+        if self.max_size <= 0 or vector is None:
+            return
+        with self._lock:
+            if not self._sync_generation(generation):
+                return
+            key = (filters, normalize_question(question))
+            self._items[key] = _SemanticEntry(vector, answer, [dict(hit) for hit in hits], time.monotonic(), llm_ms)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "mean_hit_similarity": round(self.similarity_total / self.hits, 4) if self.hits else None,
+            "invalidated": self.invalidated,
+            "saved_llm_ms": round(self.saved_llm_ms, 1),
+        }
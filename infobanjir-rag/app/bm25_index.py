@@ -0,0 +1,202 @@
+import heapq
+import math
+import re
+from typing import Iterable, Sequence
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+# Slack for float rounding when comparing partial scores with summed bounds.
+_EPSILON = 1e-9
+
+STOP_WORDS = frozenset(
+    {
+        "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for",
+        "from", "has", "have", "how", "i", "in", "is", "it", "me", "of", "on",
+        "or", "show", "tell", "that", "the", "there", "this", "to", "was",
+        "what", "when", "where", "which", "who", "with", "any", "now", "please",
+    }
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall((text or "").lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def _term_frequencies(text: str) -> tuple[dict[str, int], int]:
+    tokens = tokenize(text)
+    frequencies: dict[str, int] = {}
+    for token in tokens:
+        frequencies[token] = frequencies.get(token, 0) + 1
+    return frequencies, len(tokens)
+
+
+class Bm25Index:
+    """
+    Tokenized inverted index with Okapi BM25 scoring.
+    Postings map term -> {row position: term frequency}. ``updated`` returns a
+    copy-on-write successor so readers of the previous generation are never
+    affected by an incremental ingest.
+
+    Each term also keeps its largest tf and shortest document length, which
+    bound the score the term can add to any document. ``search`` uses those
+    bounds to stop admitting new candidates once common terms can no longer
+    lift a document into the top k (term-at-a-time MaxScore).
+    """
+
+    def __init__(self, documents: Sequence[dict] = (), k1: float = 1.2, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[int, int]] = {}
+        self.doc_lengths: dict[int, int] = {}
+        self.total_length = 0
+        # term -> (max tf, min document length); removals may leave it loose, never too low.
+        self.term_bounds: dict[str, tuple[int, int]] = {}
+
+    @classmethod
+    def build(cls, documents: Sequence[dict], k1: float = 1.2, b: float = 0.75) -> "Bm25Index":
+        index = cls(documents, k1=k1, b=b)
+        for pos, doc in enumerate(documents):
+            index._add(pos, doc.get("text") or "")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def _add(self, pos: int, text: str) -> None:
+        frequencies, length = _term_frequencies(text)
+        for token, tf in frequencies.items():
+            self.postings.setdefault(token, {})[pos] = tf
+            self._raise_bound(token, tf, length)
+        self.doc_lengths[pos] = length
+        self.total_length += length
+
+    def _raise_bound(self, token: str, tf: int, length: int) -> None:
+        bound = self.term_bounds.get(token)
+        if bound is None:
+            self.term_bounds[token] = (tf, length)
+        elif tf > bound[0] or length < bound[1]:
+            self.term_bounds[token] = (max(tf, bound[0]), min(length, bound[1]))
+
+    def updated(
+        self,
+        changes: Iterable[tuple[int, str | None, str]],
+        documents: Sequence[dict],
+    ) -> "Bm25Index":
+        """
+        Return a new index over ``documents`` with ``changes`` applied. Each
+        change is ``(position, previous_text_or_None, new_text)``; only
+        postings for touched terms are copied.
+        """
+        index = Bm25Index(documents, k1=self.k1, b=self.b)
+        index.postings = dict(self.postings)
+        index.doc_lengths = dict(self.doc_lengths)
+        index.total_length = self.total_length
+        index.term_bounds = dict(self.term_bounds)
+        copied: set[str] = set()
+
+        def _own(token: str) -> dict[int, int]:
+            if token not in copied:
+                index.postings[token] = dict(index.postings.get(token, {}))
+                copied.add(token)
+            return index.postings[token]
+
+        for pos, previous_text, new_text in changes:
+            if previous_text is not None:
+                for token in set(tokenize(previous_text)):
+                    posting = _own(token)
+                    posting.pop(pos, None)
+                    if not posting:
+                        del index.postings[token]
+                        index.term_bounds.pop(token, None)
+                        copied.discard(token)
+                index.total_length -= index.doc_lengths.pop(pos, 0)
+            frequencies, length = _term_frequencies(new_text)
+            for token, tf in frequencies.items():
+                _own(token)[pos] = tf
+                index._raise_bound(token, tf, length)
+            index.doc_lengths[pos] = length
+            index.total_length += length
+        return index
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        candidates: Iterable[int] | None = None,
+        stats: dict | None = None,
+    ) -> list[tuple[float, int]]:
+        """
+        Return up to ``top_k`` ``(score, position)`` pairs, best first.
+
+        Terms are scored rarest (highest bound) first. Once the k-th best
+        partial score beats the most the remaining terms could add, new
+        documents cannot reach the top k: the remaining postings are only
+        probed for documents already accumulated, and accumulators that can
+        no longer catch up are dropped. Results equal exhaustive scoring.
+        ``stats["scored"]`` receives the number of postings scored.
+        """
+        terms = set(tokenize(query))
+        if stats is not None:
+            stats["scored"] = 0
+        if not terms or top_k <= 0 or not self.doc_lengths:
+            return []
+        allowed = None if candidates is None else set(candidates)
+        if allowed is not None and not allowed:
+            return []
+
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs if n_docs else 0.0
+        k1, b = self.k1, self.b
+        plans = []
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1.0 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            max_tf, min_length = self.term_bounds.get(term) or (max(posting.values()), 0)
+            min_norm = 1.0 - b + b * (min_length / avg_length if avg_length else 0.0)
+            bound = idf * (max_tf * (k1 + 1.0)) / (max_tf + k1 * min_norm)
+            plans.append((bound, term, idf, posting))
+        plans.sort(key=lambda plan: (-plan[0], plan[1]))
+        remaining = [0.0] * (len(plans) + 1)
+        for i in range(len(plans) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + plans[i][0]
+
+        scores: dict[int, float] = {}
+        scored = 0
+        for i, (_, term, idf, posting) in enumerate(plans):
+            threshold = None
+            if len(scores) >= top_k:
+                # Partial scores only grow, so the k-th one is a floor for the final k-th.
+                threshold = heapq.nlargest(top_k, scores.values())[-1]
+            if threshold is not None and threshold > remaining[i] + _EPSILON:
+                scores = {
+                    pos: score for pos, score in scores.items()
+                    if score + remaining[i] + _EPSILON >= threshold
+                }
+                matched = ((pos, posting[pos]) for pos in scores if pos in posting)
+            elif allowed is not None and len(allowed) < len(posting):
+                matched = ((pos, posting[pos]) for pos in allowed if pos in posting)
+            else:
+                matched = (
+                    (pos, tf) for pos, tf in posting.items() if allowed is None or pos in allowed
+                )
+            for pos, tf in matched:
+                relative_length = self.doc_lengths[pos] / avg_length if avg_length else 0.0
+                length_norm = 1.0 - b + b * relative_length
+                gain = idf * (tf * (k1 + 1.0)) / (tf + k1 * length_norm)
+                scores[pos] = scores.get(pos, 0.0) + gain
+                scored += 1
+        if stats is not None:
+            stats["scored"] = scored
+
+        # Ties keep cache order so results stay deterministic.
+        return heapq.nlargest(
+            top_k,
+            ((score, pos) for pos, score in scores.items()),
+            key=lambda item: (item[0], -item[1]),
+        )
@@ -11,21 +11,72 @@ os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
 os.environ.setdefault("HF_HUB_DISABLE_PROGRESS_BARS", "1")
 
 EXPRESS_BASE_URL = os.getenv("EXPRESS_BASE_URL")
+EXPRESS_TIMEOUT_SECONDS = float(os.getenv("EXPRESS_TIMEOUT_SECONDS", "10"))
+EXPRESS_MAX_CONCURRENCY = int(os.getenv("EXPRESS_MAX_CONCURRENCY", "8"))
+# 0 requests the whole limit in one page; cursors returned by Express are still followed.
+EXPRESS_PAGE_SIZE = int(os.getenv("EXPRESS_PAGE_SIZE", "0"))
 
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
 OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
 OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", "2"))
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "4"))
 
 RAG_USE_LLM = os.getenv("RAG_USE_LLM", "true").lower() in ("1", "true", "yes")
 RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
 RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.1"))
+RAG_EXACT_SEARCH_THRESHOLD = int(os.getenv("RAG_EXACT_SEARCH_THRESHOLD", "2000"))
+RAG_BATCH_MAX_QUESTIONS = int(os.getenv("RAG_BATCH_MAX_QUESTIONS", "64"))
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "900"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+RAG_SINGLE_FLIGHT_ENABLED = os.getenv("RAG_SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
 
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama")
 
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "chroma")
 CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "readings")
+CHROMA_COLLECTION_GC_DELAY_SECONDS = float(os.getenv("CHROMA_COLLECTION_GC_DELAY_SECONDS", "30"))
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+EMBED_ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+EMBED_BATCHING_ENABLED = os.getenv("EMBED_BATCHING_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+EMBED_TORCH_THREADS = int(os.getenv("EMBED_TORCH_THREADS", "0"))
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024"))
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBED_CACHE_PATH = os.getenv(
+    "EMBED_CACHE_PATH",
+    os.path.join(CHROMA_PERSIST_DIR, "embedding_cache.sqlite3"),
+)
+
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(CHROMA_PERSIST_DIR, "snapshots"))
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))
+SNAPSHOT_DELTA_MAX_RATIO = float(os.getenv("SNAPSHOT_DELTA_MAX_RATIO", "0.25"))
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "1.0"))
 
 AUTO_INGEST_ON_STARTUP = os.getenv("AUTO_INGEST_ON_STARTUP", "true").lower() in ("1", "true", "yes")
 AUTO_INGEST_REFRESH_SECONDS = int(os.getenv("AUTO_INGEST_REFRESH_SECONDS", "600"))
+AUTO_INGEST_DELTA = os.getenv("AUTO_INGEST_DELTA", "true").lower() in ("1", "true", "yes")
+# Incremental cycles append readings newer than the stored watermarks; a full
+# replace refresh still runs every EXPRESS_FULL_REFRESH_SECONDS to prune old rows.
+EXPRESS_INCREMENTAL = os.getenv("EXPRESS_INCREMENTAL", "true").lower() in ("1", "true", "yes")
+EXPRESS_FULL_REFRESH_SECONDS = float(os.getenv("EXPRESS_FULL_REFRESH_SECONDS", "21600"))
+EXPRESS_WATERMARK_PATH = os.getenv(
+    "EXPRESS_WATERMARK_PATH",
+    os.path.join(CHROMA_PERSIST_DIR, "express_watermarks.json"),
+)
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "512"))
+INGEST_UPSERT_RETRIES = int(os.getenv("INGEST_UPSERT_RETRIES", "2"))
+INGEST_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "0.5"))
+# 0 waits on the ingest lock without a deadline; the kernel frees it if the holder dies.
+INGEST_LOCK_TIMEOUT_SECONDS = float(os.getenv("INGEST_LOCK_TIMEOUT_SECONDS", "0"))
+RAG_READ_LOCK_ENABLED = os.getenv("RAG_READ_LOCK_ENABLED", "true").lower() in ("1", "true", "yes")
+RAG_READ_LOCK_TIMEOUT_SECONDS = float(os.getenv("RAG_READ_LOCK_TIMEOUT_SECONDS", "5"))
 EXPRESS_DEFAULT_LIMIT = int(os.getenv("EXPRESS_DEFAULT_LIMIT", "1000"))
\ No newline at end of file
@@ -0,0 +1,217 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from typing import Sequence
+
+from .state_codes import normalize_state_code
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _keys(doc) -> tuple[str, str, str]:
+    return (
+        normalize_state_code(str(doc.get("state") or "")) or "",
+        str(doc.get("type") or "").lower(),
+        str(doc.get("recorded_date") or ""),
+    )
+
+
+class DocumentIndex:
+    """
+    Secondary indexes over one generation of the document cache.
+    Postings hold row positions into ``documents`` so filtered scans only
+    touch matching rows; counts for exact filters are precomputed.
+    """
+
+    def __init__(self, documents: Sequence[dict]):
+        self.documents = documents
+        self.by_state: dict[str, list[int]] = {}
+        self.by_type: dict[str, list[int]] = {}
+        self.by_date: dict[str, list[int]] = {}
+        self._states: list[str] = []
+        self._types: list[str] = []
+        self._dates: list[str] = []
+        self._range_dates: list[str] = []
+        self._counts: dict[tuple[str | None, str | None, str | None], int] = {}
+
+        for pos, doc in enumerate(documents):
+            state, doc_type, recorded_date = _keys(doc)
+            self._states.append(state)
+            self._types.append(doc_type)
+            self._dates.append(recorded_date)
+            # Only well-formed dates take part in range filters; the vector
+            # store can only range-filter rows with a parsed day ordinal.
+            self._range_dates.append(recorded_date if _ISO_DATE.fullmatch(recorded_date) else "")
+            self.by_state.setdefault(state, []).append(pos)
+            self.by_type.setdefault(doc_type, []).append(pos)
+            self.by_date.setdefault(recorded_date, []).append(pos)
+            self._count_row(state, doc_type, recorded_date, 1)
+
+        # Positions ordered by recorded_date so range filters are two bisects.
+        self._date_order = sorted(range(len(self._range_dates)), key=self._range_dates.__getitem__)
+        self._sorted_dates = [self._range_dates[pos] for pos in self._date_order]
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _count_row(self, state: str, doc_type: str, recorded_date: str, delta: int) -> None:
+        for key in (
+            (None, None, None),
+            (state, None, None),
+            (None, doc_type, None),
+            (None, None, recorded_date),
+            (state, doc_type, None),
+            (state, None, recorded_date),
+            (None, doc_type, recorded_date),
+            (state, doc_type, recorded_date),
+        ):
+            count = self._counts.get(key, 0) + delta
+            if count:
+                self._counts[key] = count
+            else:
+                self._counts.pop(key, None)
+
+    def updated(self, positions: Sequence[int], documents: Sequence[dict]) -> "DocumentIndex":
+        """
+        Return a new index over ``documents`` in which only the rows at
+        ``positions`` (rewritten in place, or appended past the end) are
+        re-indexed. Flat columns are copied; postings lists are copied only
+        for the keys a changed row leaves or joins, so the previous
+        generation is untouched.
+        """
+        index = DocumentIndex.__new__(DocumentIndex)
+        index.documents = documents
+        index.by_state = dict(self.by_state)
+        index.by_type = dict(self.by_type)
+        index.by_date = dict(self.by_date)
+        index._states = list(self._states)
+        index._types = list(self._types)
+        index._dates = list(self._dates)
+        index._range_dates = list(self._range_dates)
+        index._counts = dict(self._counts)
+        index._date_order = list(self._date_order)
+        index._sorted_dates = list(self._sorted_dates)
+        copied: set[tuple[str, str]] = set()
+
+        def _own(name: str, postings: dict[str, list[int]], key: str) -> list[int]:
+            if (name, key) not in copied:
+                postings[key] = list(postings.get(key, ()))
+                copied.add((name, key))
+            return postings[key]
+
+        for pos in sorted(set(positions)):
+            state, doc_type, recorded_date = _keys(documents[pos])
+            range_date = recorded_date if _ISO_DATE.fullmatch(recorded_date) else ""
+            if pos < len(index._states):
+                previous = (index._states[pos], index._types[pos], index._dates[pos])
+                if previous == (state, doc_type, recorded_date):
+                    continue
+                for name, postings, key in zip(
+                    ("state", "type", "date"), (index.by_state, index.by_type, index.by_date), previous
+                ):
+                    posting = _own(name, postings, key)
+                    posting.pop(bisect_left(posting, pos))
+                    if not posting:
+                        del postings[key]
+                        copied.discard((name, key))
+                index._count_row(*previous, -1)
+                previous_range = index._range_dates[pos]
+                lo = bisect_left(index._sorted_dates, previous_range)
+                at = index._date_order.index(pos, lo)
+                del index._date_order[at]
+                del index._sorted_dates[at]
+                index._states[pos], index._types[pos], index._dates[pos] = state, doc_type, recorded_date
+                index._range_dates[pos] = range_date
+            else:
+                index._states.append(state)
+                index._types.append(doc_type)
+                index._dates.append(recorded_date)
+                index._range_dates.append(range_date)
+            for name, postings, key in zip(
+                ("state", "type", "date"), (index.by_state, index.by_type, index.by_date), (state, doc_type, recorded_date)
+            ):
+                insort(_own(name, postings, key), pos)
+            index._count_row(state, doc_type, recorded_date, 1)
+            at = bisect_right(index._sorted_dates, range_date)
+            index._date_order.insert(at, pos)
+            index._sorted_dates.insert(at, range_date)
+        return index
+
+    def count(
+        self,
+        state: str | None = None,
+        doc_type: str | None = None,
+        recorded_date: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> int:
+        if date_from or date_to:
+            return len(
+                self.positions(
+                    state=state,
+                    doc_type=doc_type,
+                    recorded_date=recorded_date,
+                    date_from=date_from,
+                    date_to=date_to,
+                )
+            )
+        key = (
+            normalize_state_code(state) if state else None,
+            doc_type.lower() if doc_type else None,
+            recorded_date or None,
+        )
+        return self._counts.get(key, 0)
+
+    def positions(
+        self,
+        state: str | None = None,
+        doc_type: str | None = None,
+        recorded_date: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[int]:
+        """Return matching row positions in ascending order."""
+        state_key = normalize_state_code(state) if state else None
+        type_key = doc_type.lower() if doc_type else None
+
+        candidates: list[Sequence[int]] = []
+        if state_key is not None:
+            candidates.append(self.by_state.get(state_key, []))
+        if type_key is not None:
+            candidates.append(self.by_type.get(type_key, []))
+        if recorded_date:
+            candidates.append(self.by_date.get(recorded_date, []))
+        if date_from or date_to:
+            # Undated rows sort first and never satisfy a range.
+            if date_from:
+                lo = bisect_left(self._sorted_dates, date_from)
+            else:
+                lo = bisect_right(self._sorted_dates, "")
+            hi = bisect_right(self._sorted_dates, date_to) if date_to else len(self._sorted_dates)
+            candidates.append(sorted(self._date_order[lo:hi]))
+        if not candidates:
+            return list(range(len(self)))
+
+        smallest = min(candidates, key=len)
+        if not smallest:
+            return []
+
+        matches = []
+        for pos in smallest:
+            if state_key is not None and self._states[pos] != state_key:
+                continue
+            if type_key is not None and self._types[pos] != type_key:
+                continue
+            if recorded_date and self._dates[pos] != recorded_date:
+                continue
+            range_date = self._range_dates[pos]
+            if (date_from or date_to) and not range_date:
+                continue
+            if date_from and range_date < date_from:
+                continue
+            if date_to and range_date > date_to:
+                continue
+            matches.append(pos)
+        return matches
+
+    def filter(self, **filters) -> list[dict]:
+        return [self.documents[pos] for pos in self.positions(**filters)]
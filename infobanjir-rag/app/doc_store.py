@@ -0,0 +1,268 @@
+import math
+import re
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from datetime import date
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Buffer-backed columns: high-cardinality strings kept in one bytearray each.
+_BUFFER_COLUMNS = ("id", "text")
+# Interned columns: low-cardinality strings stored as uint32 codes (0 = missing).
+_INTERNED_COLUMNS = ("title", "source", "type", "state", "recorded_at")
+# Numeric columns: NaN (floats) or 0 (day ordinals) mark a missing value.
+_FLOAT_COLUMNS = ("value", "recorded_epoch")
+_DAY_COLUMNS = ("recorded_date", "recorded_day")
+_KEYS = _BUFFER_COLUMNS + _INTERNED_COLUMNS + _FLOAT_COLUMNS + _DAY_COLUMNS
+_KEY_SET = frozenset(_KEYS)
+
+_MISSING = object()
+
+
+class DocumentRow(Mapping):
+    """Read-only dict-like view of one row of a :class:`DocumentStore`."""
+
+    __slots__ = ("_store", "_pos")
+
+    def __init__(self, store: "DocumentStore", pos: int):
+        self._store = store
+        self._pos = pos
+
+    def __getitem__(self, key: str):
+        value = self._store.value(self._pos, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        value = self._store.value(self._pos, key)
+        return default if value is _MISSING else value
+
+    def __iter__(self) -> Iterator[str]:
+        store, pos = self._store, self._pos
+        for key in _KEYS:
+            if store.value(pos, key) is not _MISSING:
+                yield key
+        yield from store._extras.get(pos, ())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"DocumentRow({dict(self)!r})"
+
+
+class DocumentStore(Sequence):
+    """
+    Column-oriented document cache. Texts and ids live in contiguous UTF-8
+    buffers, state/type/title/source/timestamp strings are interned to integer
+    codes, values are a float array and dates are day ordinals. Rows are
+    exposed as :class:`DocumentRow` views with the same keys the cached dicts
+    had, so callers keep using ``doc.get(...)``.
+    """
+
+    def __init__(self):
+        self._buffers = {name: bytearray() for name in _BUFFER_COLUMNS}
+        self._starts = {name: array("q") for name in _BUFFER_COLUMNS}
+        self._lengths = {name: array("i") for name in _BUFFER_COLUMNS}
+        self._codes = {name: array("I") for name in _INTERNED_COLUMNS}
+        self._values: list[str] = [""]
+        self._value_codes: dict[str, int] = {}
+        self._floats = {name: array("d") for name in _FLOAT_COLUMNS}
+        self._days = {name: array("i") for name in _DAY_COLUMNS}
+        # Keys outside the schema, or values that do not fit their column.
+        self._extras: dict[int, dict] = {}
+        # id -> row position (the last row carrying that id).
+        self._positions: dict[str, int] = {}
+        # Text bytes left behind by rows rewritten in place.
+        self._dead_bytes = 0
+        self._count = 0
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping]) -> "DocumentStore":
+        store = cls()
+        for row in rows:
+            store._append(row)
+        return store
+
+    def _intern(self, value: str) -> int:
+        code = self._value_codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._values.append(value)
+            self._value_codes[value] = code
+        return code
+
+    def _append(self, row: Mapping) -> None:
+        pos = self._count
+        self._count += 1
+        extras = {}
+        get = row.get
+        for name in _BUFFER_COLUMNS:
+            value = get(name, _MISSING)
+            buffer = self._buffers[name]
+            self._starts[name].append(len(buffer))
+            if value.__class__ is str:
+                raw = value.encode("utf-8")
+                self._lengths[name].append(len(raw))
+                buffer += raw
+                if name == "id":
+                    self._positions[value] = pos
+            else:
+                # -1 marks a missing value, distinct from an empty string.
+                self._lengths[name].append(-1)
+                if value is not _MISSING:
+                    extras[name] = value
+        for name in _INTERNED_COLUMNS:
+            value = get(name, _MISSING)
+            code = 0
+            if value.__class__ is str:
+                code = self._value_codes.get(value) or self._intern(value)
+            elif value is not _MISSING:
+                extras[name] = value
+            self._codes[name].append(code)
+        for name in _FLOAT_COLUMNS:
+            value = get(name, _MISSING)
+            if (value.__class__ is float or value.__class__ is int) and value == value:
+                self._floats[name].append(value)
+            else:
+                self._floats[name].append(math.nan)
+                if value is not _MISSING:
+                    extras[name] = value
+
+        day = 0
+        value = get("recorded_date", _MISSING)
+        if value.__class__ is str and _ISO_DATE.fullmatch(value):
+            try:
+                day = date.fromisoformat(value).toordinal()
+            except ValueError:
+                day = 0
+        if not day and value is not _MISSING:
+            extras["recorded_date"] = value
+        self._days["recorded_date"].append(day)
+        value = get("recorded_day", _MISSING)
+        if value.__class__ is int and value > 0:
+            self._days["recorded_day"].append(value)
+        else:
+            self._days["recorded_day"].append(0)
+            if value is not _MISSING:
+                extras["recorded_day"] = value
+
+        for key in row:
+            if key not in _KEY_SET:
+                extras[key] = row[key]
+        if extras:
+            self._extras[pos] = extras
+
+    def value(self, pos: int, key: str, default=_MISSING):
+        extras = self._extras.get(pos)
+        if extras is not None and key in extras:
+            return extras[key]
+        if key in self._lengths:
+            length = self._lengths[key][pos]
+            if length < 0:
+                return default
+            start = self._starts[key][pos]
+            return self._buffers[key][start:start + length].decode("utf-8")
+        if key in self._codes:
+            code = self._codes[key][pos]
+            return self._values[code] if code else default
+        if key in self._floats:
+            number = self._floats[key][pos]
+            return default if math.isnan(number) else number
+        if key in self._days:
+            day = self._days[key][pos]
+            if not day:
+                return default
+            return date.fromordinal(day).isoformat() if key == "recorded_date" else day
+        return default
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [DocumentRow(self, i) for i in range(*pos.indices(self._count))]
+        if pos < 0:
+            pos += self._count
+        if not 0 <= pos < self._count:
+            raise IndexError("document position out of range")
+        return DocumentRow(self, pos)
+
+    def ids(self) -> list[str | None]:
+        return [self.value(pos, "id", None) for pos in range(self._count)]
+
+    def position(self, doc_id: str) -> int | None:
+        """Row position of ``doc_id`` without decoding the id column."""
+        return self._positions.get(doc_id)
+
+    def distinct(self, key: str) -> set:
+        """Distinct non-missing values of an interned column without touching rows."""
+        if key in self._codes:
+            values = {self._values[code] for code in set(self._codes[key]) if code}
+        else:
+            values = {self.value(pos, key, None) for pos in range(self._count)}
+        values.update(extras[key] for extras in self._extras.values() if key in extras)
+        values.discard(None)
+        return values
+
+    def replaced(self, updates: Mapping[int, Mapping], appended: Sequence[Mapping]) -> "DocumentStore":
+        """
+        Copy-on-write update: rows at ``updates`` positions are replaced, then
+        ``appended`` rows are added at the end. Columns are copied as flat
+        arrays; rewritten texts are appended to the buffer and the store is
+        compacted once dead bytes outweigh live ones.
+        """
+        store = DocumentStore()
+        store._buffers = {name: bytearray(buffer) for name, buffer in self._buffers.items()}
+        store._starts = {name: array("q", column) for name, column in self._starts.items()}
+        store._lengths = {name: array("i", column) for name, column in self._lengths.items()}
+        store._codes = {name: array("I", column) for name, column in self._codes.items()}
+        store._values = list(self._values)
+        store._value_codes = dict(self._value_codes)
+        store._floats = {name: array("d", column) for name, column in self._floats.items()}
+        store._days = {name: array("i", column) for name, column in self._days.items()}
+        store._extras = dict(self._extras)
+        store._positions = dict(self._positions)
+        store._dead_bytes = self._dead_bytes
+        store._count = self._count
+
+        for row in appended:
+            store._append(row)
+        for pos, row in updates.items():
+            previous_id = store.value(pos, "id", None)
+            if store._positions.get(previous_id) == pos:
+                del store._positions[previous_id]
+            scratch = DocumentStore()
+            scratch._values = store._values
+            scratch._value_codes = store._value_codes
+            scratch._append(row)
+            if scratch._positions:
+                store._positions[next(iter(scratch._positions))] = pos
+            store._dead_bytes += max(0, store._lengths["text"][pos])
+            for name in _BUFFER_COLUMNS:
+                store._starts[name][pos] = len(store._buffers[name])
+                store._lengths[name][pos] = scratch._lengths[name][0]
+                store._buffers[name] += scratch._buffers[name]
+            for name in _INTERNED_COLUMNS:
+                store._codes[name][pos] = scratch._codes[name][0]
+            for name in _FLOAT_COLUMNS:
+                store._floats[name][pos] = scratch._floats[name][0]
+            for name in _DAY_COLUMNS:
+                store._days[name][pos] = scratch._days[name][0]
+            if 0 in scratch._extras:
+                store._extras[pos] = scratch._extras[0]
+            else:
+                store._extras.pop(pos, None)
+
+        live = len(store._buffers["text"]) - store._dead_bytes
+        if len(store._buffers["text"]) > 2 * live + 4096:
+            return DocumentStore.from_rows(store)
+        return store
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the column arrays and buffers."""
+        total = sum(len(buffer) for buffer in self._buffers.values())
+        for columns in (self._starts, self._lengths, self._codes, self._floats, self._days):
+            total += sum(column.itemsize * len(column) for column in columns.values())
+        return total
@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+from typing import Callable
+
+
+class _EmbedRequest:
+    __slots__ = ("texts", "vectors", "error", "done")
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.vectors: list[list[float]] | None = None
+        self.error: BaseException | None = None
+        self.done = threading.Event()
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent embedding calls for up to ``max_wait_seconds`` and
+    encodes them as one batch on a single worker thread, then hands each
+    caller its own slice of the vectors. Requests larger than
+    ``max_batch_size`` are split so query traffic can interleave with ingest.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 64,
+        max_wait_seconds: float = 0.005,
+    ):
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self._queue: queue.Queue[_EmbedRequest] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._texts = 0
+        self._last_batch_size = 0
+        self._max_batch_size_seen = 0
+        self._max_queue_depth = 0
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="embedding-batcher",
+                    daemon=True,
+                )
+                self._worker.start()
+
+    def submit(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        self._ensure_worker()
+        requests = [
+            _EmbedRequest(texts[start:start + self.max_batch_size])
+            for start in range(0, len(texts), self.max_batch_size)
+        ]
+        for request in requests:
+            self._queue.put(request)
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        vectors: list[list[float]] = []
+        for request in requests:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+            vectors.extend(request.vectors or [])
+        return vectors
+
+    def _collect(self) -> list[_EmbedRequest]:
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait_seconds
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = self.encode(texts)
+            except BaseException as exc:
+                for request in batch:
+                    request.error = exc
+                    request.done.set()
+                continue
+
+            offset = 0
+            for request in batch:
+                request.vectors = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.done.set()
+            with self._stats_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._texts += len(texts)
+                self._last_batch_size = len(texts)
+                self._max_batch_size_seen = max(self._max_batch_size_seen, len(texts))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "requests": self._requests,
+                "texts": self._texts,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size_seen": self._max_batch_size_seen,
+                "avg_batch_size": round(self._texts / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000.0,
+            }
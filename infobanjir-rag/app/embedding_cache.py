@@ -0,0 +1,96 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+
+
+def content_hash(text: str, model: str) -> str:
+    """Hash of everything an embedding depends on: the model and the exact text."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update((text or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent document-embedding cache keyed by document id and content hash.
+    Vectors are stored as float32 blobs in a small SQLite file so unchanged
+    readings are not re-embedded on every refresh.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " doc_id TEXT PRIMARY KEY,"
+                " content_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, ids: list[str], hashes: list[str]) -> dict[str, list[float]]:
+        """Return cached vectors for ids whose stored hash still matches."""
+        wanted = dict(zip(ids, hashes))
+        found: dict[str, list[float]] = {}
+        keys = list(wanted)
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's default bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT doc_id, content_hash, vector FROM embeddings WHERE doc_id IN ({placeholders})",
+                    chunk,
+                )
+                for doc_id, stored_hash, blob in rows:
+                    if wanted.get(doc_id) == stored_hash:
+                        found[doc_id] = np.frombuffer(blob, dtype=np.float32).tolist()
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, ids: list[str], hashes: list[str], vectors: list[list[float]]) -> None:
+        rows = [
+            (doc_id, digest, np.asarray(vector, dtype=np.float32).tobytes())
+            for doc_id, digest, vector in zip(ids, hashes, vectors)
+        ]
+        if not rows:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (doc_id, content_hash, vector) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def prune(self, keep_ids: set[str]) -> int:
+        """Drop entries for documents that are no longer in the collection."""
+        with closing(self._connect()) as conn, conn:
+            stored = [row[0] for row in conn.execute("SELECT doc_id FROM embeddings")]
+            stale = [(doc_id,) for doc_id in stored if doc_id not in keep_ids]
+            conn.executemany("DELETE FROM embeddings WHERE doc_id = ?", stale)
+        return len(stale)
+
+    def stats(self) -> dict:
+        with closing(self._connect()) as conn:
+            (entries,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
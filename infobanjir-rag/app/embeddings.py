@@ -0,0 +1,132 @@
+import threading
+from typing import TYPE_CHECKING
+
+from .config import (
+    EMBED_BACKEND,
+    EMBED_BATCH_MAX_SIZE,
+    EMBED_BATCH_MAX_WAIT_MS,
+    EMBED_BATCHING_ENABLED,
+    EMBED_MODEL,
+    EMBED_ONNX_INT8_FILE,
+    EMBED_TORCH_THREADS,
+    QUERY_EMBED_CACHE_SIZE,
+)
+from .embed_scheduler import EmbeddingBatcher
+from .lru_cache import LruCache
+from .rag_context import normalize_question
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+_EMBED_MODEL: "SentenceTransformer | None" = None
+_EMBED_MODEL_LOCK = threading.Lock()
+_QUERY_EMBEDDINGS = LruCache(QUERY_EMBED_CACHE_SIZE)
+_SUPPORTED_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def embedding_model_id(backend: str | None = None) -> str:
+    """Identifies which model/backend produced a vector; part of every cache key."""
+    return f"{EMBED_MODEL}:{backend or EMBED_BACKEND}"
+
+
+def load_embedder(backend: str | None = None) -> "SentenceTransformer":
+    backend = backend or EMBED_BACKEND
+    # Checked before the import so a bad name does not pay for loading torch.
+    if backend not in _SUPPORTED_BACKENDS:
+        raise RuntimeError(f"Unsupported embedding backend: {backend}")
+    # Imported lazily: sentence_transformers pulls in torch, which dominates startup.
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(EMBED_MODEL)
+    # ONNX backends need the optional `sentence-transformers[onnx]` extra.
+    if backend == "onnx":
+        return SentenceTransformer(EMBED_MODEL, backend="onnx")
+    return SentenceTransformer(
+        EMBED_MODEL,
+        backend="onnx",
+        model_kwargs={"file_name": EMBED_ONNX_INT8_FILE},
+    )
+
+
+def get_embedder() -> "SentenceTransformer":
+    global _EMBED_MODEL
+    if _EMBED_MODEL is not None:
+        return _EMBED_MODEL
+    with _EMBED_MODEL_LOCK:
+        if _EMBED_MODEL is None:
+            if EMBED_TORCH_THREADS > 0:
+                import torch
+
+                torch.set_num_threads(EMBED_TORCH_THREADS)
+            model = load_embedder()
+            # Run one encode so lazy kernels/graphs are built before real traffic.
+            model.encode(["warm-up"], normalize_embeddings=True)
+            _EMBED_MODEL = model
+    return _EMBED_MODEL
+
+
+def is_embedder_ready() -> bool:
+    return _EMBED_MODEL is not None
+
+
+def _encode(texts: list[str]) -> list[list[float]]:
+    model = get_embedder()
+    vectors = model.encode(texts, normalize_embeddings=True)
+    return vectors.tolist()
+
+
+_BATCHER = EmbeddingBatcher(
+    _encode,
+    max_batch_size=EMBED_BATCH_MAX_SIZE,
+    max_wait_seconds=EMBED_BATCH_MAX_WAIT_MS / 1000.0,
+)
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """
+    Encode texts with the shared model. Concurrent callers are coalesced into
+    one batch by the scheduler so threads do not each run their own encode.
+    """
+    if EMBED_BATCHING_ENABLED:
+        return _BATCHER.submit(texts)
+    return _encode(texts)
+
+
+def embed_query(question: str) -> list[float]:
+    """
+    Embed a user question once, reusing vectors for previously seen
+    (normalized) questions from a bounded LRU.
+    """
+    key = normalize_question(question)
+    vector = _QUERY_EMBEDDINGS.get(key)
+    if vector is None:
+        vector = embed_texts([question])[0]
+        _QUERY_EMBEDDINGS.put(key, vector)
+    return vector
+
+
+def embed_queries(questions: list[str]) -> list[list[float]]:
+    """Batch form of embed_query: every cache miss is embedded in one encode call."""
+    keys = [normalize_question(question) for question in questions]
+    vectors = [_QUERY_EMBEDDINGS.get(key) for key in keys]
+    missing: dict[str, int] = {}
+    for i, (key, vector) in enumerate(zip(keys, vectors)):
+        if vector is None and key not in missing:
+            missing[key] = i
+    if missing:
+        fresh = embed_texts([questions[i] for i in missing.values()])
+        computed = dict(zip(missing, fresh))
+        for key, vector in computed.items():
+            _QUERY_EMBEDDINGS.put(key, vector)
+        vectors = [vector if vector is not None else computed[key] for key, vector in zip(keys, vectors)]
+    return vectors
+
+
+def get_query_cache_stats() -> dict:
+    return _QUERY_EMBEDDINGS.stats()
+
+
+def get_scheduler_stats() -> dict:
+    return {"enabled": EMBED_BATCHING_ENABLED, **_BATCHER.stats()}
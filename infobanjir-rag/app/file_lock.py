@@ -0,0 +1,131 @@
+import fcntl
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+_BACKOFF_START_SECONDS = 0.001
+_BACKOFF_MAX_SECONDS = 0.05
+
+
+class _ModeStats:
+    __slots__ = ("acquired", "timeouts", "wait_total", "wait_max", "hold_total", "hold_max", "held")
+
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.held = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "held": self.held,
+            "wait_ms_total": round(self.wait_total * 1000.0, 3),
+            "wait_ms_max": round(self.wait_max * 1000.0, 3),
+            "wait_ms_avg": round(self.wait_total * 1000.0 / self.acquired, 3) if self.acquired else 0.0,
+            "hold_ms_total": round(self.hold_total * 1000.0, 3),
+            "hold_ms_max": round(self.hold_max * 1000.0, 3),
+        }
+
+
+class ReadWriteFileLock:
+    """
+    Shared/exclusive lock on a file using ``fcntl.flock``. Every acquisition
+    opens its own file description, so the kernel arbitrates between threads
+    and processes alike, blocked waiters sleep in the kernel, and a lock is
+    released automatically when its holder exits. Nested acquisitions on the
+    same thread are reentrant (shared inside exclusive is a no-op).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"shared": _ModeStats(), "exclusive": _ModeStats()}
+
+    @contextmanager
+    def shared(self, timeout: float | None = None) -> Iterator[None]:
+        with self._acquire(fcntl.LOCK_SH, "shared", timeout):
+            yield
+
+    @contextmanager
+    def exclusive(self, timeout: float | None = None) -> Iterator[None]:
+        with self._acquire(fcntl.LOCK_EX, "exclusive", timeout):
+            yield
+
+    @contextmanager
+    def _acquire(self, operation: int, mode: str, timeout: float | None) -> Iterator[None]:
+        held = getattr(self._local, "mode", None)
+        if held == "exclusive" or (held == "shared" and mode == "shared"):
+            yield
+            return
+        if held == "shared":
+            raise RuntimeError("Cannot upgrade a shared lock to exclusive")
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        started = time.monotonic()
+        try:
+            self._lock(fd, operation, timeout)
+        except TimeoutError:
+            os.close(fd)
+            with self._stats_lock:
+                self._stats[mode].timeouts += 1
+            raise
+        except BaseException:
+            os.close(fd)
+            raise
+        acquired = time.monotonic()
+        self._record_acquire(mode, acquired - started)
+        self._local.mode = mode
+        try:
+            yield
+        finally:
+            self._local.mode = None
+            # Closing the descriptor drops the flock.
+            os.close(fd)
+            self._record_release(mode, time.monotonic() - acquired)
+
+    def _lock(self, fd: int, operation: int, timeout: float | None) -> None:
+        if timeout is None:
+            fcntl.flock(fd, operation)
+            return
+        deadline = time.monotonic() + timeout
+        delay = _BACKOFF_START_SECONDS
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}") from None
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, _BACKOFF_MAX_SECONDS)
+
+    def _record_acquire(self, mode: str, waited: float) -> None:
+        with self._stats_lock:
+            stats = self._stats[mode]
+            stats.acquired += 1
+            stats.held += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+
+    def _record_release(self, mode: str, held: float) -> None:
+        with self._stats_lock:
+            stats = self._stats[mode]
+            stats.held -= 1
+            stats.hold_total += held
+            stats.hold_max = max(stats.hold_max, held)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {"path": self.path, **{mode: stats.as_dict() for mode, stats in self._stats.items()}}
@@ -1,64 +1,265 @@
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Iterable, Iterator, Mapping
+
 import httpx
 
-from .config import EXPRESS_BASE_URL, EXPRESS_DEFAULT_LIMIT
+from .config import (
+    EXPRESS_BASE_URL,
+    EXPRESS_DEFAULT_LIMIT,
+    EXPRESS_MAX_CONCURRENCY,
+    EXPRESS_PAGE_SIZE,
+    EXPRESS_TIMEOUT_SECONDS,
+    EXPRESS_WATERMARK_PATH,
+)
 from .state_codes import CANONICAL_STATE_CODES, normalize_state_code, to_upstream_state_code
+from .watermarks import ExpressWatermarks, watermark_key
 
+_RAIN_PATH = "/api/readings/latest/rain"
+_WATER_PATH = "/api/readings/latest/water_level"
 
-def fetch_express(path: str, params: dict) -> list[dict]:
+_STREAM_QUEUE_SIZE = 1000
+_METRICS = (("rain", _RAIN_PATH), ("water_level", _WATER_PATH))
+_STATION_TITLE_PREFIXES = {"rainfall": "Rainfall reading ", "water_level": "Water level reading "}
+_DOC_METRICS = {"rainfall": "rain", "water_level": "water_level"}
+
+log = logging.getLogger(__name__)
+
+_HTTP_CLIENT: httpx.Client | None = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+_WATERMARKS: ExpressWatermarks | None = None
+
+
+def get_http_client() -> httpx.Client:
+    """Shared keep-alive client sized for the fetch fan-out."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        with _HTTP_CLIENT_LOCK:
+            if _HTTP_CLIENT is None:
+                concurrency = max(1, EXPRESS_MAX_CONCURRENCY)
+                _HTTP_CLIENT = httpx.Client(
+                    timeout=EXPRESS_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(
+                        max_connections=concurrency,
+                        max_keepalive_connections=concurrency,
+                    ),
+                )
+    return _HTTP_CLIENT
+
+
+def close_http_client() -> None:
+    global _HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        client, _HTTP_CLIENT = _HTTP_CLIENT, None
+    if client is not None:
+        client.close()
+
+
+def get_watermarks() -> ExpressWatermarks:
+    global _WATERMARKS
+    if _WATERMARKS is None:
+        _WATERMARKS = ExpressWatermarks(EXPRESS_WATERMARK_PATH)
+    return _WATERMARKS
+
+
+def _iter_json_items(chunks: Iterable[str], envelope: dict) -> Iterator[dict]:
+    """
+    Yield the elements of a response's top-level ``items`` array as soon as
+    each one is complete, without holding the whole body. The remaining
+    top-level keys (e.g. a pagination cursor) are stored in ``envelope``.
+    The envelope is walked key by key, so an ``items`` key nested in another
+    value or text inside a string is never mistaken for the array.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+
+    def more() -> bool:
+        nonlocal buffer, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def peek(skip: str = " \t\r\n") -> str | None:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in skip:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not more():
+                return None
+
+    def value():
+        nonlocal pos
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not more():
+                    raise ValueError("Express response ended inside a value") from None
+                continue
+            # A scalar that ends the buffer (a number) may continue in the next chunk.
+            if end == len(buffer) and more():
+                continue
+            pos = end
+            return item
+
+    first = peek()
+    if first is None:
+        return
+    if first != "{":
+        raise ValueError("Express response is not a JSON object")
+    pos += 1
+    if peek() == "}":
+        return
+    while True:
+        if peek() != '"':
+            raise ValueError("Malformed Express response envelope")
+        key = value()
+        if peek() != ":":
+            raise ValueError("Malformed Express response envelope")
+        pos += 1
+        if key == "items" and peek() == "[":
+            pos += 1
+            while True:
+                char = peek(" \t\r\n,")
+                if char is None:
+                    raise ValueError("Express response ended inside the items array")
+                if char == "]":
+                    pos += 1
+                    break
+                yield value()
+        else:
+            peek()
+            envelope[key] = value()
+        char = peek()
+        if char == ",":
+            pos += 1
+        elif char == "}":
+            return
+        else:
+            raise ValueError("Malformed Express response envelope")
+
+
+def iter_express(
+    path: str,
+    params: dict,
+    stats: dict | None = None,
+    headers: dict | None = None,
+) -> Iterator[dict]:
+    """
+    Stream items from an Express endpoint, following ``next_cursor`` pages
+    until ``params["limit"]`` items have been read. ``EXPRESS_PAGE_SIZE``
+    caps each page; 0 asks for the whole limit in one page. ``headers`` are
+    sent with the first page only; a 304 answer yields nothing and sets
+    ``stats["not_modified"]``. The first page's ETag/Last-Modified and the
+    bytes read are recorded in ``stats``.
+    """
     url = f"{EXPRESS_BASE_URL}{path}"
-    with httpx.Client(timeout=10) as client:
-        response = client.get(url, params=params)
-        response.raise_for_status()
-        payload = response.json()
-    return payload.get("items", [])
+    remaining = params.get("limit")
+    cursor = None
+    stats = stats if stats is not None else {}
+    while True:
+        page_params = dict(params)
+        if remaining is not None and EXPRESS_PAGE_SIZE > 0:
+            page_params["limit"] = min(EXPRESS_PAGE_SIZE, remaining)
+        elif remaining is not None:
+            page_params["limit"] = remaining
+        if cursor:
+            page_params["cursor"] = cursor
+        envelope: dict = {}
+        count = 0
+        first_page = cursor is None
+        with get_http_client().stream(
+            "GET", url, params=page_params, headers=headers if first_page else None
+        ) as response:
+            if response.status_code == 304:
+                stats["not_modified"] = True
+                stats["pages"] = stats.get("pages", 0) + 1
+                return
+            response.raise_for_status()
+            if first_page:
+                stats["etag"] = response.headers.get("ETag")
+                stats["last_modified"] = response.headers.get("Last-Modified")
+            try:
+                for item in _iter_json_items(response.iter_text(), envelope):
+                    count += 1
+                    yield item
+            finally:
+                stats["bytes"] = stats.get("bytes", 0) + response.num_bytes_downloaded
+        stats["pages"] = stats.get("pages", 0) + 1
+        if remaining is not None:
+            remaining -= count
+        cursor = envelope.get("next_cursor") or envelope.get("nextCursor")
+        if not cursor or count == 0 or (remaining is not None and remaining <= 0):
+            return
 
 
-def build_docs_from_rain(items: list[dict]) -> list[dict]:
-    docs = []
-    for item in items:
-        state = normalize_state_code(item.get("state")) or "Unknown"
-        docs.append(
-            {
-                "id": f"rain-{item.get('station_id', 'unknown')}-{item.get('recorded_at', 'na')}",
-                "title": f"Rainfall reading {item.get('station_name', 'Unknown')}",
-                "source": item.get("source", "express"),
-                "type": "rainfall",
-                "state": state,
-                "recorded_at": item.get("recorded_at"),
-                "value": item.get("rain_mm"),
-                "text": (
-                    f"Rainfall reading at {item.get('station_name', 'Unknown')} "
-                    f"in {item.get('district', 'Unknown')}, {state} "
-                    f"recorded at {item.get('recorded_at', 'Unknown')} "
-                    f"with {item.get('rain_mm', 'Unknown')} mm."
-                ),
-            }
-        )
-    return docs
+def fetch_express(path: str, params: dict) -> list[dict]:
+    return list(iter_express(path, params))
 
 
-def build_docs_from_water(items: list[dict]) -> list[dict]:
-    docs = []
-    for item in items:
-        state = normalize_state_code(item.get("state")) or "Unknown"
-        docs.append(
-            {
-                "id": f"water-{item.get('station_id', 'unknown')}-{item.get('recorded_at', 'na')}",
-                "title": f"Water level reading {item.get('station_name', 'Unknown')}",
-                "source": item.get("source", "express"),
-                "type": "water_level",
-                "state": state,
-                "recorded_at": item.get("recorded_at"),
-                "value": item.get("river_level_m"),
-                "text": (
-                    f"Water level reading at {item.get('station_name', 'Unknown')} "
-                    f"in {item.get('district', 'Unknown')}, {state} "
-                    f"recorded at {item.get('recorded_at', 'Unknown')} "
-                    f"with {item.get('river_level_m', 'Unknown')} m."
-                ),
-            }
-        )
-    return docs
+def rain_doc(item: dict) -> dict:
+    state = normalize_state_code(item.get("state")) or "Unknown"
+    return {
+        "id": f"rain-{item.get('station_id', 'unknown')}-{item.get('recorded_at', 'na')}",
+        "title": f"Rainfall reading {item.get('station_name', 'Unknown')}",
+        "source": item.get("source", "express"),
+        "type": "rainfall",
+        "state": state,
+        "recorded_at": item.get("recorded_at"),
+        "value": item.get("rain_mm"),
+        "text": (
+            f"Rainfall reading at {item.get('station_name', 'Unknown')} "
+            f"in {item.get('district', 'Unknown')}, {state} "
+            f"recorded at {item.get('recorded_at', 'Unknown')} "
+            f"with {item.get('rain_mm', 'Unknown')} mm."
+        ),
+    }
+
+
+def iter_docs_from_rain(items: Iterable[dict]) -> Iterator[dict]:
+    return map(rain_doc, items)
+
+
+def build_docs_from_rain(items: Iterable[dict]) -> list[dict]:
+    return list(iter_docs_from_rain(items))
+
+
+def water_doc(item: dict) -> dict:
+    state = normalize_state_code(item.get("state")) or "Unknown"
+    return {
+        "id": f"water-{item.get('station_id', 'unknown')}-{item.get('recorded_at', 'na')}",
+        "title": f"Water level reading {item.get('station_name', 'Unknown')}",
+        "source": item.get("source", "express"),
+        "type": "water_level",
+        "state": state,
+        "recorded_at": item.get("recorded_at"),
+        "value": item.get("river_level_m"),
+        "text": (
+            f"Water level reading at {item.get('station_name', 'Unknown')} "
+            f"in {item.get('district', 'Unknown')}, {state} "
+            f"recorded at {item.get('recorded_at', 'Unknown')} "
+            f"with {item.get('river_level_m', 'Unknown')} m."
+        ),
+    }
+
+
+def iter_docs_from_water(items: Iterable[dict]) -> Iterator[dict]:
+    return map(water_doc, items)
+
+
+def build_docs_from_water(items: Iterable[dict]) -> list[dict]:
+    return list(iter_docs_from_water(items))
 
 
 def _safe_float(value: object) -> float | None:
@@ -78,12 +279,20 @@ def _risk_level(score: float) -> str:
     return "Low"
 
 
-def build_docs_from_flood_risk(rain_items: list[dict], water_items: list[dict]) -> list[dict]:
-    by_state: dict[str, dict[str, object]] = {}
+class FloodRiskAccumulator:
+    """
+    Running per-state maxima for the heuristic flood-risk summary, so risk
+    documents can be built from a stream of readings without keeping them.
+    """
 
-    for item in rain_items:
+    def __init__(self):
+        self.by_state: dict[str, dict[str, object]] = {}
+        self.max_rain_global: float | None = None
+        self.max_water_global: float | None = None
+
+    def _row(self, item: dict) -> dict[str, object]:
         state = normalize_state_code(item.get("state")) or "Unknown"
-        row = by_state.setdefault(
+        row = self.by_state.setdefault(
             state,
             {
                 "max_rain": None,
@@ -93,108 +302,338 @@ def build_docs_from_flood_risk(rain_items: list[dict], water_items: list[dict])
                 "latest_recorded_at": "",
             },
         )
-        rain = _safe_float(item.get("rain_mm"))
-        if rain is not None and (row["max_rain"] is None or rain > row["max_rain"]):
-            row["max_rain"] = rain
-            row["max_rain_station"] = item.get("station_name") or "Unknown station"
         recorded_at = str(item.get("recorded_at") or "")
         if recorded_at and recorded_at > row["latest_recorded_at"]:
             row["latest_recorded_at"] = recorded_at
+        return row
 
-    for item in water_items:
-        state = normalize_state_code(item.get("state")) or "Unknown"
-        row = by_state.setdefault(
-            state,
-            {
-                "max_rain": None,
-                "max_rain_station": "Unknown station",
-                "max_water": None,
-                "max_water_station": "Unknown station",
-                "latest_recorded_at": "",
-            },
-        )
+    def add_rain(self, item: dict) -> None:
+        row = self._row(item)
+        rain = _safe_float(item.get("rain_mm"))
+        if rain is None:
+            return
+        if row["max_rain"] is None or rain > row["max_rain"]:
+            row["max_rain"] = rain
+            row["max_rain_station"] = item.get("station_name") or "Unknown station"
+        if self.max_rain_global is None or rain > self.max_rain_global:
+            self.max_rain_global = rain
+
+    def add_water(self, item: dict) -> None:
+        row = self._row(item)
         water = _safe_float(item.get("river_level_m"))
-        if water is not None and (row["max_water"] is None or water > row["max_water"]):
+        if water is None:
+            return
+        if row["max_water"] is None or water > row["max_water"]:
             row["max_water"] = water
             row["max_water_station"] = item.get("station_name") or "Unknown station"
-        recorded_at = str(item.get("recorded_at") or "")
-        if recorded_at and recorded_at > row["latest_recorded_at"]:
-            row["latest_recorded_at"] = recorded_at
+        if self.max_water_global is None or water > self.max_water_global:
+            self.max_water_global = water
 
-    all_rain_values = [_safe_float(item.get("rain_mm")) for item in rain_items]
-    all_water_values = [_safe_float(item.get("river_level_m")) for item in water_items]
-    max_rain_global = max((v for v in all_rain_values if v is not None), default=0.0)
-    max_water_global = max((v for v in all_water_values if v is not None), default=0.0)
+    def add_document(self, doc: Mapping) -> None:
+        """Fold in a stored rainfall or water-level document, e.g. from the cache."""
+        prefix = _STATION_TITLE_PREFIXES.get(doc.get("type"))
+        if prefix is None:
+            return
+        item = {
+            "state": doc.get("state"),
+            "recorded_at": doc.get("recorded_at"),
+            "station_name": str(doc.get("title") or "").removeprefix(prefix) or None,
+        }
+        if doc.get("type") == "rainfall":
+            self.add_rain({**item, "rain_mm": doc.get("value")})
+        else:
+            self.add_water({**item, "river_level_m": doc.get("value")})
 
-    docs = []
-    for state, row in by_state.items():
-        max_rain = row["max_rain"]
-        max_water = row["max_water"]
+    def docs(self, exclude_states: Iterable[str] = ()) -> list[dict]:
+        excluded = set(exclude_states)
+        max_rain_global = self.max_rain_global or 0.0
+        max_water_global = self.max_water_global or 0.0
 
-        rain_norm = 0.0 if max_rain is None or max_rain_global <= 0 else max_rain / max_rain_global
-        water_norm = 0.0 if max_water is None or max_water_global <= 0 else max_water / max_water_global
+        docs = []
+        for state, row in self.by_state.items():
+            if state in excluded:
+                continue
+            max_rain = row["max_rain"]
+            max_water = row["max_water"]
 
-        score = round((0.5 * rain_norm + 0.5 * water_norm) * 100.0, 1)
-        risk_level = _risk_level(score)
-        recorded_at = str(row["latest_recorded_at"] or "Unknown time")
-        recorded_date = recorded_at[:10] if len(recorded_at) >= 10 else "na"
-        rain_label = "n/a" if max_rain is None else f"{max_rain:.2f} mm"
-        water_label = "n/a" if max_water is None else f"{max_water:.2f} m"
+            rain_norm = 0.0 if max_rain is None or max_rain_global <= 0 else max_rain / max_rain_global
+            water_norm = 0.0 if max_water is None or max_water_global <= 0 else max_water / max_water_global
 
-        docs.append(
-            {
-                "id": f"risk-{state}-{recorded_date}",
-                "title": f"Heuristic flood risk summary for {state}",
-                "source": "derived_heuristic",
-                "type": "flood_risk",
-                "state": state,
-                "recorded_at": recorded_at,
-                "value": score,
-                "text": (
-                    f"Flood risk in {state} is assessed as {risk_level} "
-                    f"(score {score}/100) based on latest available readings. "
-                    f"Highest recent rainfall: {rain_label} at {row['max_rain_station']}. "
-                    f"Highest recent river level: {water_label} at {row['max_water_station']}. "
-                    "This is a heuristic estimate from observed rainfall and river levels, "
-                    "not an official warning classification."
-                ),
-            }
-        )
+            score = round((0.5 * rain_norm + 0.5 * water_norm) * 100.0, 1)
+            risk_level = _risk_level(score)
+            recorded_at = str(row["latest_recorded_at"] or "Unknown time")
+            recorded_date = recorded_at[:10] if len(recorded_at) >= 10 else "na"
+            rain_label = "n/a" if max_rain is None else f"{max_rain:.2f} mm"
+            water_label = "n/a" if max_water is None else f"{max_water:.2f} m"
 
-    return docs
+            docs.append(
+                {
+                    "id": f"risk-{state}-{recorded_date}",
+                    "title": f"Heuristic flood risk summary for {state}",
+                    "source": "derived_heuristic",
+                    "type": "flood_risk",
+                    "state": state,
+                    "recorded_at": recorded_at,
+                    "value": score,
+                    "text": (
+                        f"Flood risk in {state} is assessed as {risk_level} "
+                        f"(score {score}/100) based on latest available readings. "
+                        f"Highest recent rainfall: {rain_label} at {row['max_rain_station']}. "
+                        f"Highest recent river level: {water_label} at {row['max_water_station']}. "
+                        "This is a heuristic estimate from observed rainfall and river levels, "
+                        "not an official warning classification."
+                    ),
+                }
+            )
 
+        return docs
 
-def ingest_from_express(state: str | None = None, limit: int | None = None) -> list[dict]:
+
+def build_docs_from_flood_risk(rain_items: list[dict], water_items: list[dict]) -> list[dict]:
+    accumulator = FloodRiskAccumulator()
+    for item in rain_items:
+        accumulator.add_rain(item)
+    for item in water_items:
+        accumulator.add_water(item)
+    return accumulator.docs()
+
+
+class ExpressPull:
+    """
+    Per-request timings, failures, transfer sizes and document count for one
+    Express pull, plus the watermarks it proposes. Watermarks are only
+    persisted by the caller once the pulled documents have been ingested.
+    """
+
+    def __init__(self):
+        self.docs: list[dict] = []
+        self.documents = 0
+        self.requests: list[dict] = []
+        self.failed_states: list[str] = []
+        self.watermarks: dict[str, dict] = {}
+        self.incremental = False
+        self.new_readings = 0
+        self.rows_skipped = 0
+        self.bytes_downloaded = 0
+        self.elapsed_ms = 0.0
+
+    def report(self) -> dict:
+        return {
+            "mode": "incremental" if self.incremental else "full",
+            "documents": self.documents,
+            "new_readings": self.new_readings,
+            "rows_skipped": self.rows_skipped,
+            "not_modified": sum(1 for entry in self.requests if entry.get("not_modified")),
+            "bytes_downloaded": self.bytes_downloaded,
+            "requests": self.requests,
+            "failed_states": self.failed_states,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+        }
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _put(out: queue.Queue, message: tuple, cancel: threading.Event) -> None:
+    # Bounded queue: producers wait for the consumer, but give up if it is gone.
+    while not cancel.is_set():
+        try:
+            out.put(message, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise _Cancelled
+
+
+def _stream_state(
+    code: str,
+    limit: int,
+    out: queue.Queue,
+    cancel: threading.Event,
+    marks: Mapping[str, dict],
+) -> None:
+    """
+    Stream rain and water readings for one state into ``out``; never raises.
+    With a watermark for a metric the request carries ``since`` and the
+    stored validators. Readings older than the mark, or at the mark from a
+    station already ingested there, are dropped here in case the upstream
+    ignores them; the mark records those stations so a repeated cycle
+    yields nothing. A "done" message is always posted, with
+    any unexpected failure recorded against the metric it interrupted, so
+    the consumer never waits on a worker that has died.
+    """
+    results = []
+    entry: dict | None = None
+    try:
+        for metric, path in _METRICS:
+            started = time.perf_counter()
+            mark = marks.get(metric)
+            since = str(mark.get("recorded_at") or "") if mark else ""
+            at_since = set(mark.get("stations") or ()) if mark and since else set()
+            params = {"state": to_upstream_state_code(code), "limit": limit}
+            headers = {}
+            if since:
+                params["since"] = since
+            if mark and mark.get("etag"):
+                headers["If-None-Match"] = mark["etag"]
+            if mark and mark.get("last_modified"):
+                headers["If-Modified-Since"] = mark["last_modified"]
+            entry = {"state": code, "metric": metric, "items": 0, "skipped": 0}
+            newest = since
+            at_newest = set(at_since)
+            stats: dict = {}
+            try:
+                for item in iter_express(path, params, stats, headers=headers or None):
+                    recorded_at = str(item.get("recorded_at") or "")
+                    station = str(item.get("station_id", "unknown"))
+                    # Another station may report at the mark's instant, so equal
+                    # timestamps are deduped by station rather than dropped.
+                    if since and recorded_at and (
+                        recorded_at < since or (recorded_at == since and station in at_since)
+                    ):
+                        entry["skipped"] += 1
+                        continue
+                    _put(out, (metric, item), cancel)
+                    entry["items"] += 1
+                    if recorded_at > newest:
+                        newest = recorded_at
+                        at_newest = set()
+                    if recorded_at == newest:
+                        at_newest.add(station)
+            except (httpx.HTTPError, ValueError) as exc:
+                entry["error"] = f"{type(exc).__name__}: {exc}"
+            entry["pages"] = stats.get("pages", 0)
+            entry["bytes"] = stats.get("bytes", 0)
+            if stats.get("not_modified"):
+                entry["not_modified"] = True
+            if "error" not in entry:
+                entry["watermark"] = {
+                    "recorded_at": newest,
+                    "stations": sorted(at_newest),
+                    "etag": stats.get("etag"),
+                    "last_modified": stats.get("last_modified"),
+                }
+            entry["ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+            results.append(entry)
+            entry = None
+    except _Cancelled:
+        return
+    except Exception as exc:
+        log.warning("Express stream for %s failed", code, exc_info=True)
+        failed = entry if entry is not None else {"state": code, "metric": None, "items": 0, "skipped": 0}
+        failed.pop("watermark", None)
+        failed.setdefault("pages", 0)
+        failed.setdefault("bytes", 0)
+        failed["error"] = f"{type(exc).__name__}: {exc}"
+        results.append(failed)
+    try:
+        _put(out, ("done", code, results), cancel)
+    except _Cancelled:
+        return
+
+
+def stream_from_express(
+    state: str | None = None,
+    limit: int | None = None,
+    pull: ExpressPull | None = None,
+    watermarks: ExpressWatermarks | None = None,
+    baseline: Iterable[Mapping] = (),
+) -> Iterator[dict]:
+    """
+    Yield documents while readings for one state, or for every state
+    concurrently over the shared client, are still streaming in. Items pass
+    through a bounded queue and straight into the document builders, so
+    memory does not grow with ``limit``; flood-risk summaries are emitted at
+    the end from running maxima. A state whose rain or water request fails
+    is added to ``pull.failed_states`` and gets no risk summary.
+
+    With ``watermarks`` the pull is incremental: only readings newer than
+    each stored mark are requested and yielded. The newest ``limit`` stored
+    readings per state and metric in ``baseline``, less the new readings
+    that push them out, seed the risk maxima, so summaries cover the same
+    window a full pull would; they are only emitted when at least one new
+    reading arrived.
+    """
     limit = limit if limit is not None else EXPRESS_DEFAULT_LIMIT
+    pull = pull if pull is not None else ExpressPull()
+    pull.incremental = watermarks is not None
+    codes = [normalize_state_code(state) or state] if state else list(CANONICAL_STATE_CODES)
+    started = time.perf_counter()
+    out: queue.Queue = queue.Queue(maxsize=_STREAM_QUEUE_SIZE)
+    cancel = threading.Event()
+    risk = FloodRiskAccumulator()
+    windows: dict[tuple[str, str], list[Mapping]] = {}
+    fresh: dict[tuple[str, str], int] = {}
+    if watermarks is not None:
+        wanted = set(codes)
+        for doc in baseline:
+            metric = _DOC_METRICS.get(doc.get("type"))
+            if metric is not None and doc.get("state") in wanted:
+                windows.setdefault((doc["state"], metric), []).append(doc)
+        for docs in windows.values():
+            docs.sort(key=lambda doc: str(doc.get("recorded_at") or ""), reverse=True)
+            del docs[limit:]
+    seen: set[str] = set()
+    workers = max(1, min(EXPRESS_MAX_CONCURRENCY, len(codes)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="express-fetch")
+    try:
+        for code in codes:
+            marks = {}
+            if watermarks is not None:
+                marks = {metric: watermarks.get(code, metric) for metric, _ in _METRICS}
+            pool.submit(_stream_state, code, limit, out, cancel, marks)
+        pending = len(codes)
+        while pending:
+            message = out.get()
+            if message[0] == "done":
+                _, code, results = message
+                for entry in results:
+                    watermark = entry.pop("watermark", None)
+                    if watermark is not None:
+                        pull.watermarks[watermark_key(code, entry["metric"])] = watermark
+                    pull.rows_skipped += entry["skipped"]
+                    pull.bytes_downloaded += entry["bytes"]
+                pull.requests.extend(results)
+                if any("error" in entry for entry in results):
+                    pull.failed_states.append(code)
+                pending -= 1
+                continue
+            metric, item = message
+            pull.new_readings += 1
+            key = (normalize_state_code(item.get("state")) or "Unknown", metric)
+            fresh[key] = fresh.get(key, 0) + 1
+            if metric == "rain":
+                risk.add_rain(item)
+                doc = rain_doc(item)
+            else:
+                risk.add_water(item)
+                doc = water_doc(item)
+            if doc["id"] in seen:
+                continue
+            seen.add(doc["id"])
+            pull.documents += 1
+            yield doc
+        if watermarks is None or pull.new_readings:
+            for key, docs in windows.items():
+                for doc in docs[: max(0, limit - fresh.get(key, 0))]:
+                    risk.add_document(doc)
+            for doc in risk.docs(exclude_states=pull.failed_states):
+                if doc["id"] not in seen:
+                    seen.add(doc["id"])
+                    pull.documents += 1
+                    yield doc
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False)
+        pull.elapsed_ms = (time.perf_counter() - started) * 1000.0
 
-    if state:
-        upstream_state = to_upstream_state_code(state)
-        params = {"state": upstream_state, "limit": limit}
-        rain_items = fetch_express("/api/readings/latest/rain", params)
-        water_items = fetch_express("/api/readings/latest/water_level", params)
-        risk_docs = build_docs_from_flood_risk(rain_items, water_items)
-        return build_docs_from_rain(rain_items) + build_docs_from_water(water_items) + risk_docs
-
-    # No state specified: pull for every state to maximize coverage.
-    all_docs = {}
-    all_rain_items = []
-    all_water_items = []
-    for code in CANONICAL_STATE_CODES:
-        upstream_state = to_upstream_state_code(code)
-        params = {"state": upstream_state, "limit": limit}
-        rain_items = fetch_express("/api/readings/latest/rain", params)
-        water_items = fetch_express("/api/readings/latest/water_level", params)
-        all_rain_items.extend(rain_items)
-        all_water_items.extend(water_items)
-        for doc in build_docs_from_rain(rain_items) + build_docs_from_water(water_items):
-            doc_id = doc.get("id")
-            if doc_id:
-                all_docs[doc_id] = doc
-    for doc in build_docs_from_flood_risk(all_rain_items, all_water_items):
-        doc_id = doc.get("id")
-        if doc_id:
-            all_docs[doc_id] = doc
-    return list(all_docs.values())
 
+def collect_from_express(state: str | None = None, limit: int | None = None) -> ExpressPull:
+    pull = ExpressPull()
+    pull.docs = list(stream_from_express(state=state, limit=limit, pull=pull))
+    return pull
 
 
+def ingest_from_express(state: str | None = None, limit: int | None = None) -> list[dict]:
+    return collect_from_express(state=state, limit=limit).docs
@@ -1,12 +1,30 @@
-from ..llm_models import LlmResponse, LlmPrompt
+import json
+import threading
+from typing import Iterator
+
+from ..llm_models import LlmResponse, LlmPrompt, LlmStreamChunk
 from pydantic import BaseModel
 import requests
+from requests.adapters import HTTPAdapter
 
 
 class OllamaMessage(BaseModel):
     role: str
     content: str
 
+class OllamaStreamMessage(BaseModel):
+    role: str | None = None
+    content: str = ""
+
+class OllamaStreamValidator(BaseModel):
+    model: str | None = None
+    message: OllamaStreamMessage | None = None
+    done: bool = False
+    total_duration: int | None = None
+    prompt_eval_count: int | None = None
+    eval_count: int | None = None
+    error: str | None = None
+
 class OllamaJsonValidator(BaseModel):
     model: str | None = None
     message: OllamaMessage
@@ -20,20 +38,56 @@ class OllamaJsonValidator(BaseModel):
 
 class OllamaAdapter():
 
-    def __init__(self, base_url, model, timeout, keep_alive, retries):
+    def __init__(self, base_url, model, timeout, keep_alive, retries, pool_size: int = 4):
         self.base_url = base_url
         self.model = model
         self.timeout = timeout
         self.keep_alive = keep_alive
         self.retries = retries
+        self.pool_size = max(1, pool_size)
+        self.requests_sent = 0
+        self.request_errors = 0
+        self._stats_lock = threading.Lock()
+
+        # One keep-alive session per adapter so calls reuse TCP connections.
+        self.session = requests.Session()
+        http_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", http_adapter)
+        self.session.mount("https://", http_adapter)
+
+
+    def close(self) -> None:
+        self.session.close()
+
+
+    def connection_stats(self) -> dict:
+        """Requests sent and TCP connections opened across this adapter's pools."""
+        connections = 0
+        pooled_requests = 0
+        for http_adapter in set(self.session.adapters.values()):
+            pools = http_adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+        return {
+            "base_url": self.base_url,
+            "model": self.model,
+            "pool_size": self.pool_size,
+            "requests": self.requests_sent,
+            "errors": self.request_errors,
+            "connections_opened": connections,
+            "connections_reused": max(0, pooled_requests - connections),
+        }
 
 
-    def generate(self, prompt: LlmPrompt, json_mode: bool = False) -> LlmResponse:
-
+    def _chat_payload(self, prompt: LlmPrompt, json_mode: bool, stream: bool) -> dict:
 
         payload = {
             "model": self.model,
-            "stream": False,
+            "stream": stream,
             "keep_alive": self.keep_alive,
             "messages": [
                 {"role": "system", "content": prompt.system_prompt},
@@ -45,10 +99,20 @@ class OllamaAdapter():
         if json_mode:
             payload["format"] = "json"
 
+        return payload
+
+
+    def generate(self, prompt: LlmPrompt, json_mode: bool = False) -> LlmResponse:
+
+
+        payload = self._chat_payload(prompt, json_mode, stream=False)
+
         for attempt in range(1, self.retries + 2):
             
             try:
-                response = requests.post(
+                with self._stats_lock:
+                    self.requests_sent += 1
+                response = self.session.post(
                     url=f"{self.base_url}/api/chat",
                     json=payload,
                     timeout=self.timeout
@@ -73,6 +137,8 @@ class OllamaAdapter():
                 )
 
             except requests.HTTPError as http_error:
+                with self._stats_lock:
+                    self.request_errors += 1
             
                 response = http_error.response
 
@@ -91,14 +157,90 @@ class OllamaAdapter():
                 
             
             except (requests.Timeout, requests.ConnectionError):
+                with self._stats_lock:
+                    self.request_errors += 1
                 if attempt <= self.retries:
                     continue
                 raise
     
     
+    def generate_stream(self, prompt: LlmPrompt) -> Iterator[LlmStreamChunk]:
+        """
+        Yield answer tokens as Ollama produces them, then one ``done`` chunk
+        carrying the full LlmResponse with token counts. Connecting is
+        retried like ``generate``; once tokens have been yielded a failure
+        is raised to the caller instead of restarting the answer.
+        """
+
+        payload = self._chat_payload(prompt, json_mode=False, stream=True)
+
+        for attempt in range(1, self.retries + 2):
+
+            try:
+                with self._stats_lock:
+                    self.requests_sent += 1
+                response = self.session.post(
+                    url=f"{self.base_url}/api/chat",
+                    json=payload,
+                    timeout=self.timeout,
+                    stream=True
+                )
+                response.raise_for_status()
+
+            except requests.HTTPError as http_error:
+                with self._stats_lock:
+                    self.request_errors += 1
+                # A streamed response holds its pooled connection until closed.
+                response.close()
+                status_code = http_error.response.status_code if http_error.response is not None else None
+                if status_code is not None and (status_code >= 500 or status_code == 429) and attempt <= self.retries:
+                    continue
+                raise
+
+            except (requests.Timeout, requests.ConnectionError):
+                with self._stats_lock:
+                    self.request_errors += 1
+                if attempt <= self.retries:
+                    continue
+                raise
+
+            break
+
+        with response:
+            parts = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = OllamaStreamValidator.model_validate(json.loads(line))
+                if chunk.error:
+                    raise RuntimeError(f"Ollama stream failed: {chunk.error}")
+                token = chunk.message.content if chunk.message else ""
+                if token:
+                    parts.append(token)
+                    yield LlmStreamChunk(token=token)
+                if chunk.done:
+                    yield LlmStreamChunk(
+                        done=True,
+                        final=LlmResponse(
+                            response="".join(parts).strip(),
+                            input_tokens=chunk.prompt_eval_count,
+                            output_tokens=chunk.eval_count,
+                            provider_name="ollama",
+                            llm_model=chunk.model or self.model,
+                            response_latency=(
+                                chunk.total_duration / 1_000_000
+                                if chunk.total_duration is not None
+                                else None
+                            ),
+                        ),
+                    )
+                    return
+        raise RuntimeError("Ollama stream ended before completion")
+
+
     def check_ollama_health(self) -> bool:
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             response.raise_for_status()
             return True
         except Exception:
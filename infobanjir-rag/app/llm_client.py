@@ -1,14 +1,20 @@
 import logging
+import threading
+from typing import Iterator
 
 from .prompt_builder import build_prompt, build_plan_prompt
 from .llm_adapters.ollama import OllamaAdapter
-from .llm_models import LlmResponse
+from .llm_models import LlmResponse, LlmStreamChunk
 from .planner_models import QueryPlan
-from .config import OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_RETRIES, OLLAMA_TIMEOUT, LLM_PROVIDER
+from .config import OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_POOL_SIZE, OLLAMA_RETRIES, OLLAMA_TIMEOUT, LLM_PROVIDER
 
 
 log = logging.getLogger(__name__)
 
+_ADAPTERS: dict[tuple, OllamaAdapter] = {}
+_ADAPTERS_LOCK = threading.Lock()
+_REGISTRY_STATS = {"hits": 0, "created": 0}
+
 
 def create_adapter() -> OllamaAdapter:
 
@@ -19,26 +25,71 @@ def create_adapter() -> OllamaAdapter:
             model=OLLAMA_MODEL,
             timeout=OLLAMA_TIMEOUT,
             keep_alive="10m",
-            retries=OLLAMA_RETRIES
+            retries=OLLAMA_RETRIES,
+            pool_size=OLLAMA_POOL_SIZE,
         )
     
     raise RuntimeError(f"Unsupported LLM provider: {LLM_PROVIDER}")
 
+
+def get_adapter() -> OllamaAdapter:
+    """
+    Process-wide adapter for the current settings, so every call shares one
+    keep-alive connection pool instead of building an adapter per request.
+    """
+    key = (LLM_PROVIDER, OllamaAdapter, OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_TIMEOUT, OLLAMA_RETRIES, OLLAMA_POOL_SIZE)
+    adapter = _ADAPTERS.get(key)
+    if adapter is None:
+        with _ADAPTERS_LOCK:
+            adapter = _ADAPTERS.get(key)
+            if adapter is None:
+                adapter = create_adapter()
+                _ADAPTERS[key] = adapter
+                _REGISTRY_STATS["created"] += 1
+                return adapter
+    _REGISTRY_STATS["hits"] += 1
+    return adapter
+
+
+def close_adapters() -> None:
+    with _ADAPTERS_LOCK:
+        adapters = list(_ADAPTERS.values())
+        _ADAPTERS.clear()
+    for adapter in adapters:
+        close = getattr(adapter, "close", None)
+        if close is not None:
+            close()
+
+
+def get_llm_client_stats() -> dict:
+    adapters = list(_ADAPTERS.values())
+    return {
+        "adapters": len(adapters),
+        "registry_hits": _REGISTRY_STATS["hits"],
+        "adapters_created": _REGISTRY_STATS["created"],
+        "connections": [
+            adapter.connection_stats() for adapter in adapters if hasattr(adapter, "connection_stats")
+        ],
+    }
+
+
+def check_llm_health() -> bool:
+    return get_adapter().check_ollama_health()
+
     
 def call_llm(question: str, context: str) -> LlmResponse:
 
     prompt = build_prompt(question, context)
-    return create_adapter().generate(prompt)
+    return get_adapter().generate(prompt)
        
 
 
+def stream_llm(question: str, context: str) -> Iterator[LlmStreamChunk]:
+    prompt = build_prompt(question, context)
+    return get_adapter().generate_stream(prompt)
+
+
 def plan_query(question: str) -> QueryPlan:
     prompt = build_plan_prompt(question)
-    response = create_adapter().generate(prompt, json_mode=True)
+    response = get_adapter().generate(prompt, json_mode=True)
     return QueryPlan.model_validate_json(response.response)
-
-
-
-
-
-
@@ -14,3 +14,9 @@ class LlmResponse(BaseModel):
 class LlmPrompt(BaseModel):
     system_prompt: str
     user_prompt: str
+
+
+class LlmStreamChunk(BaseModel):
+    token: str = ""
+    done: bool = False
+    final: LlmResponse | None = None
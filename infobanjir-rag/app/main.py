@@ -1,26 +1,68 @@
+import json
 import logging
 import threading
 import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
 from datetime import datetime, timezone
-from typing import List
+from typing import Annotated, List
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from .planner_models import QueryPlan
 
+from .answer_cache import AnswerCache, SemanticAnswerCache, answer_key
 from .config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL_SECONDS,
+    AUTO_INGEST_DELTA,
     AUTO_INGEST_ON_STARTUP,
     AUTO_INGEST_REFRESH_SECONDS,
     EXPRESS_DEFAULT_LIMIT,
+    EXPRESS_FULL_REFRESH_SECONDS,
+    EXPRESS_INCREMENTAL,
+    LLM_PROVIDER,
+    OLLAMA_MODEL,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
+    RAG_BATCH_MAX_QUESTIONS,
     RAG_MIN_SCORE,
+    RAG_SINGLE_FLIGHT_ENABLED,
     RAG_TOP_K,
     RAG_USE_LLM,
 )
-from .ingest import ingest_from_express
-from .llm_client import call_llm, plan_query
-from .rag_context import build_context, build_summary_from_hits, infer_state_from_question, parse_date_range
-from .rag_store import get_stats, ingest_documents, load_documents, retrieve_keyword, retrieve_semantic
+from .embeddings import (
+    embed_queries,
+    embed_query,
+    get_embedder,
+    get_scheduler_stats,
+    is_embedder_ready,
+)
+from .ingest import ExpressPull, close_http_client, get_watermarks, stream_from_express
+from .llm_client import call_llm, close_adapters, get_llm_client_stats, plan_query, stream_llm
+from .prompt_builder import PROMPT_VERSION
+from .rag_context import (
+    build_context,
+    build_summary_from_hits,
+    infer_state_from_question,
+    normalize_question,
+    parse_date_range,
+)
+from .rag_store import (
+    get_cache_generation,
+    get_ingest_progress,
+    get_lock_stats,
+    get_stats,
+    ingest_documents,
+    is_collection_ready,
+    load_documents,
+    retrieve_keyword,
+    retrieve_semantic_batch,
+)
+from .single_flight import SingleFlight
 
 
 app = FastAPI(title="HydroIntel MY RAG", version="0.1.0")
@@ -40,6 +82,12 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 
 _INGEST_STOP_EVENT = threading.Event()
 _INGEST_THREAD: threading.Thread | None = None
+_WARMUP_THREAD: threading.Thread | None = None
+_WARMUP_ERRORS: dict[str, str] = {}
+_FLOOD_TOKENS = ("flood", "risk", "danger", "warning", "alert")
+_ANSWER_CACHE = AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS)
+_ASK_FLIGHTS = SingleFlight()
+_SEMANTIC_CACHE = SemanticAnswerCache(SEMANTIC_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD)
 
 
 def _combine_hits(primary_hits: list[dict], secondary_hits: list[dict], top_k: int) -> list[dict]:
@@ -66,6 +114,12 @@ class RagAskRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=1000)
 
 
+class RagAskBatchRequest(BaseModel):
+    questions: List[Annotated[str, Field(min_length=1, max_length=1000)]] = Field(
+        ..., min_length=1, max_length=RAG_BATCH_MAX_QUESTIONS
+    )
+
+
 class RagCitation(BaseModel):
     source: str
     snippet: str
@@ -78,6 +132,10 @@ class RagAskResponse(BaseModel):
     timestamp: str
 
 
+class RagAskBatchResponse(BaseModel):
+    results: List[RagAskResponse]
+
+
 class RagDocument(BaseModel):
     id: str
     title: str
@@ -93,6 +151,13 @@ class RagIngestResponse(BaseModel):
     ingested: int
     total: int
     source: str
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    failed_states: List[str] = Field(default_factory=list)
+    rows_skipped: int = 0
+    bytes_downloaded: int = 0
 
 
 class QueryPlannerRequest(BaseModel):
@@ -115,13 +180,47 @@ def health() -> dict:
     }
 
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    embedder_ready = is_embedder_ready()
+    vector_store_ready = is_collection_ready()
+    is_ready = embedder_ready and vector_store_ready
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": "ready" if is_ready else "warming_up",
+            "components": {
+                "embedder": embedder_ready,
+                "vector_store": vector_store_ready,
+            },
+            "errors": dict(_WARMUP_ERRORS),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+
+
 @app.get("/rag/stats")
 def rag_stats() -> dict:
     stats = get_stats()
+    if ANSWER_CACHE_ENABLED:
+        stats["answer_cache"] = _ANSWER_CACHE.stats()
+    if SEMANTIC_CACHE_ENABLED:
+        stats["semantic_answer_cache"] = _SEMANTIC_CACHE.stats()
     stats["timestamp"] = datetime.now(timezone.utc).isoformat()
     return stats
 
 
+@app.get("/rag/metrics")
+def rag_metrics() -> dict:
+    return {
+        "embedding_scheduler": get_scheduler_stats(),
+        "ingest_lock": get_lock_stats(),
+        "llm_http": get_llm_client_stats(),
+        "ask_single_flight": _ASK_FLIGHTS.stats(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 @app.get("/rag/stats/by-state")
 def rag_stats_by_state() -> dict:
     documents = load_documents()
@@ -146,111 +245,205 @@ class RagExpressIngestRequest(BaseModel):
     state: str | None = None
     limit: int | None = None
     replace: bool = True
+    delta: bool = True
+    # Append only readings newer than the stored watermarks (replace is ignored).
+    incremental: bool = False
 
 
 @app.post("/rag/ingest-from-express", response_model=RagIngestResponse)
 def rag_ingest_from_express(payload: RagExpressIngestRequest) -> RagIngestResponse:
-    docs = ingest_from_express(state=payload.state, limit=payload.limit)
-    ingest_documents(docs, replace=payload.replace)
-    return RagIngestResponse(ingested=len(docs), total=len(load_documents()), source="express")
+    pull = ExpressPull()
+    watermarks = get_watermarks()
+    counts = ingest_documents(
+        stream_from_express(
+            state=payload.state,
+            limit=payload.limit,
+            pull=pull,
+            watermarks=watermarks if payload.incremental else None,
+            baseline=load_documents() if payload.incremental else (),
+        ),
+        replace=payload.replace and not payload.incremental,
+        delta=payload.delta or payload.incremental,
+        preserve_states=pull.failed_states,
+    )
+    if pull.failed_states and not pull.documents:
+        raise HTTPException(status_code=502, detail={"message": "express fetch failed", **pull.report()})
+    watermarks.update(pull.watermarks)
+    return RagIngestResponse(
+        ingested=pull.documents,
+        total=len(load_documents()),
+        source="express",
+        failed_states=pull.failed_states,
+        rows_skipped=pull.rows_skipped,
+        bytes_downloaded=pull.bytes_downloaded,
+        **counts,
+    )
 
 
 @app.post("/rag/ingest", response_model=RagIngestResponse)
 def rag_ingest(payload: RagIngestRequest) -> RagIngestResponse:
     docs = [doc.model_dump() for doc in payload.documents]
-    ingest_documents(docs, replace=False)
-    return RagIngestResponse(ingested=len(docs), total=len(load_documents()), source="manual")
+    counts = ingest_documents(docs, replace=False, delta=True)
+    return RagIngestResponse(
+        ingested=len(docs),
+        total=len(load_documents()),
+        source="manual",
+        **counts,
+    )
 
 
 
-@app.post("/rag/ask", response_model=RagAskResponse)
-def rag_ask(payload: RagAskRequest, request: Request) -> RagAskResponse:
+def _resolve_filters(question: str, documents: Sequence[Mapping]) -> dict:
+    date_from, date_to = parse_date_range(question)
+    question_lower = question.lower()
+    return {
+        "state": infer_state_from_question(question, documents),
+        "date_from": date_from,
+        "date_to": date_to,
+        "is_flood": any(token in question_lower for token in _FLOOD_TOKENS),
+    }
 
-    correlation_id = request.headers.get("X-Correlation-ID", "Null")
-    log.info(f"Request with correlation id {correlation_id} has been received by Rag Service")
 
-    start = time.perf_counter()
-    documents = load_documents()
-    log.info({
-        "event": "load_documents completed",
-        "duration_ms": (time.perf_counter() - start)
-    })
-
-    question = payload.question or ""
-    question_lower = question.lower()
-    state = infer_state_from_question(question, documents)
-    date_from, date_to = parse_date_range(question)
-    is_flood_question = any(
-        token in question_lower for token in ("flood", "risk", "danger", "warning", "alert")
+def _retrieve_stage(
+    questions: list[str],
+    filters: list[dict],
+    query_embeddings: list[list[float]] | None,
+    positions: list[int],
+    hits: list[list[dict]],
+    doc_type: str | None,
+) -> None:
+    # Questions with identical filters share one vector-store query.
+    groups: dict[tuple, list[int]] = {}
+    for i in positions:
+        key = (filters[i]["state"], filters[i]["date_from"], filters[i]["date_to"])
+        groups.setdefault(key, []).append(i)
+
+    for (state, date_from, date_to), members in groups.items():
+        if query_embeddings is None:
+            semantic_batches = [[] for _ in members]
+        else:
+            semantic_batches = retrieve_semantic_batch(
+                [query_embeddings[i] for i in members],
+                top_k=RAG_TOP_K,
+                state=state,
+                doc_type=doc_type,
+                date_from=date_from,
+                date_to=date_to,
+                min_score=RAG_MIN_SCORE,
+            )
+        for i, semantic_hits in zip(members, semantic_batches):
+            keyword_hits = retrieve_keyword(
+                questions[i],
+                top_k=RAG_TOP_K,
+                state=state,
+                doc_type=doc_type,
+                date_from=date_from,
+                date_to=date_to,
+            )
+            hits[i] = _combine_hits(semantic_hits, keyword_hits, RAG_TOP_K)
+
+
+def _retrieve_hits(
+    questions: list[str],
+    filters: list[dict],
+    query_embeddings: list[list[float]] | None,
+) -> list[list[dict]]:
+    """
+    Flood questions try flood-risk documents first; anything still without
+    hits falls back to a search across every document type. Without query
+    embeddings (embedder still warming up) only keyword retrieval runs.
+    """
+    hits: list[list[dict]] = [[] for _ in questions]
+    flood_positions = [i for i, item in enumerate(filters) if item["is_flood"]]
+    _retrieve_stage(questions, filters, query_embeddings, flood_positions, hits, doc_type="flood_risk")
+    remaining = [i for i in range(len(questions)) if not hits[i]]
+    _retrieve_stage(questions, filters, query_embeddings, remaining, hits, doc_type=None)
+    return hits
+
+
+def _answer_cache_key(question: str, context: str) -> str | None:
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    # The prompt embeds today's date, so answers are only reused within a day.
+    today = datetime.now(timezone.utc).date().isoformat()
+    return answer_key(question, context, f"{LLM_PROVIDER}:{OLLAMA_MODEL}", PROMPT_VERSION, today)
+
+
+def _semantic_filters(filters: dict) -> tuple:
+    """Everything besides the question that decides which answer is valid."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    return (
+        filters["state"],
+        filters["date_from"],
+        filters["date_to"],
+        filters["is_flood"],
+        f"{LLM_PROVIDER}:{OLLAMA_MODEL}",
+        PROMPT_VERSION,
+        today,
     )
 
-    if is_flood_question:
-        start = time.perf_counter()
-        semantic_hits = retrieve_semantic(
-            question,
-            top_k=RAG_TOP_K,
-            state=state,
-            doc_type="flood_risk",
-            date_from=date_from,
-            date_to=date_to,
-            min_score=RAG_MIN_SCORE,
-        )
-        log.info({
-        "event": "retrieve_semantic completed",
-        "duration_ms": (time.perf_counter() - start)
-    })
-        keyword_hits = retrieve_keyword(
-            question,
-            top_k=RAG_TOP_K,
-            state=state,
-            doc_type="flood_risk",
-            date_from=date_from,
-            date_to=date_to,
+
+def _semantic_lookup(filters: dict, query_embedding: list[float] | None) -> tuple[str, list[dict]] | None:
+    if not SEMANTIC_CACHE_ENABLED or not RAG_USE_LLM or query_embedding is None:
+        return None
+    found = _SEMANTIC_CACHE.get(_semantic_filters(filters), query_embedding, get_cache_generation())
+    if found is None:
+        return None
+    answer, hits, similarity = found
+    log.info({"event": "semantic_cache hit", "similarity": round(similarity, 4)})
+    return answer, hits
+
+
+def _semantic_store(
+    question: str,
+    filters: dict,
+    query_embedding: list[float] | None,
+    answer: str,
+    hits: list[dict],
+    generation: int,
+    llm_ms: float,
+) -> None:
+    if SEMANTIC_CACHE_ENABLED and query_embedding is not None:
+        _SEMANTIC_CACHE.put(
+            _semantic_filters(filters), question, query_embedding, answer, hits, generation, llm_ms
         )
-        hits = _combine_hits(semantic_hits, keyword_hits, RAG_TOP_K)
-    else:
-        hits = []
 
+
+def _llm_answer(question: str, hits: list[dict]) -> tuple[str, float | None]:
+    """Answer plus the LLM time it stands for; None when no LLM answer was produced."""
     if not hits:
-        semantic_hits = retrieve_semantic(
-            question,
-            top_k=RAG_TOP_K,
-            state=state,
-            date_from=date_from,
-            date_to=date_to,
-            min_score=RAG_MIN_SCORE,
-        )
-        keyword_hits = retrieve_keyword(
-            question,
-            top_k=RAG_TOP_K,
-            state=state,
-            date_from=date_from,
-            date_to=date_to,
-        )
-        hits = _combine_hits(semantic_hits, keyword_hits, RAG_TOP_K)
-
-    if hits:
-        context = build_context(hits)
-        if RAG_USE_LLM:
-            try:
-                start = time.perf_counter()
-                answer = call_llm(question, context)
-                log.info({
-                    "event": "llm_call completed",
-                    "duration_ms": (time.perf_counter() - start)
-                })
-            except Exception:
-                log.exception("LLM call failed; falling back to summary")
-                answer = "LLM unavailable; " + build_summary_from_hits(hits)
-                
-        else:
-            answer = build_summary_from_hits(hits)
-            
-    else:
-        answer = "No matching sources found in the local knowledge base."
-        
+        return "No matching sources found in the local knowledge base.", None
+    if not RAG_USE_LLM:
+        return build_summary_from_hits(hits), None
+    context = build_context(hits)
+    generation = get_cache_generation()
+    cache_key = _answer_cache_key(question, context)
+    if cache_key is not None:
+        cached = _ANSWER_CACHE.get(cache_key, generation)
+        if cached is not None:
+            return cached, 0.0
+    try:
+        start = time.perf_counter()
+        answer = call_llm(question, context).response
+        duration = time.perf_counter() - start
+        log.info({
+            "event": "llm_call completed",
+            "duration_ms": duration
+        })
+        if cache_key is not None:
+            _ANSWER_CACHE.put(cache_key, answer, generation, duration * 1000.0)
+        return answer, duration * 1000.0
+    except Exception:
+        log.exception("LLM call failed; falling back to summary")
+        return "LLM unavailable; " + build_summary_from_hits(hits), None
 
-    citations = [
+
+def _generate_answer(question: str, hits: list[dict]) -> str:
+    return _llm_answer(question, hits)[0]
+
+
+def _build_citations(hits: list[dict]) -> list[RagCitation]:
+    return [
         RagCitation(
             source=doc.get("source", "local"),
             snippet=(doc.get("text", "")[:200]),
@@ -258,25 +451,239 @@ def rag_ask(payload: RagAskRequest, request: Request) -> RagAskResponse:
         for doc in hits
     ]
 
+
+def _build_ask_response(answer: str, hits: list[dict], request_id: str) -> RagAskResponse:
     return RagAskResponse(
         answer=answer,
-        citations=citations,
-        request_id=correlation_id,
+        citations=_build_citations(hits),
+        request_id=request_id,
         timestamp=datetime.now(timezone.utc).isoformat(),
     )
 
 
+def _prepare_question(question: str) -> tuple[dict, list[float] | None]:
+    start = time.perf_counter()
+    documents = load_documents()
+    log.info({
+        "event": "load_documents completed",
+        "duration_ms": (time.perf_counter() - start)
+    })
+
+    filters = _resolve_filters(question, documents)
+    # Degrade to keyword-only retrieval rather than block on model loading.
+    query_embedding = embed_query(question) if is_embedder_ready() else None
+    return filters, query_embedding
+
+
+def _retrieve_for_question(question: str, filters: dict, query_embedding: list[float] | None) -> list[dict]:
+    start = time.perf_counter()
+    query_embeddings = [query_embedding] if query_embedding is not None else None
+    hits = _retrieve_hits([question], [filters], query_embeddings)[0]
+    log.info({
+        "event": "retrieval completed",
+        "duration_ms": (time.perf_counter() - start)
+    })
+    return hits
+
+
+@app.post("/rag/ask", response_model=RagAskResponse)
+def rag_ask(payload: RagAskRequest, request: Request) -> RagAskResponse:
+
+    correlation_id = request.headers.get("X-Correlation-ID", "Null")
+    log.info(f"Request with correlation id {correlation_id} has been received by Rag Service")
+
+    question = payload.question or ""
+    filters, query_embedding = _prepare_question(question)
+    if RAG_SINGLE_FLIGHT_ENABLED:
+        # Identical questions already in flight share one retrieval and generation.
+        normalized = normalize_question(question)
+        key = (normalized, filters["state"], filters["date_from"], filters["date_to"], filters["is_flood"])
+        (answer, hits), shared = _ASK_FLIGHTS.do(
+            key,
+            lambda: _answer_question(question, filters, query_embedding),
+            label=f"{normalized} [{filters['state'] or '*'}]",
+        )
+        if shared:
+            log.info({"event": "ask coalesced", "request_id": correlation_id})
+    else:
+        answer, hits = _answer_question(question, filters, query_embedding)
+    return _build_ask_response(answer, hits, correlation_id)
+
+
+def _answer_question(question: str, filters: dict, query_embedding: list[float] | None) -> tuple[str, list[dict]]:
+    # Paraphrases of a recent question with the same filters skip retrieval and generation.
+    cached = _semantic_lookup(filters, query_embedding)
+    if cached is not None:
+        return cached
+
+    generation = get_cache_generation()
+    hits = _retrieve_for_question(question, filters, query_embedding)
+    answer, llm_ms = _llm_answer(question, hits)
+    if llm_ms is not None:
+        _semantic_store(question, filters, query_embedding, answer, hits, generation, llm_ms)
+    return answer, hits
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_answer(
+    question: str,
+    hits: list[dict],
+    request_id: str,
+    cached_answer: str | None = None,
+    remember: Callable[[str, float], None] | None = None,
+) -> Iterator[str]:
+    """
+    Server-sent events for one answer: a ``citations`` frame, ``token``
+    frames as the model produces them, then a final ``usage`` frame. Paths
+    that do not stream (cached answers, no hits, LLM disabled or failing
+    before its first token) send their whole answer as a single token frame.
+    ``remember`` receives every LLM answer with the LLM time it took.
+    """
+    yield _sse("citations", {
+        "request_id": request_id,
+        "citations": [citation.model_dump() for citation in _build_citations(hits)],
+    })
+    usage = {"input_tokens": None, "output_tokens": None, "model": None, "streamed": False, "cached": False}
+    context = build_context(hits) if hits and RAG_USE_LLM else ""
+    generation = get_cache_generation()
+    cache_key = _answer_cache_key(question, context) if context and cached_answer is None else None
+    cached = _ANSWER_CACHE.get(cache_key, generation) if cache_key is not None else None
+    if cached_answer is not None:
+        usage["cached"] = True
+        yield _sse("token", {"text": cached_answer})
+    elif cached is not None:
+        usage["cached"] = True
+        if remember is not None:
+            remember(cached, 0.0)
+        yield _sse("token", {"text": cached})
+    elif not context:
+        yield _sse("token", {"text": _generate_answer(question, hits)})
+    else:
+        start = time.perf_counter()
+        first_token_ms = None
+        try:
+            for chunk in stream_llm(question, context):
+                if chunk.token:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000.0
+                    yield _sse("token", {"text": chunk.token})
+                if chunk.done and chunk.final is not None:
+                    usage.update(
+                        input_tokens=chunk.final.input_tokens,
+                        output_tokens=chunk.final.output_tokens,
+                        model=chunk.final.llm_model,
+                        streamed=True,
+                    )
+                    llm_ms = (time.perf_counter() - start) * 1000.0
+                    if cache_key is not None:
+                        _ANSWER_CACHE.put(cache_key, chunk.final.response, generation, llm_ms)
+                    if remember is not None:
+                        remember(chunk.final.response, llm_ms)
+            log.info({
+                "event": "llm_stream completed",
+                "first_token_ms": first_token_ms,
+                "duration_ms": (time.perf_counter() - start) * 1000.0,
+            })
+        except Exception:
+            log.exception("LLM stream failed")
+            if first_token_ms is None:
+                yield _sse("token", {"text": "LLM unavailable; " + build_summary_from_hits(hits)})
+            else:
+                yield _sse("error", {"message": "LLM stream interrupted"})
+    usage["timestamp"] = datetime.now(timezone.utc).isoformat()
+    yield _sse("usage", usage)
+
+
+@app.post("/rag/ask/stream")
+def rag_ask_stream(payload: RagAskRequest, request: Request) -> StreamingResponse:
+    correlation_id = request.headers.get("X-Correlation-ID", "Null")
+    log.info(f"Streaming request with correlation id {correlation_id} has been received by Rag Service")
+
+    question = payload.question or ""
+    filters, query_embedding = _prepare_question(question)
+    cached = _semantic_lookup(filters, query_embedding)
+    if cached is not None:
+        answer, hits = cached
+        events = _stream_answer(question, hits, correlation_id, cached_answer=answer)
+    else:
+        generation = get_cache_generation()
+        hits = _retrieve_for_question(question, filters, query_embedding)
+
+        def remember(answer: str, llm_ms: float) -> None:
+            _semantic_store(question, filters, query_embedding, answer, hits, generation, llm_ms)
+
+        events = _stream_answer(question, hits, correlation_id, remember=remember)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/rag/ask/batch", response_model=RagAskBatchResponse)
+def rag_ask_batch(payload: RagAskBatchRequest, request: Request) -> RagAskBatchResponse:
+    correlation_id = request.headers.get("X-Correlation-ID", "Null")
+    log.info(
+        f"Batch of {len(payload.questions)} questions with correlation id "
+        f"{correlation_id} has been received by Rag Service"
+    )
+
+    documents = load_documents()
+    questions = list(payload.questions)
+    filters = [_resolve_filters(question, documents) for question in questions]
+
+    start = time.perf_counter()
+    query_embeddings = embed_queries(questions) if is_embedder_ready() else None
+    hits_per_question = _retrieve_hits(questions, filters, query_embeddings)
+    log.info({
+        "event": "batch retrieval completed",
+        "questions": len(questions),
+        "duration_ms": (time.perf_counter() - start)
+    })
+
+    results = [
+        _build_ask_response(_generate_answer(question, hits), hits, correlation_id)
+        for question, hits in zip(questions, hits_per_question)
+    ]
+    return RagAskBatchResponse(results=results)
+
+
 def _auto_ingest_loop() -> None:
     while not _INGEST_STOP_EVENT.is_set():
         success = True
         message = "ok"
         ingested = 0
+        counts = None
+        fetch = None
         started_at = datetime.now(timezone.utc).isoformat()
         try:
-            docs = ingest_from_express(state=None, limit=EXPRESS_DEFAULT_LIMIT)
-            ingest_documents(docs, replace=True)
-            ingested = len(docs)
-            log.info("Auto-ingest refreshed %s documents", ingested)
+            pull = ExpressPull()
+            watermarks = get_watermarks()
+            # Incremental cycles only append; a periodic full refresh prunes old rows.
+            full = not EXPRESS_INCREMENTAL or watermarks.full_refresh_due(EXPRESS_FULL_REFRESH_SECONDS)
+            counts = ingest_documents(
+                stream_from_express(
+                    state=None,
+                    limit=EXPRESS_DEFAULT_LIMIT,
+                    pull=pull,
+                    watermarks=None if full else watermarks,
+                    baseline=() if full else load_documents(),
+                ),
+                replace=full,
+                delta=AUTO_INGEST_DELTA or not full,
+                preserve_states=pull.failed_states,
+            )
+            watermarks.update(pull.watermarks, full_refresh=full and bool(pull.documents))
+            fetch = pull.report()
+            if pull.failed_states:
+                log.warning("Express fetch failed for %s; kept their stored rows", pull.failed_states)
+                message = "partial" if pull.documents else "failed"
+                success = bool(pull.documents)
+            ingested = pull.documents
+            log.info("Auto-ingest refreshed %s documents (%s) in %.0f ms", ingested, counts, pull.elapsed_ms)
         except Exception:
             log.exception("Auto-ingest failed")
             success = False
@@ -286,10 +693,40 @@ def _auto_ingest_loop() -> None:
             ingested=ingested,
             message=message,
             started_at=started_at,
+            counts=counts,
+            fetch=fetch,
         )
         _INGEST_STOP_EVENT.wait(AUTO_INGEST_REFRESH_SECONDS)
 
 
+def _warm_up() -> None:
+    """Open the vector store, load the document cache and load the embedder off the request path."""
+    start = time.perf_counter()
+    try:
+        load_documents()
+        log.info({"event": "vector store warm-up completed", "duration_ms": (time.perf_counter() - start)})
+    except Exception as exc:
+        log.exception("Vector store warm-up failed")
+        _WARMUP_ERRORS["vector_store"] = str(exc)
+    start = time.perf_counter()
+    try:
+        get_embedder()
+        log.info({"event": "embedder warm-up completed", "duration_ms": (time.perf_counter() - start)})
+    except Exception as exc:
+        log.exception("Embedder warm-up failed; serving keyword-only retrieval")
+        _WARMUP_ERRORS["embedder"] = str(exc)
+
+
+@app.on_event("startup")
+def startup_warmup() -> None:
+    global _WARMUP_THREAD
+    if _WARMUP_THREAD is not None and _WARMUP_THREAD.is_alive():
+        return
+    _WARMUP_ERRORS.clear()
+    _WARMUP_THREAD = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+    _WARMUP_THREAD.start()
+
+
 @app.on_event("startup")
 def startup_ingest() -> None:
     global _INGEST_THREAD
@@ -307,6 +744,8 @@ def shutdown_ingest() -> None:
     _INGEST_STOP_EVENT.set()
     if _INGEST_THREAD is not None and _INGEST_THREAD.is_alive():
         _INGEST_THREAD.join(timeout=2)
+    close_http_client()
+    close_adapters()
 
 
 _INGEST_STATUS = {
@@ -315,10 +754,25 @@ _INGEST_STATUS = {
     "last_ingested": 0,
     "last_message": "never_run",
     "last_started_at": None,
+    "last_added": 0,
+    "last_updated": 0,
+    "last_deleted": 0,
+    "last_unchanged": 0,
+    "last_mode": None,
+    "last_bytes_downloaded": 0,
+    "last_rows_skipped": 0,
+    "last_fetch": None,
 }
 
 
-def _set_ingest_status(success: bool, ingested: int, message: str, started_at: str) -> None:
+def _set_ingest_status(
+    success: bool,
+    ingested: int,
+    message: str,
+    started_at: str,
+    counts: dict | None = None,
+    fetch: dict | None = None,
+) -> None:
     if success:
         _INGEST_STATUS["last_success"] = datetime.now(timezone.utc).isoformat()
     else:
@@ -326,12 +780,19 @@ def _set_ingest_status(success: bool, ingested: int, message: str, started_at: s
     _INGEST_STATUS["last_ingested"] = ingested
     _INGEST_STATUS["last_message"] = message
     _INGEST_STATUS["last_started_at"] = started_at
+    for key in ("added", "updated", "deleted", "unchanged"):
+        _INGEST_STATUS[f"last_{key}"] = (counts or {}).get(key, 0)
+    _INGEST_STATUS["last_mode"] = (fetch or {}).get("mode")
+    _INGEST_STATUS["last_bytes_downloaded"] = (fetch or {}).get("bytes_downloaded", 0)
+    _INGEST_STATUS["last_rows_skipped"] = (fetch or {}).get("rows_skipped", 0)
+    _INGEST_STATUS["last_fetch"] = fetch
 
 
 @app.get("/rag/ingest/status")
 def rag_ingest_status() -> dict:
     return {
         **_INGEST_STATUS,
+        "progress": get_ingest_progress(),
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
@@ -4,6 +4,9 @@ from datetime import datetime, timezone
 from .llm_models import LlmPrompt
 from .planner_models import OPERATION_CATALOG, QueryPlan
 
+# Bump whenever the answer prompt changes so cached answers are not reused.
+PROMPT_VERSION = "1"
+
 SYSTEM_PROMPT = (
     "You are a helpful flood intelligence assistant.\n"
     "Answer the question using only the context.\n"
@@ -1,5 +1,6 @@
 import re
 from datetime import datetime, timezone
+from collections.abc import Mapping, Sequence
 from typing import List, Optional, Tuple
 
 from .state_codes import STATE_NAME_TO_CODE, format_state, normalize_state_code
@@ -50,12 +51,21 @@ def build_summary_from_hits(hits: list[dict]) -> str:
     return "Top relevant readings:\n" + "\n".join(lines)
 
 
-def infer_state_from_question(question: str, docs: list[dict]) -> str | None:
+def normalize_question(question: str) -> str:
+    """Canonical form used to key per-question caches: case and spacing insensitive."""
+    return " ".join((question or "").lower().split()).rstrip("?!. ")
+
+
+def infer_state_from_question(question: str, docs: Sequence[Mapping]) -> str | None:
     q = question.lower()
     for name, code in STATE_NAME_TO_CODE.items():
         if re.search(rf"\b{re.escape(name)}\b", q):
             return code
-    codes = {str(doc.get("state", "")).upper() for doc in docs if doc.get("state")}
+    if hasattr(docs, "distinct"):
+        # Column stores answer this from their interned state codes.
+        codes = {str(state).upper() for state in docs.distinct("state")}
+    else:
+        codes = {str(doc.get("state", "")).upper() for doc in docs if doc.get("state")}
     for code in codes:
         if code.lower() in q:
             return normalize_state_code(code)
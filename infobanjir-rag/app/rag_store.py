@@ -1,45 +1,121 @@
+import hashlib
+import json
+import logging
 import os
+import pickle
+import re
+import tempfile
+import threading
 import time
-from contextlib import contextmanager
-from typing import List, Optional
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
 
 from . import config  # ensures telemetry env vars are set before chromadb import
 
-# Chroma telemetry can be noisy or incompatible with local posthog versions.
-# Force-disable capture to avoid runtime noise.
-try:
-    import posthog  # type: ignore
+if TYPE_CHECKING:
+    import chromadb
+    from chromadb.api.models.Collection import Collection
+
+from .bm25_index import Bm25Index
+from .config import (
+    CHROMA_COLLECTION,
+    CHROMA_COLLECTION_GC_DELAY_SECONDS,
+    CHROMA_PERSIST_DIR,
+    EMBED_CACHE_ENABLED,
+    EMBED_CACHE_PATH,
+    INGEST_CHUNK_SIZE,
+    INGEST_LOCK_TIMEOUT_SECONDS,
+    INGEST_RETRY_BACKOFF_SECONDS,
+    INGEST_UPSERT_RETRIES,
+    RAG_EXACT_SEARCH_THRESHOLD,
+    RAG_READ_LOCK_ENABLED,
+    RAG_READ_LOCK_TIMEOUT_SECONDS,
+    SNAPSHOT_CHECK_SECONDS,
+    SNAPSHOT_DELTA_MAX_RATIO,
+    SNAPSHOT_DIR,
+    SNAPSHOT_ENABLED,
+    SNAPSHOT_KEEP,
+)
+from .doc_index import DocumentIndex
+from .doc_store import DocumentStore
+from .embedding_cache import EmbeddingCache, content_hash
+from .embeddings import embed_query, embed_texts, embedding_model_id, get_query_cache_stats
+from .file_lock import ReadWriteFileLock
+from .snapshot import Snapshot, SnapshotReader, publish_snapshot, publish_snapshot_delta, read_current_version
+from .state_codes import get_state_synonyms, normalize_state_code
+
+log = logging.getLogger(__name__)
 
-    def _noop(*_args, **_kwargs):
-        return None
 
-    posthog.capture = _noop
-    posthog.flush = _noop
-except Exception:
-    pass
+class _CacheGeneration:
+    """One immutable generation of the document cache and the indexes built on it."""
 
-import chromadb
-from chromadb.config import Settings
-from chromadb.api.models.Collection import Collection
-from sentence_transformers import SentenceTransformer
+    __slots__ = ("number", "documents", "document_index", "keyword_index", "built_at", "build_seconds")
 
-from .config import CHROMA_COLLECTION, CHROMA_PERSIST_DIR
-from .state_codes import get_state_synonyms
+    def __init__(
+        self,
+        number: int,
+        documents: Sequence[Mapping],
+        document_index: DocumentIndex,
+        keyword_index: Bm25Index,
+        build_seconds: float,
+    ):
+        self.number = number
+        self.documents = documents
+        self.document_index = document_index
+        self.keyword_index = keyword_index
+        self.built_at = datetime.now(timezone.utc).isoformat()
+        self.build_seconds = build_seconds
 
 
-_DOCUMENTS_CACHE: list[dict] | None = None
-_EMBED_MODEL: SentenceTransformer | None = None
-_CHROMA_CLIENT: Optional[chromadb.api.ClientAPI] = None
-_CHROMA_COLLECTION: Optional[Collection] = None
+_CACHE: _CacheGeneration | None = None
+_CACHE_GENERATION = 0
+# A cold read taken without the read lock, served until a locked read or a publish replaces it.
+_PROVISIONAL: _CacheGeneration | None = None
+_CACHE_BUILD_LOCK = threading.Lock()
+_INITIAL_LOAD_LOCK = threading.Lock()
+_EMBEDDING_CACHE: EmbeddingCache | None = None
+_CHROMA_CLIENT: Optional["chromadb.api.ClientAPI"] = None
+_CHROMA_COLLECTION: Optional["Collection"] = None
+_CHROMA_INIT_LOCK = threading.Lock()
+_ACTIVE_COLLECTION_FILE = "active_collection.json"
+_ACTIVE_COLLECTION_MTIME: int | None = None
+_SNAPSHOT_READER = SnapshotReader(SNAPSHOT_DIR, check_interval=SNAPSHOT_CHECK_SECONDS)
+_SNAPSHOT_PAGE_SIZE = 5000
+_PLANNER_STATS = {"exact": 0, "hnsw": 0, "hnsw_fallbacks": 0}
+_METADATA_VERSION = 1
 _INGEST_LOCK_FILE = ".ingest.lock"
-_INGEST_LOCK_MAX_AGE_SECONDS = 600
-_INGEST_LOCK_POLL_SECONDS = 0.2
+_INGEST_LOCK: ReadWriteFileLock | None = None
+_INGEST_PROGRESS: dict = {"running": False}
+
+
+def _date_ordinal(value: str | None) -> int | None:
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp_epoch(value: str | None) -> float | None:
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
 
 
 def _build_where_clause(
     state: str | None = None,
     doc_type: str | None = None,
     recorded_date: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
 ) -> dict | None:
     clauses: list[dict] = []
     if state:
@@ -48,6 +124,14 @@ def _build_where_clause(
         clauses.append({"type": doc_type})
     if recorded_date:
         clauses.append({"recorded_date": recorded_date})
+    # Range predicates run on the numeric day ordinal so the vector store
+    # filters before ranking instead of us over-fetching and post-filtering.
+    day_from = _date_ordinal(date_from) if date_from else None
+    day_to = _date_ordinal(date_to) if date_to else None
+    if day_from is not None:
+        clauses.append({"recorded_day": {"$gte": day_from}})
+    if day_to is not None:
+        clauses.append({"recorded_day": {"$lte": day_to}})
 
     if not clauses:
         return None
@@ -56,175 +140,909 @@ def _build_where_clause(
     return {"$and": clauses}
 
 
-def _get_collection() -> Collection:
-    global _CHROMA_CLIENT, _CHROMA_COLLECTION
-    if _CHROMA_CLIENT is None:
-        _CHROMA_CLIENT = chromadb.PersistentClient(
-            path=CHROMA_PERSIST_DIR,
-            settings=Settings(anonymized_telemetry=False),
-        )
-    if _CHROMA_COLLECTION is None:
-        _CHROMA_COLLECTION = _CHROMA_CLIENT.get_or_create_collection(
-            name=CHROMA_COLLECTION
-        )
-    return _CHROMA_COLLECTION
-
-
-def _reset_collection() -> Collection:
+def _import_chromadb():
     """
-    Recreate collection in one step instead of per-id delete to avoid noisy
-    delete races in Chroma's internal consumer.
+    Import chromadb on first use so importing the app stays cheap; telemetry
+    is neutralised before chromadb loads.
     """
-    global _CHROMA_COLLECTION
-    client = _CHROMA_CLIENT
-    if client is None:
-        raise RuntimeError("Chroma client is not initialized")
+    # Chroma telemetry can be noisy or incompatible with local posthog versions.
+    # Force-disable capture to avoid runtime noise.
     try:
-        client.delete_collection(name=CHROMA_COLLECTION)
+        import posthog  # type: ignore
+
+        def _noop(*_args, **_kwargs):
+            return None
+
+        posthog.capture = _noop
+        posthog.flush = _noop
     except Exception:
-        # Collection may not exist yet; safe to ignore.
         pass
-    _CHROMA_COLLECTION = client.get_or_create_collection(name=CHROMA_COLLECTION)
+
+    import chromadb
+
+    return chromadb
+
+
+def _get_client() -> "chromadb.api.ClientAPI":
+    global _CHROMA_CLIENT
+    if _CHROMA_CLIENT is None:
+        with _CHROMA_INIT_LOCK:
+            if _CHROMA_CLIENT is None:
+                chromadb = _import_chromadb()
+                from chromadb.config import Settings
+
+                _CHROMA_CLIENT = chromadb.PersistentClient(
+                    path=CHROMA_PERSIST_DIR,
+                    settings=Settings(anonymized_telemetry=False),
+                )
+    return _CHROMA_CLIENT
+
+
+def _active_collection_path() -> str:
+    return os.path.join(CHROMA_PERSIST_DIR, _ACTIVE_COLLECTION_FILE)
+
+
+def _active_collection_mtime() -> int | None:
+    try:
+        return os.stat(_active_collection_path()).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _read_active_collection() -> str:
+    """Name the active alias points at; the plain configured name before the first swap."""
+    try:
+        with open(_active_collection_path(), encoding="utf-8") as handle:
+            return str(json.load(handle)["name"])
+    except (FileNotFoundError, ValueError, KeyError):
+        return CHROMA_COLLECTION
+
+
+def _collection_version(name: str) -> int | None:
+    match = re.fullmatch(rf"{re.escape(CHROMA_COLLECTION)}(?:_v(\d+))?", name)
+    if match is None:
+        return None
+    return int(match.group(1) or 0)
+
+
+def _get_collection() -> "Collection":
+    """
+    Return the collection the active alias points at. The alias file is
+    stat'ed on every call so a swap made by another worker is picked up on
+    that worker's next request.
+    """
+    global _CHROMA_COLLECTION, _ACTIVE_COLLECTION_MTIME
+    mtime = _active_collection_mtime()
+    collection = _CHROMA_COLLECTION
+    if collection is not None and mtime == _ACTIVE_COLLECTION_MTIME:
+        return collection
+    client = _get_client()
+    with _CHROMA_INIT_LOCK:
+        if _CHROMA_COLLECTION is None or mtime != _ACTIVE_COLLECTION_MTIME:
+            _CHROMA_COLLECTION = client.get_or_create_collection(name=_read_active_collection())
+            _ACTIVE_COLLECTION_MTIME = mtime
     return _CHROMA_COLLECTION
 
 
+def is_collection_ready() -> bool:
+    return _CHROMA_COLLECTION is not None
+
+
+def _create_staging_collection() -> "Collection":
+    """
+    Create the next versioned collection for a replace ingest. Readers keep
+    using the active one until ``_activate_collection`` repoints the alias.
+    Must be called under the ingest lock.
+    """
+    client = _get_client()
+    active_version = _collection_version(_read_active_collection()) or 0
+    for collection in client.list_collections():
+        version = _collection_version(collection.name)
+        if version is not None and version > active_version:
+            # Left behind by an ingest that died before activating it; the
+            # ingest lock guarantees nobody else is filling it.
+            client.delete_collection(name=collection.name)
+    return client.create_collection(name=f"{CHROMA_COLLECTION}_v{active_version + 1}")
+
+
+def _activate_collection(collection: "Collection") -> None:
+    """Atomically repoint the active alias, then drop older collections in the background."""
+    global _CHROMA_COLLECTION, _ACTIVE_COLLECTION_MTIME
+    path = _active_collection_path()
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(
+            {"name": collection.name, "activated_at": datetime.now(timezone.utc).isoformat()},
+            handle,
+        )
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    with _CHROMA_INIT_LOCK:
+        _CHROMA_COLLECTION = collection
+        _ACTIVE_COLLECTION_MTIME = _active_collection_mtime()
+    threading.Thread(
+        target=_drop_old_collections,
+        args=(collection.name, CHROMA_COLLECTION_GC_DELAY_SECONDS),
+        name="collection-gc",
+        daemon=True,
+    ).start()
+
+
+def _drop_old_collections(active_name: str, delay_seconds: float = 0.0) -> list[str]:
+    """
+    Delete versions older than ``active_name``. The delay lets queries that
+    other workers started before they saw the swap finish; newer (staging)
+    versions are never touched.
+    """
+    if delay_seconds > 0:
+        time.sleep(delay_seconds)
+    active_version = _collection_version(active_name)
+    if active_version is None or _read_active_collection() != active_name:
+        return []
+    client = _get_client()
+    dropped = []
+    for collection in client.list_collections():
+        version = _collection_version(collection.name)
+        if version is None or version >= active_version:
+            continue
+        try:
+            client.delete_collection(name=collection.name)
+            dropped.append(collection.name)
+        except Exception:
+            log.warning("Could not drop old collection %s", collection.name, exc_info=True)
+    return dropped
+
+
+def _get_ingest_lock() -> ReadWriteFileLock:
+    global _INGEST_LOCK
+    path = os.path.join(CHROMA_PERSIST_DIR, _INGEST_LOCK_FILE)
+    lock = _INGEST_LOCK
+    if lock is None or lock.path != path:
+        lock = ReadWriteFileLock(path)
+        _INGEST_LOCK = lock
+    return lock
+
+
 @contextmanager
-def _ingest_lock(timeout_seconds: float = 30.0):
+def _ingest_lock(timeout_seconds: float | None = None):
     """
-    Cross-process lock for Chroma write operations.
+    Cross-process exclusive lock for Chroma write operations.
     This avoids concurrent replace/delete cycles from overlapping worker threads/processes.
     """
-    os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
-    lock_path = os.path.join(CHROMA_PERSIST_DIR, _INGEST_LOCK_FILE)
-    deadline = time.monotonic() + timeout_seconds
-    lock_fd = None
-    while lock_fd is None:
-        try:
-            lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-            os.write(lock_fd, f"{os.getpid()}:{time.time()}".encode("utf-8"))
-            os.close(lock_fd)
-            lock_fd = 1
-            break
-        except FileExistsError:
+    with _get_ingest_lock().exclusive(timeout=timeout_seconds or None):
+        yield
+
+
+@contextmanager
+def _read_lock(timeout_seconds: float | None = None):
+    """
+    Best-effort shared lock so a full collection read does not interleave with
+    another process's ingest. Gives up after ``timeout_seconds`` (default
+    RAG_READ_LOCK_TIMEOUT_SECONDS; 0 tries once) rather than stalling a
+    request behind a long ingest, and yields False in that case: the read
+    may then be torn by the running ingest.
+    """
+    timeout_seconds = RAG_READ_LOCK_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+    with ExitStack() as stack:
+        locked = True
+        if RAG_READ_LOCK_ENABLED:
             try:
-                age = time.time() - os.path.getmtime(lock_path)
-                if age > _INGEST_LOCK_MAX_AGE_SECONDS:
-                    os.remove(lock_path)
-                    continue
-            except FileNotFoundError:
-                continue
-            if time.monotonic() >= deadline:
-                raise TimeoutError("Timed out waiting for Chroma ingest lock")
-            time.sleep(_INGEST_LOCK_POLL_SECONDS)
+                stack.enter_context(_get_ingest_lock().shared(timeout=timeout_seconds))
+            except TimeoutError:
+                locked = False
+                if timeout_seconds:
+                    log.warning("Reading the collection without the ingest read lock (ingest still running)")
+        yield locked
+
+
+def get_lock_stats() -> dict:
+    return _get_ingest_lock().stats()
+
+
+def _to_cached_doc(doc_id: str, text: str, meta: dict | None) -> dict:
+    doc = dict(meta or {})
+    # Only the delta sync reads content hashes, and it reads them from the collection.
+    doc.pop("content_hash", None)
+    doc["id"] = doc_id
+    doc["text"] = text
+    state = doc.get("state")
+    if state:
+        doc["state"] = str(state).upper()
+    return doc
+
+
+def _publish_documents(
+    docs: Sequence[Mapping],
+    keyword_index: Bm25Index | None = None,
+    started: float | None = None,
+    expected_generation: int | None = None,
+    publish: bool = True,
+    document_index: DocumentIndex | None = None,
+) -> _CacheGeneration:
+    """
+    Build every index for ``docs`` first, then publish the generation with a
+    single reference assignment so readers never see a half-built cache.
+
+    With ``expected_generation`` (the counter when ``docs`` were read) the
+    build is returned unpublished if another generation was published or
+    invalidated in the meantime, so a slow read cannot replace newer data.
+    ``publish=False`` always returns the build unpublished.
+    """
+    global _CACHE, _CACHE_GENERATION
+    started = time.perf_counter() if started is None else started
+    document_index = document_index or DocumentIndex(docs)
+    keyword_index = keyword_index or Bm25Index.build(docs)
+    with _CACHE_BUILD_LOCK:
+        if not publish or (expected_generation is not None and _CACHE_GENERATION != expected_generation):
+            return _CacheGeneration(
+                _CACHE_GENERATION,
+                docs,
+                document_index,
+                keyword_index,
+                time.perf_counter() - started,
+            )
+        _CACHE_GENERATION += 1
+        generation = _CacheGeneration(
+            _CACHE_GENERATION,
+            docs,
+            document_index,
+            keyword_index,
+            time.perf_counter() - started,
+        )
+        _CACHE = generation
+    return generation
+
+
+def _rebuild_cache(expected_generation: int | None = None, publish: bool = True) -> _CacheGeneration:
+    """Read the collection into a fresh generation; runs on the ingest path."""
+    started = time.perf_counter()
+    payload = _get_collection().get(include=["documents", "metadatas"])
+    docs = DocumentStore.from_rows(
+        _to_cached_doc(doc_id, text, meta)
+        for text, meta, doc_id in zip(
+            payload.get("documents", []),
+            payload.get("metadatas", []),
+            payload.get("ids", []),
+        )
+    )
+    del payload
+    return _publish_documents(docs, started=started, expected_generation=expected_generation, publish=publish)
+
+
+def _current_generation() -> _CacheGeneration:
+    global _PROVISIONAL
+    generation = _CACHE
+    if generation is not None:
+        return generation
+    # Only a cold process builds on the request path; ingest publishes
+    # later generations itself.
+    with _INITIAL_LOAD_LOCK:
+        generation = _CACHE
+        if generation is None:
+            # An ingest that publishes while this read runs wins; the read
+            # still answers this request but is not installed. A read taken
+            # without the lock may be mid-ingest in another process, so it is
+            # kept only as a provisional generation: later requests try the
+            # lock without waiting and answer from it until the lock is free
+            # (or something is published), instead of re-reading each time.
+            expected = _CACHE_GENERATION
+            provisional = _PROVISIONAL
+            if provisional is not None and provisional.number != expected:
+                provisional = None
+            with _read_lock(0 if provisional is not None else None) as locked:
+                if not locked and provisional is not None:
+                    return provisional
+                generation = _rebuild_cache(expected_generation=expected, publish=locked)
+            _PROVISIONAL = generation if not locked and generation.number == expected else None
+            generation = _CACHE or generation
+    return generation
+
+
+def load_documents() -> Sequence[Mapping]:
+    return _current_generation().documents
+
+
+def _apply_to_cache(ids: list[str], texts: list[str], metas: list[dict]) -> None:
+    """
+    Fold an append-style ingest into the loaded cache instead of dropping it,
+    so the keyword index is updated incrementally rather than rebuilt.
+    """
+    global _CACHE_GENERATION
+    generation = _CACHE
+    if generation is None:
+        # Nothing loaded yet: mark any cold load reading right now as stale.
+        with _CACHE_BUILD_LOCK:
+            _CACHE_GENERATION += 1
+        return
+    documents = generation.documents
+    keyword_index = generation.keyword_index
+    if not isinstance(documents, DocumentStore):
+        documents = DocumentStore.from_rows(documents)
+    # Chunk-local ids first; everything else is one lookup in the store's id map.
+    positions: dict[str, int] = {}
+    replacements: dict[int, dict] = {}
+    appended: list[dict] = []
+    changes = []
+    for doc_id, text, meta in zip(ids, texts, metas):
+        doc = _to_cached_doc(doc_id, text, meta)
+        pos = positions.get(doc_id)
+        if pos is None:
+            pos = documents.position(doc_id)
+        if pos is None:
+            pos = len(documents) + len(appended)
+            positions[doc_id] = pos
+            appended.append(doc)
+            changes.append((pos, None, text))
+        elif pos >= len(documents):
+            changes.append((pos, appended[pos - len(documents)].get("text") or "", text))
+            appended[pos - len(documents)] = doc
+        else:
+            previous = replacements.get(pos) or documents[pos]
+            changes.append((pos, previous.get("text") or "", text))
+            replacements[pos] = doc
+    updated = documents.replaced(replacements, appended)
+    _publish_documents(
+        updated,
+        keyword_index.updated(changes, updated),
+        document_index=generation.document_index.updated([pos for pos, _, _ in changes], updated),
+    )
+
+
+def _row_hash(text: str, meta: dict) -> str:
+    """Fingerprint of a stored row; any change to text or metadata changes it."""
+    # The embedder id is included so switching model/backend re-embeds rows.
+    payload = json.dumps(
+        {"v": _METADATA_VERSION, "embedder": embedding_model_id(), "text": text, "meta": meta},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_rows(documents: list[dict]) -> tuple[list[str], list[str], list[dict]]:
+    ids = []
+    texts = []
+    metas = []
+    for doc in documents:
+        doc_id = str(doc.get("id"))
+        if not doc_id:
+            continue
+        ids.append(doc_id)
+        text = doc.get("text", "")
+        texts.append(text)
+        recorded_at = doc.get("recorded_at") or ""
+        recorded_date = recorded_at[:10] if isinstance(recorded_at, str) else ""
+        meta = {
+            "title": doc.get("title"),
+            "source": doc.get("source"),
+            "type": doc.get("type"),
+            "state": doc.get("state"),
+            "recorded_at": recorded_at,
+            "recorded_date": recorded_date,
+            "value": doc.get("value"),
+        }
+        recorded_day = _date_ordinal(recorded_date) if recorded_date else None
+        if recorded_day is not None:
+            meta["recorded_day"] = recorded_day
+        recorded_epoch = _timestamp_epoch(recorded_at) if recorded_at else None
+        if recorded_epoch is not None:
+            meta["recorded_epoch"] = recorded_epoch
+        meta["content_hash"] = _row_hash(text, meta)
+        metas.append(meta)
+    return ids, texts, metas
+
+
+def _stored_hashes(collection: "Collection", ids: list[str] | None = None) -> dict[str, str]:
+    """Map stored id -> content_hash (empty string for rows written before hashing)."""
+    if ids is None:
+        payload = collection.get(include=["metadatas"])
+    elif ids:
+        payload = collection.get(ids=ids, include=["metadatas"])
+    else:
+        return {}
+    return {
+        doc_id: str((meta or {}).get("content_hash") or "")
+        for doc_id, meta in zip(payload.get("ids", []), payload.get("metadatas", []))
+    }
+
+
+def _in_states(meta: Mapping | None, states: set[str]) -> bool:
+    return (normalize_state_code(str((meta or {}).get("state") or "")) or "") in states
+
+
+def _iter_chunks(documents: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    chunk: list[dict] = []
+    for doc in documents:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _max_batch_size(collection: "Collection") -> int | None:
+    """Largest upsert the collection's client accepts, if it reports one."""
+    size = getattr(getattr(collection, "_client", None), "max_batch_size", None)
+    return size if isinstance(size, int) and size > 0 else None
+
+
+def _upsert_chunk(
+    collection: "Collection",
+    ids: list[str],
+    texts: list[str],
+    metas: list[dict],
+    embeddings: list[list[float]],
+) -> float:
+    """Upsert one chunk, retrying transient failures with backoff; returns seconds spent."""
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            collection.upsert(ids=ids, documents=texts, metadatas=metas, embeddings=embeddings)
+            return time.perf_counter() - started
+        except ValueError:
+            # Malformed batches fail the same way every time.
+            raise
+        except Exception:
+            if attempt >= INGEST_UPSERT_RETRIES:
+                raise
+            log.warning("Upsert of %s rows failed (attempt %s); retrying", len(ids), attempt + 1, exc_info=True)
+            _INGEST_PROGRESS["retries"] = _INGEST_PROGRESS.get("retries", 0) + 1
+            time.sleep(INGEST_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            attempt += 1
+
+
+def _start_progress(chunk_size: int) -> dict:
+    global _INGEST_PROGRESS
+    _INGEST_PROGRESS = {
+        "running": True,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "finished_at": None,
+        "chunk_size": chunk_size,
+        "rows_seen": 0,
+        "chunks_written": 0,
+        "rows_written": 0,
+        "retries": 0,
+        "embed_ms": 0.0,
+        "upsert_ms": 0.0,
+    }
+    return _INGEST_PROGRESS
 
+
+def get_ingest_progress() -> dict:
+    """Progress of the running (or last) ingest in this process."""
+    progress = dict(_INGEST_PROGRESS)
+    for key in ("embed_ms", "upsert_ms"):
+        if key in progress:
+            progress[key] = round(progress[key], 1)
+    return progress
+
+
+class _RowSpool:
+    """
+    Embedded rows staged in a temporary file while an ingest streams and
+    embeds outside the ingest lock, so memory stays bounded by one chunk and
+    the lock is only held to write them.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self.chunks = 0
+        self.ids: set[str] = set()
+
+    def add(self, ids: list[str], texts: list[str], metas: list[dict], embeddings: list[list[float]]) -> None:
+        pickle.dump((ids, texts, metas, np.asarray(embeddings, dtype=np.float32)), self._file)
+        self.chunks += 1
+        self.ids.update(ids)
+
+    def __iter__(self) -> Iterator[tuple[list[str], list[str], list[dict], list[list[float]]]]:
+        self._file.seek(0)
+        for _ in range(self.chunks):
+            ids, texts, metas, embeddings = pickle.load(self._file)
+            yield ids, texts, metas, embeddings.tolist()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _spool_documents(
+    documents: Iterable[dict],
+    collection: "Collection",
+    chunk_size: int,
+    spool: _RowSpool,
+    progress: dict,
+    replace: bool,
+    delta: bool,
+) -> dict[str, str]:
+    """
+    Build, diff and embed ``documents`` into ``spool`` without the ingest
+    lock; returns incoming id -> content hash. With ``delta`` only rows whose
+    hash differs from the (unlocked) stored one are embedded; the diff is
+    redone under the lock before anything is written.
+    """
+    hashes: dict[str, str] = {}
+    stored = _stored_hashes(collection) if replace and delta else None
+    for chunk in _iter_chunks(documents, chunk_size):
+        ids, texts, metas = _build_rows(chunk)
+        progress["rows_seen"] += len(ids)
+        hashes.update((doc_id, meta["content_hash"]) for doc_id, meta in zip(ids, metas))
+        if delta:
+            known = stored if stored is not None else _stored_hashes(collection, ids)
+            changed = [i for i, (doc_id, meta) in enumerate(zip(ids, metas)) if known.get(doc_id) != meta["content_hash"]]
+            ids = [ids[i] for i in changed]
+            texts = [texts[i] for i in changed]
+            metas = [metas[i] for i in changed]
+        if not ids:
+            continue
+        started = time.perf_counter()
+        embeddings = _embed_documents(ids, texts)
+        progress["embed_ms"] += (time.perf_counter() - started) * 1000.0
+        spool.add(ids, texts, metas, embeddings)
+    return hashes
+
+
+def ingest_documents(
+    documents: Iterable[dict],
+    replace: bool = False,
+    delta: bool = False,
+    preserve_states: Iterable[str] | None = None,
+    chunk_size: int | None = None,
+) -> dict:
+    """
+    Write ``documents`` to the collection and return row counts
+    (added/updated/deleted/unchanged).
+
+    ``replace`` makes the collection mirror ``documents``. With ``delta`` the
+    incoming ids and content hashes are diffed against what is stored so only
+    changed rows are embedded and upserted and only vanished ids are deleted;
+    without it a replace writes a fresh collection. Stored rows of
+    ``preserve_states`` (states whose upstream fetch failed) survive a replace.
+
+    ``documents`` may be a generator: it is consumed in chunks of
+    ``INGEST_CHUNK_SIZE`` (capped at the client's max batch size) and
+    embedded into an on-disk spool before the ingest lock is taken, so a
+    slow upstream fetch or embedding never blocks other writers or cold
+    readers, and only ids and hashes are held in memory for the whole run.
+    Under the lock the diff is redone against the stored rows, the spool is
+    upserted (each chunk retried ``INGEST_UPSERT_RETRIES`` times) and the
+    cache and snapshot are published. ``preserve_states`` is read after the
+    stream is exhausted, so a producer can still add to it.
+    """
+    chunk_size = max(1, chunk_size or INGEST_CHUNK_SIZE)
+    collection = _get_collection()
+    chunk_size = min(chunk_size, _max_batch_size(collection) or chunk_size)
+    progress = _start_progress(chunk_size)
+    spool = _RowSpool()
     try:
-        yield
+        incoming = _spool_documents(documents, collection, chunk_size, spool, progress, replace, delta)
+        with _ingest_lock(timeout_seconds=INGEST_LOCK_TIMEOUT_SECONDS):
+            return _write_spool(spool, incoming, replace, delta, preserve_states, chunk_size, progress)
     finally:
-        try:
-            os.remove(lock_path)
-        except FileNotFoundError:
-            pass
+        spool.close()
+        progress["running"] = False
+        progress["finished_at"] = datetime.now(timezone.utc).isoformat()
 
 
-def load_documents() -> list[dict]:
-    global _DOCUMENTS_CACHE
-    if _DOCUMENTS_CACHE is not None:
-        return _DOCUMENTS_CACHE
+def _write_spool(
+    spool: _RowSpool,
+    incoming: dict[str, str],
+    replace: bool,
+    delta: bool,
+    preserve_states: Iterable[str] | None,
+    chunk_size: int,
+    progress: dict,
+) -> dict:
+    """The locked half of ``ingest_documents``: diff, write and publish the spooled rows."""
+    # Re-read under the lock: another process may have swapped or written meanwhile.
     collection = _get_collection()
-    payload = collection.get(include=["documents", "metadatas"])
-    docs = []
-    for text, meta, doc_id in zip(
-        payload.get("documents", []),
-        payload.get("metadatas", []),
-        payload.get("ids", []),
-    ):
-        doc = dict(meta or {})
-        doc["id"] = doc_id
-        doc["text"] = text
-        state = doc.get("state")
-        if state:
-            doc["state"] = str(state).upper()
-        docs.append(doc)
-    _DOCUMENTS_CACHE = docs
-    return _DOCUMENTS_CACHE
-
-
-def ingest_documents(documents: list[dict], replace: bool = False) -> None:
-    with _ingest_lock(timeout_seconds=60.0):
-        collection = _get_collection()
-        if replace:
-            collection = _reset_collection()
-            _reset_cache()
-
-        ids = []
-        texts = []
-        metas = []
-        for doc in documents:
-            doc_id = str(doc.get("id"))
-            if not doc_id:
+    counts = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    previous = None
+    stored: dict[str, str] = {}
+    if replace:
+        # Both replace modes diff ids against what is stored, so the counts mean the same.
+        stored = _stored_hashes(collection)
+        current = stored
+    elif delta:
+        ids = list(incoming)
+        current = {}
+        for offset in range(0, len(ids), chunk_size):
+            current.update(_stored_hashes(collection, ids[offset:offset + chunk_size]))
+    if delta or replace:
+        for doc_id, row_hash in incoming.items():
+            stored_hash = current.get(doc_id)
+            if stored_hash is None:
+                counts["added"] += 1
+            elif stored_hash != row_hash and doc_id in spool.ids:
+                counts["updated"] += 1
+            else:
+                # Includes rows another ingest rewrote after the unlocked diff; they keep its write.
+                counts["unchanged"] += 1
+    else:
+        counts["added"] = progress["rows_seen"]
+    if replace and not delta:
+        previous = collection
+        # Blue/green: fill a fresh collection while readers keep the old one.
+        collection = _create_staging_collection()
+
+    written = 0
+    # Rows written by an append or delta ingest, kept (as float16) so the
+    # snapshot can be updated by the change instead of re-exported.
+    snapshot_delta: _SnapshotDelta | None = None
+    if SNAPSHOT_ENABLED and (delta or not replace):
+        snapshot_delta = _SnapshotDelta.for_current(_SNAPSHOT_READER.current())
+    for ids, texts, metas, embeddings in spool:
+        if delta:
+            keep = [i for i, (doc_id, meta) in enumerate(zip(ids, metas)) if current.get(doc_id) != meta["content_hash"]]
+            if len(keep) < len(ids):
+                ids = [ids[i] for i in keep]
+                texts = [texts[i] for i in keep]
+                metas = [metas[i] for i in keep]
+                embeddings = [embeddings[i] for i in keep]
+            if not ids:
                 continue
-            ids.append(doc_id)
-            texts.append(doc.get("text", ""))
-            recorded_at = doc.get("recorded_at") or ""
-            recorded_date = recorded_at[:10] if isinstance(recorded_at, str) else ""
-            metas.append(
-                {
-                    "title": doc.get("title"),
-                    "source": doc.get("source"),
-                    "type": doc.get("type"),
-                    "state": doc.get("state"),
-                    "recorded_at": recorded_at,
-                    "recorded_date": recorded_date,
-                    "value": doc.get("value"),
-                }
-            )
+        progress["upsert_ms"] += _upsert_chunk(collection, ids, texts, metas, embeddings) * 1000.0
+        progress["chunks_written"] += 1
+        progress["rows_written"] += len(ids)
+        written += len(ids)
+        if not replace:
+            _apply_to_cache(ids, texts, metas)
+        if snapshot_delta is not None:
+            snapshot_delta.add(ids, metas, embeddings)
+
+    states = {normalize_state_code(code) or code for code in preserve_states or ()}
+    preserved_ids: list[str] = []
+    deleted_ids: list[str] = []
+    if delta and replace:
+        deleted_ids = [doc_id for doc_id in stored if doc_id not in incoming]
+        if states and deleted_ids:
+            payload = collection.get(ids=deleted_ids, include=["metadatas"])
+            preserved_ids = [
+                doc_id
+                for doc_id, meta in zip(payload.get("ids", []), payload.get("metadatas") or [])
+                if _in_states(meta, states)
+            ]
+            kept = set(preserved_ids)
+            deleted_ids = [doc_id for doc_id in deleted_ids if doc_id not in kept]
+        if deleted_ids:
+            collection.delete(ids=deleted_ids)
+            counts["deleted"] = len(deleted_ids)
+    elif replace:
+        if states:
+            preserved_ids = _copy_states(previous, collection, states, skip_ids=set(incoming), batch_size=chunk_size)
+        kept = set(incoming).union(preserved_ids)
+        counts["deleted"] = sum(1 for doc_id in stored if doc_id not in kept)
+        _activate_collection(collection)
+
+    if replace:
+        if not delta or deleted_ids or written:
+            _rebuild_cache()
+        if EMBED_CACHE_ENABLED and (not delta or deleted_ids):
+            get_embedding_cache().prune(set(incoming) | set(preserved_ids))
 
-        if ids:
-            embeddings = embed_texts(texts)
-            collection.upsert(
-                ids=ids,
-                documents=texts,
-                metadatas=metas,
-                embeddings=embeddings,
+    if SNAPSHOT_ENABLED:
+        if snapshot_delta is None or read_current_version(SNAPSHOT_DIR) is None:
+            _publish_snapshot(collection)
+        elif written or deleted_ids:
+            _publish_snapshot_delta(collection, snapshot_delta, deleted_ids)
+    return counts
+
+
+def _copy_states(
+    source: "Collection",
+    target: "Collection",
+    states: set[str],
+    skip_ids: set[str] = frozenset(),
+    batch_size: int = INGEST_CHUNK_SIZE,
+) -> list[str]:
+    """
+    Carry rows of ``states`` over into a staging collection unchanged.
+    Pages through only those states' rows, so at most ``batch_size``
+    embeddings are held at a time.
+    """
+    synonyms = sorted({synonym for state in states for synonym in get_state_synonyms(state)})
+    where = {"state": {"$in": synonyms}}
+    copied: list[str] = []
+    offset = 0
+    while True:
+        page = source.get(
+            where=where,
+            include=["documents", "metadatas", "embeddings"],
+            limit=batch_size,
+            offset=offset,
+        )
+        page_ids = page.get("ids", [])
+        if not page_ids:
+            break
+        offset += len(page_ids)
+        metas = page.get("metadatas") or [{} for _ in page_ids]
+        keep = [
+            i for i, (doc_id, meta) in enumerate(zip(page_ids, metas))
+            if doc_id not in skip_ids and _in_states(meta, states)
+        ]
+        if keep:
+            _upsert_chunk(
+                target,
+                [page_ids[i] for i in keep],
+                [page["documents"][i] for i in keep],
+                [metas[i] for i in keep],
+                [page["embeddings"][i] for i in keep],
             )
+            copied.extend(page_ids[i] for i in keep)
+        if len(page_ids) < batch_size:
+            break
+    return copied
+
+
+def _publish_snapshot(collection: "Collection") -> int:
+    """
+    Export the collection's vectors as a float16 matrix plus metadata columns
+    that every worker process maps read-only. Pages through the collection so
+    the export never materialises every vector as Python floats at once.
+    """
+    total = collection.count()
+    ids: list[str] = []
+    metas: list[dict] = []
+    matrix = None
+    for offset in range(0, total, _SNAPSHOT_PAGE_SIZE):
+        page = collection.get(
+            include=["embeddings", "metadatas"],
+            limit=_SNAPSHOT_PAGE_SIZE,
+            offset=offset,
+        )
+        vectors = np.asarray(page.get("embeddings") or [], dtype=np.float16)
+        if matrix is None and len(vectors):
+            matrix = np.zeros((total, vectors.shape[1]), dtype=np.float16)
+        if len(vectors):
+            matrix[len(ids):len(ids) + len(vectors)] = vectors
+        ids.extend(page.get("ids", []))
+        metas.extend(page.get("metadatas") or [{} for _ in page.get("ids", [])])
+    if matrix is None:
+        matrix = np.zeros((0, 0), dtype=np.float16)
+    version = publish_snapshot(SNAPSHOT_DIR, ids, metas, matrix[:len(ids)], keep=SNAPSHOT_KEEP)
+    _SNAPSHOT_READER.refresh()
+    return version
+
+
+class _SnapshotDelta:
+    """
+    Rows written during one ingest, collected for an incremental snapshot
+    publish. Collection stops once the rows outgrow
+    ``SNAPSHOT_DELTA_MAX_RATIO`` of the current snapshot, since a full
+    export is then due anyway.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.ids: list[str] = []
+        self.metas: list[dict] = []
+        self.embeddings: list[np.ndarray] = []
+        self.overflowed = False
 
-        _reset_cache()
+    @classmethod
+    def for_current(cls, snapshot: Snapshot | None) -> "_SnapshotDelta":
+        base = int(snapshot.manifest["count"]) if snapshot is not None else 0
+        return cls(int(SNAPSHOT_DELTA_MAX_RATIO * base))
+
+    def add(self, ids: list[str], metas: list[dict], embeddings: list[list[float]]) -> None:
+        if self.overflowed:
+            return
+        if len(self.ids) + len(ids) > self.budget:
+            self.overflowed = True
+            self.ids, self.metas, self.embeddings = [], [], []
+            return
+        self.ids.extend(ids)
+        self.metas.extend(metas)
+        self.embeddings.append(np.asarray(embeddings, dtype=np.float16))
+
+
+def _publish_snapshot_delta(collection: "Collection", delta: _SnapshotDelta, deleted_ids: list[str]) -> int:
+    """Publish an ingest's written and deleted rows over the current snapshot."""
+    version = None
+    if not delta.overflowed:
+        embeddings = np.vstack(delta.embeddings) if delta.embeddings else np.zeros((0, 0), dtype=np.float16)
+        version = publish_snapshot_delta(
+            SNAPSHOT_DIR,
+            delta.ids,
+            delta.metas,
+            embeddings,
+            deleted_ids=deleted_ids,
+            keep=SNAPSHOT_KEEP,
+            max_ratio=SNAPSHOT_DELTA_MAX_RATIO,
+        )
+    if version is None:
+        # No base to build on, or the delta outgrew it: export in full.
+        return _publish_snapshot(collection)
+    _SNAPSHOT_READER.refresh()
+    return version
+
+
+def get_snapshot() -> Snapshot | None:
+    """Current shared embedding snapshot for this process, if one has been published."""
+    if not SNAPSHOT_ENABLED:
+        return None
+    return _SNAPSHOT_READER.current()
 
 
 def _reset_cache() -> None:
-    global _DOCUMENTS_CACHE
-    _DOCUMENTS_CACHE = None
+    global _CACHE, _PROVISIONAL
+    _CACHE = None
+    _PROVISIONAL = None
+
 
+def get_document_index() -> DocumentIndex:
+    """Return the secondary indexes for the current cache generation."""
+    return _current_generation().document_index
 
-def get_embedder() -> SentenceTransformer:
-    global _EMBED_MODEL
-    if _EMBED_MODEL is None:
-        _EMBED_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-    return _EMBED_MODEL
+
+def get_keyword_index() -> Bm25Index:
+    """Return the BM25 index for the current cache generation."""
+    return _current_generation().keyword_index
+
+
+def get_cache_generation() -> int:
+    """Number of the most recently published document-cache generation (0 before the first)."""
+    return _CACHE_GENERATION
+
+
+def get_cache_stats() -> dict:
+    generation = _CACHE
+    if generation is None:
+        return {"generation": _CACHE_GENERATION, "documents": None}
+    return {
+        "generation": generation.number,
+        "documents": len(generation.documents),
+        "built_at": generation.built_at,
+        "build_seconds": round(generation.build_seconds, 4),
+    }
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    model = get_embedder()
-    vectors = model.encode(texts, normalize_embeddings=True)
-    return vectors.tolist()
+def get_embedding_cache() -> EmbeddingCache:
+    global _EMBEDDING_CACHE
+    if _EMBEDDING_CACHE is None:
+        _EMBEDDING_CACHE = EmbeddingCache(EMBED_CACHE_PATH)
+    return _EMBEDDING_CACHE
+
+
+def _embed_documents(ids: list[str], texts: list[str]) -> list[list[float]]:
+    """
+    Embed only texts whose (id, content hash) is not already cached; unchanged
+    readings reuse the stored vectors.
+    """
+    if not EMBED_CACHE_ENABLED:
+        return embed_texts(texts)
+    cache = get_embedding_cache()
+    model_id = embedding_model_id()
+    hashes = [content_hash(text, model_id) for text in texts]
+    cached = cache.get_many(ids, hashes)
+    missing = [i for i, doc_id in enumerate(ids) if doc_id not in cached]
+    if missing:
+        fresh = embed_texts([texts[i] for i in missing])
+        cache.put_many(
+            [ids[i] for i in missing],
+            [hashes[i] for i in missing],
+            fresh,
+        )
+        for i, vector in zip(missing, fresh):
+            cached[ids[i]] = vector
+    return [cached[doc_id] for doc_id in ids]
 
 
 def _count_candidates(
     state: str | None = None,
     doc_type: str | None = None,
     recorded_date: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
 ) -> int:
-    documents = load_documents()
-    count = 0
-    for doc in documents:
-        if state and str(doc.get("state", "")).upper() not in get_state_synonyms(state):
-            continue
-        if doc_type and str(doc.get("type", "")).lower() != doc_type.lower():
-            continue
-        if recorded_date and str(doc.get("recorded_date", "")) != recorded_date:
-            continue
-        count += 1
-    return count
+    return get_document_index().count(
+        state=state,
+        doc_type=doc_type,
+        recorded_date=recorded_date,
+        date_from=date_from,
+        date_to=date_to,
+    )
 
 
 def retrieve_semantic(
@@ -236,58 +1054,145 @@ def retrieve_semantic(
     date_from: str | None = None,
     date_to: str | None = None,
     min_score: float | None = None,
+    query_embedding: list[float] | None = None,
 ) -> list[dict]:
-    collection = _get_collection()
-    where = _build_where_clause(
-        state=state,
-        doc_type=doc_type,
-        recorded_date=recorded_date,
-    )
-    candidate_k = top_k * 5 if (date_from or date_to) else top_k
-    candidate_count = _count_candidates(
+    qvec = query_embedding if query_embedding is not None else embed_query(question)
+    return retrieve_semantic_batch(
+        [qvec],
+        top_k=top_k,
         state=state,
         doc_type=doc_type,
         recorded_date=recorded_date,
-    )
-    if candidate_count <= 0:
+        date_from=date_from,
+        date_to=date_to,
+        min_score=min_score,
+    )[0]
+
+
+def retrieve_semantic_batch(
+    query_embeddings: list[list[float]],
+    top_k: int,
+    state: str | None = None,
+    doc_type: str | None = None,
+    recorded_date: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    min_score: float | None = None,
+) -> list[list[dict]]:
+    """
+    Score several embeddings that share the same filters. Small candidate
+    sets are scored exactly; larger ones go through one HNSW query.
+    """
+    if not query_embeddings:
         return []
-    n_results = min(candidate_k, candidate_count)
-    qvec = embed_texts([question])
+    empty: list[list[dict]] = [[] for _ in query_embeddings]
+    filters = {
+        "state": state,
+        "doc_type": doc_type,
+        "recorded_date": recorded_date,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    candidate_count = _count_candidates(**filters)
+    if candidate_count <= 0:
+        return empty
+    if candidate_count < RAG_EXACT_SEARCH_THRESHOLD:
+        _PLANNER_STATS["exact"] += 1
+        return _exact_search(query_embeddings, top_k, filters, min_score)
+    _PLANNER_STATS["hnsw"] += 1
+    n_results = min(top_k, candidate_count)
     try:
-        result = collection.query(
-            query_embeddings=qvec,
+        result = _get_collection().query(
+            query_embeddings=query_embeddings,
             n_results=n_results,
-            where=where,
+            where=_build_where_clause(**filters),
             include=["documents", "metadatas", "distances"],
         )
     except RuntimeError:
-        # Guard against HNSW runtime errors when filtered candidate sets are tiny.
-        return []
-    hits = []
-    distances = (result.get("distances") or [[]])[0]
-    metas = (result.get("metadatas") or [[]])[0]
-    texts = (result.get("documents") or [[]])[0]
-    for distance, meta, text in zip(distances, metas, texts):
-        score = 1.0 - float(distance)
-        if min_score is not None and score < min_score:
-            continue
-        doc = dict(meta or {})
-        doc["text"] = text
-        if date_from or date_to:
-            doc_date = str(doc.get("recorded_date") or "")
-            if date_from and doc_date < date_from:
-                continue
-            if date_to and doc_date > date_to:
+        # HNSW can fail on heavily filtered sets; answer exactly instead of empty.
+        _PLANNER_STATS["hnsw_fallbacks"] += 1
+        return _exact_search(query_embeddings, top_k, filters, min_score)
+    batches = []
+    for distances, metas, texts in zip(
+        result.get("distances") or empty,
+        result.get("metadatas") or empty,
+        result.get("documents") or empty,
+    ):
+        hits = []
+        for distance, meta, text in zip(distances, metas, texts):
+            score = 1.0 - float(distance)
+            if min_score is not None and score < min_score:
                 continue
-        hits.append(doc)
-        if len(hits) >= top_k:
-            break
-    return hits
+            doc = dict(meta or {})
+            doc["text"] = text
+            hits.append(doc)
+        batches.append(hits)
+    return batches
+
+
+def _candidate_embeddings(doc_ids: list[str]) -> tuple[np.ndarray, list[int]]:
+    """
+    Embeddings for ``doc_ids`` as a float32 matrix plus the indices of the ids
+    that were found. Rows come from the mapped snapshot; ids it does not know
+    yet (or all of them, without a snapshot) are read from the collection.
+    """
+    vectors: dict[int, np.ndarray] = {}
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.dim:
+        for i, row in enumerate(snapshot.rows(doc_ids)):
+            if row >= 0:
+                vectors[i] = snapshot.vector(row)
+    missing = [i for i, doc_id in enumerate(doc_ids) if i not in vectors and doc_id]
+    if missing:
+        payload = _get_collection().get(
+            ids=[doc_ids[i] for i in missing],
+            include=["embeddings"],
+        )
+        fetched = dict(zip(payload.get("ids", []), payload.get("embeddings") or []))
+        for i in missing:
+            vector = fetched.get(doc_ids[i])
+            if vector is not None:
+                vectors[i] = np.asarray(vector)
+    found = sorted(vectors)
+    if not found:
+        return np.zeros((0, 0), dtype=np.float32), []
+    return np.vstack([vectors[i] for i in found]).astype(np.float32), found
 
 
-def score_match(text: str, tokens: list[str]) -> int:
-    lowered = text.lower()
-    return sum(1 for token in tokens if token and token in lowered)
+def _exact_search(
+    query_embeddings: list[list[float]],
+    top_k: int,
+    filters: dict,
+    min_score: float | None,
+) -> list[list[dict]]:
+    """
+    Brute-force scoring of every candidate matching ``filters``. Uses the same
+    squared-L2 distance as the collection's HNSW space, so scores and
+    ``min_score`` mean the same thing on both paths.
+    """
+    index = get_document_index()
+    docs = index.filter(**filters)
+    matrix, found = _candidate_embeddings([doc.get("id") for doc in docs])
+    if not found:
+        return [[] for _ in query_embeddings]
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    distances = (
+        np.sum(queries * queries, axis=1)[:, None]
+        - 2.0 * (queries @ matrix.T)
+        + np.sum(matrix * matrix, axis=1)[None, :]
+    )
+    batches = []
+    for row in distances:
+        hits = []
+        for col in np.argsort(row, kind="stable")[:top_k]:
+            score = 1.0 - float(row[col])
+            if min_score is not None and score < min_score:
+                continue
+            hit = dict(docs[found[col]])
+            hit.pop("id", None)
+            hits.append(hit)
+        batches.append(hits)
+    return batches
 
 
 def retrieve_keyword(
@@ -299,34 +1204,40 @@ def retrieve_keyword(
     date_from: str | None = None,
     date_to: str | None = None,
 ) -> list[dict]:
-    tokens = [t.strip() for t in question.lower().split() if t.strip()]
-    documents = load_documents()
-    scored = []
-    for doc in documents:
-        if state and str(doc.get("state", "")).upper() not in get_state_synonyms(state):
-            continue
-        if doc_type and str(doc.get("type", "")).lower() != doc_type.lower():
-            continue
-        if recorded_date and str(doc.get("recorded_date", "")) != recorded_date:
-            continue
-        doc_date = str(doc.get("recorded_date") or "")
-        if date_from and doc_date < date_from:
-            continue
-        if date_to and doc_date > date_to:
-            continue
-        score = score_match(doc.get("text", ""), tokens)
-        if score > 0:
-            scored.append((score, doc))
-    scored.sort(key=lambda item: item[0], reverse=True)
-    return [doc for _, doc in scored[:top_k]]
+    # Both indexes come from the same generation, so positions line up.
+    generation = _current_generation()
+    index = generation.document_index
+    candidates = None
+    if state or doc_type or recorded_date or date_from or date_to:
+        candidates = index.positions(
+            state=state,
+            doc_type=doc_type,
+            recorded_date=recorded_date,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    ranked = generation.keyword_index.search(question, top_k, candidates=candidates)
+    return [index.documents[pos] for _, pos in ranked]
 
 
 def get_stats() -> dict:
     collection = _get_collection()
     payload = collection.get(include=["documents"])
     total = len(payload.get("documents", []))
-    return {
+    stats = {
         "total_documents": total,
-        "collection": CHROMA_COLLECTION,
+        "collection": collection.name,
         "persist_dir": CHROMA_PERSIST_DIR,
     }
+    if EMBED_CACHE_ENABLED:
+        stats["embedding_cache"] = get_embedding_cache().stats()
+    stats["query_embedding_cache"] = get_query_cache_stats()
+    stats["document_cache"] = get_cache_stats()
+    stats["semantic_planner"] = {
+        **_PLANNER_STATS,
+        "exact_threshold": RAG_EXACT_SEARCH_THRESHOLD,
+    }
+    if SNAPSHOT_ENABLED:
+        get_snapshot()
+        stats["snapshot"] = _SNAPSHOT_READER.stats()
+    return stats
@@ -0,0 +1,70 @@
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters", "label")
+
+    def __init__(self, label: str):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+        self.label = label
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution. The first
+    caller runs the function; callers arriving while it is in flight block
+    until it finishes and receive the same result (or exception). Once a
+    call completes its key is forgotten, so later callers start a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], label: str | None = None) -> tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True for callers that waited on another."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call(label if label is not None else str(key))
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = {call.label: call.waiters for call in self._calls.values()}
+        return {
+            "in_flight": len(in_flight),
+            "waiters": in_flight,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "max_waiters": self.max_waiters,
+        }
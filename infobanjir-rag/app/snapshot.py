@@ -0,0 +1,436 @@
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .state_codes import normalize_state_code
+
+_CURRENT_FILE = "CURRENT"
+_MANIFEST_FILE = "manifest.json"
+_DELTA_DIR = "delta"
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _encode_column(values: list[str]) -> tuple[np.ndarray, list[str]]:
+    """Dictionary-encode a low-cardinality string column into uint16 codes."""
+    vocabulary: dict[str, int] = {}
+    codes = np.empty(len(values), dtype=np.uint16)
+    for i, value in enumerate(values):
+        codes[i] = vocabulary.setdefault(value, len(vocabulary))
+    return codes, list(vocabulary)
+
+
+def _float_or_nan(value: object) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float("nan")
+
+
+def read_current_version(base_dir: str) -> int | None:
+    try:
+        with open(os.path.join(base_dir, _CURRENT_FILE), encoding="utf-8") as handle:
+            return int(handle.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _fsync_tree(path: str) -> None:
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            with open(os.path.join(root, name), "rb") as handle:
+                os.fsync(handle.fileno())
+
+
+def _sorted_id_array(encoded_ids: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """Fixed-width byte strings in sorted order plus the row each one came from."""
+    width = max((len(raw) for raw in encoded_ids), default=0)
+    keys = np.array(encoded_ids, dtype=f"S{max(1, width)}")
+    order = np.argsort(keys, kind="stable").astype(np.int64)
+    return keys[order], order
+
+
+def _write_segment(path: str, ids: list[str], metas: list[dict], embeddings) -> dict:
+    """Write one segment's columns into ``path`` and return its manifest entry."""
+    os.makedirs(path, exist_ok=True)
+    matrix = np.asarray(embeddings, dtype=np.float16)
+    if matrix.ndim != 2:
+        matrix = np.zeros((len(ids), 0), dtype=np.float16)
+    metas = [meta or {} for meta in metas]
+    state_codes, states = _encode_column(
+        [normalize_state_code(str(meta.get("state") or "")) or "" for meta in metas]
+    )
+    type_codes, types = _encode_column([str(meta.get("type") or "").lower() for meta in metas])
+    recorded_day = np.asarray([int(meta.get("recorded_day") or 0) for meta in metas], dtype=np.int32)
+    values = np.asarray([_float_or_nan(meta.get("value")) for meta in metas], dtype=np.float32)
+    encoded_ids = [doc_id.encode("utf-8") for doc_id in ids]
+    id_offsets = np.zeros(len(encoded_ids) + 1, dtype=np.int64)
+    np.cumsum([len(raw) for raw in encoded_ids], out=id_offsets[1:])
+    sorted_ids, id_order = _sorted_id_array(encoded_ids)
+
+    np.save(os.path.join(path, "embeddings.npy"), matrix)
+    np.save(os.path.join(path, "state.npy"), state_codes)
+    np.save(os.path.join(path, "type.npy"), type_codes)
+    np.save(os.path.join(path, "recorded_day.npy"), recorded_day)
+    np.save(os.path.join(path, "value.npy"), values)
+    np.save(os.path.join(path, "id_offsets.npy"), id_offsets)
+    np.save(os.path.join(path, "sorted_ids.npy"), sorted_ids)
+    np.save(os.path.join(path, "id_order.npy"), id_order)
+    with open(os.path.join(path, "ids.bin"), "wb") as handle:
+        handle.write(b"".join(encoded_ids))
+    return {
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "states": states,
+        "types": types,
+    }
+
+
+def _commit_version(base_dir: str, version: int, tmp_dir: str, manifest: dict, keep: int) -> int:
+    """Fsync ``tmp_dir``, move it into place, repoint CURRENT and collect old versions."""
+    with open(os.path.join(tmp_dir, _MANIFEST_FILE), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    _fsync_tree(tmp_dir)
+
+    final_dir = os.path.join(base_dir, f"v{version}")
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(tmp_dir, final_dir)
+    pointer_tmp = os.path.join(base_dir, f"{_CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(pointer_tmp, "w", encoding="utf-8") as handle:
+        handle.write(str(version))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(pointer_tmp, os.path.join(base_dir, _CURRENT_FILE))
+    _fsync_dir(base_dir)
+
+    # Old versions can be removed even if a worker still maps them: the
+    # kernel keeps unlinked mapped files alive until the last mapping closes.
+    versions = sorted(
+        int(name[1:])
+        for name in os.listdir(base_dir)
+        if name.startswith("v") and name[1:].isdigit()
+    )
+    for old in versions[:-max(1, keep)]:
+        shutil.rmtree(os.path.join(base_dir, f"v{old}"), ignore_errors=True)
+    return version
+
+
+def _new_version_dir(base_dir: str) -> tuple[int, str]:
+    os.makedirs(base_dir, exist_ok=True)
+    version = (read_current_version(base_dir) or 0) + 1
+    tmp_dir = os.path.join(base_dir, f"v{version}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return version, tmp_dir
+
+
+def publish_snapshot(
+    base_dir: str,
+    ids: list[str],
+    metas: list[dict],
+    embeddings: list[list[float]] | np.ndarray,
+    keep: int = 2,
+) -> int:
+    """
+    Write a new immutable snapshot version and repoint CURRENT at it.
+    The version directory is fully written and fsynced before the pointer
+    file is atomically replaced, so readers see either the old or the new
+    snapshot, never a partial one.
+    """
+    version, tmp_dir = _new_version_dir(base_dir)
+    segment = _write_segment(tmp_dir, ids, metas, embeddings)
+    manifest = {
+        "version": version,
+        **segment,
+        "live": segment["count"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    return _commit_version(base_dir, version, tmp_dir, manifest, keep)
+
+
+def publish_snapshot_delta(
+    base_dir: str,
+    ids: list[str],
+    metas: list[dict],
+    embeddings: list[list[float]] | np.ndarray,
+    deleted_ids: list[str] = (),
+    keep: int = 2,
+    max_ratio: float = 0.25,
+) -> int | None:
+    """
+    Publish written and deleted rows on top of the current version without
+    re-exporting it. The new version hard-links the base segment's files
+    and carries one ``delta`` segment (every row written since the base,
+    newest wins) plus tombstones for deleted ids, so the cost follows the
+    change, not the corpus. Returns None when there is no base to build on
+    or the delta would outgrow ``max_ratio`` of the base; the caller then
+    publishes in full.
+    """
+    current = read_current_version(base_dir)
+    if current is None:
+        return None
+    try:
+        previous = Snapshot(os.path.join(base_dir, f"v{current}"))
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    base_count = int(previous.manifest["count"])
+    matrix = np.asarray(embeddings, dtype=np.float16)
+    if matrix.ndim != 2 or (previous.dim and matrix.shape[1] != previous.dim):
+        return None
+
+    rows: dict[str, tuple[dict, np.ndarray]] = {}
+    tombstones: set[str] = set()
+    if previous.delta is not None:
+        for row in range(len(previous.delta)):
+            rows[previous.delta.doc_id(row)] = (previous.delta.meta(row), previous.delta.embeddings[row])
+        tombstones.update(raw.decode("utf-8") for raw in previous.tombstones.tolist())
+    for doc_id, meta, vector in zip(ids, metas, matrix):
+        rows[doc_id] = (meta or {}, vector)
+        tombstones.discard(doc_id)
+    for doc_id in deleted_ids:
+        rows.pop(doc_id, None)
+        tombstones.add(doc_id)
+    if len(rows) + len(tombstones) > max_ratio * max(base_count, 1):
+        return None
+
+    version, tmp_dir = _new_version_dir(base_dir)
+    base_path = previous.path
+    for name in os.listdir(base_path):
+        source = os.path.join(base_path, name)
+        if name == _MANIFEST_FILE or not os.path.isfile(source):
+            continue
+        try:
+            os.link(source, os.path.join(tmp_dir, name))
+        except OSError:
+            shutil.copy2(source, os.path.join(tmp_dir, name))
+    delta_ids = list(rows)
+    dim = previous.dim or (int(matrix.shape[1]) if matrix.size else 0)
+    delta_matrix = (
+        np.vstack([rows[doc_id][1] for doc_id in delta_ids]) if delta_ids else np.zeros((0, dim), dtype=np.float16)
+    )
+    delta_path = os.path.join(tmp_dir, _DELTA_DIR)
+    delta = _write_segment(delta_path, delta_ids, [rows[doc_id][0] for doc_id in delta_ids], delta_matrix)
+    np.save(
+        os.path.join(delta_path, "tombstones.npy"),
+        _sorted_id_array([doc_id.encode("utf-8") for doc_id in tombstones])[0],
+    )
+    in_base = sum(1 for row in previous.base.lookup(delta_ids + list(tombstones)) if row >= 0)
+    manifest = {
+        **{key: previous.manifest[key] for key in ("count", "dim", "states", "types")},
+        "version": version,
+        "base_version": previous.manifest.get("base_version", previous.version),
+        "delta": {**delta, "tombstones": len(tombstones)},
+        "live": base_count - in_base + len(delta_ids),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    return _commit_version(base_dir, version, tmp_dir, manifest, keep)
+
+
+class _Segment:
+    """Memory-mapped columns of one segment directory."""
+
+    def __init__(self, path: str, info: dict):
+        self.path = path
+        self.info = info
+        self.embeddings = self._load("embeddings.npy")
+        self.state = self._load("state.npy")
+        self.type = self._load("type.npy")
+        self.recorded_day = self._load("recorded_day.npy")
+        self.value = self._load("value.npy")
+        self.id_offsets = self._load("id_offsets.npy")
+        ids_path = os.path.join(path, "ids.bin")
+        if os.path.getsize(ids_path):
+            self.ids = np.memmap(ids_path, dtype=np.uint8, mode="r")
+        else:
+            self.ids = np.zeros(0, dtype=np.uint8)
+        try:
+            self.sorted_ids = self._load("sorted_ids.npy")
+            self.id_order = self._load("id_order.npy")
+        except FileNotFoundError:
+            # Written before ids were stored sorted: sort them once in memory.
+            self.sorted_ids, self.id_order = _sorted_id_array(
+                [self.doc_id(row).encode("utf-8") for row in range(len(self))]
+            )
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return int(self.info["count"])
+
+    def doc_id(self, row: int) -> str:
+        start, end = int(self.id_offsets[row]), int(self.id_offsets[row + 1])
+        return bytes(self.ids[start:end]).decode("utf-8")
+
+    def meta(self, row: int) -> dict:
+        value = float(self.value[row])
+        return {
+            "state": self.info["states"][int(self.state[row])] if self.info["states"] else "",
+            "type": self.info["types"][int(self.type[row])] if self.info["types"] else "",
+            "recorded_day": int(self.recorded_day[row]),
+            "value": None if np.isnan(value) else value,
+        }
+
+    def lookup(self, doc_ids: list[str]) -> np.ndarray:
+        """Row numbers for ``doc_ids`` (-1 when absent) by binary search over the sorted ids."""
+        return _search(self.sorted_ids, doc_ids, self.id_order)
+
+    def nbytes(self) -> int:
+        return int(
+            self.embeddings.nbytes + self.state.nbytes + self.type.nbytes
+            + self.recorded_day.nbytes + self.value.nbytes + self.id_offsets.nbytes
+            + self.ids.nbytes + self.sorted_ids.nbytes + self.id_order.nbytes
+        )
+
+
+def _search(sorted_ids: np.ndarray, doc_ids: list[str], order: np.ndarray | None = None) -> np.ndarray:
+    """Positions of ``doc_ids`` in ``sorted_ids`` (mapped through ``order``), -1 when absent."""
+    missing = np.full(len(doc_ids), -1, dtype=np.int64)
+    if not len(sorted_ids) or not doc_ids:
+        return missing
+    width = sorted_ids.dtype.itemsize
+    encoded = [doc_id.encode("utf-8") for doc_id in doc_ids]
+    # Longer ids cannot be stored here and would be truncated by the cast.
+    fits = np.array([len(raw) <= width for raw in encoded], dtype=bool)
+    keys = np.array([raw if len(raw) <= width else b"" for raw in encoded], dtype=sorted_ids.dtype)
+    at = np.minimum(np.searchsorted(sorted_ids, keys), len(sorted_ids) - 1)
+    found = fits & (sorted_ids[at] == keys)
+    rows = order[at] if order is not None else at
+    return np.where(found, rows, missing)
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of one snapshot version: a base segment
+    and, after incremental publishes, a delta segment whose rows shadow the
+    base plus tombstones for deleted ids. Rows are numbered across both
+    segments (base first); ``vector(row)`` reads either one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _MANIFEST_FILE), encoding="utf-8") as handle:
+            self.manifest = json.load(handle)
+        self.version: int = self.manifest["version"]
+        self.base = _Segment(path, self.manifest)
+        self.embeddings = self.base.embeddings
+        self.state = self.base.state
+        self.type = self.base.type
+        self.recorded_day = self.base.recorded_day
+        self.value = self.base.value
+        self.delta: _Segment | None = None
+        self.tombstones = np.zeros(0, dtype="S1")
+        delta = self.manifest.get("delta")
+        if delta is not None:
+            delta_path = os.path.join(path, _DELTA_DIR)
+            self.delta = _Segment(delta_path, delta)
+            self.tombstones = np.load(os.path.join(delta_path, "tombstones.npy"), mmap_mode="r")
+        self._state_codes = {name: code for code, name in enumerate(self.manifest["states"])}
+        self._type_codes = {name: code for code, name in enumerate(self.manifest["types"])}
+
+    def __len__(self) -> int:
+        return int(self.manifest.get("live", self.manifest["count"]))
+
+    @property
+    def dim(self) -> int:
+        return int(self.manifest.get("dim") or 0)
+
+    def doc_id(self, row: int) -> str:
+        if row < len(self.base):
+            return self.base.doc_id(row)
+        return self.delta.doc_id(row - len(self.base))
+
+    def vector(self, row: int) -> np.ndarray:
+        if row < len(self.base):
+            return self.embeddings[row]
+        return self.delta.embeddings[row - len(self.base)]
+
+    def rows(self, doc_ids: list[str]) -> list[int]:
+        """Row numbers for ``doc_ids``; -1 for ids not in this version."""
+        rows = self.base.lookup(doc_ids)
+        if self.delta is not None:
+            rows[_search(self.tombstones, doc_ids) >= 0] = -1
+            delta_rows = self.delta.lookup(doc_ids)
+            shadowed = delta_rows >= 0
+            rows[shadowed] = delta_rows[shadowed] + len(self.base)
+        return rows.tolist()
+
+    def state_code(self, state: str) -> int | None:
+        return self._state_codes.get(normalize_state_code(state) or "")
+
+    def type_code(self, doc_type: str) -> int | None:
+        return self._type_codes.get(doc_type.lower())
+
+    def nbytes(self) -> int:
+        total = self.base.nbytes()
+        if self.delta is not None:
+            total += self.delta.nbytes() + self.tombstones.nbytes
+        return total
+
+
+class SnapshotReader:
+    """
+    Tracks the CURRENT snapshot for one process. The pointer file is checked
+    at most every ``check_interval`` seconds and a new version is opened and
+    swapped in with a single reference assignment.
+    """
+
+    def __init__(self, base_dir: str, check_interval: float = 1.0):
+        self.base_dir = base_dir
+        self.check_interval = check_interval
+        self._snapshot: Snapshot | None = None
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    def current(self) -> Snapshot | None:
+        now = time.monotonic()
+        if self._is_fresh(now):
+            return self._snapshot
+        with self._lock:
+            if self._is_fresh(now):
+                return self._snapshot
+            self._checked_at = now
+            version = read_current_version(self.base_dir)
+            snapshot = self._snapshot
+            if version is not None and (snapshot is None or snapshot.version != version):
+                try:
+                    self._snapshot = Snapshot(os.path.join(self.base_dir, f"v{version}"))
+                    self.swaps += 1
+                except (FileNotFoundError, ValueError, KeyError):
+                    # Pointer raced with garbage collection; retry on next check.
+                    self._checked_at = None
+            return self._snapshot
+
+    def _is_fresh(self, now: float) -> bool:
+        checked_at = self._checked_at
+        return checked_at is not None and now - checked_at < self.check_interval
+
+    def refresh(self) -> Snapshot | None:
+        self._checked_at = None
+        return self.current()
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "dir": self.base_dir,
+            "version": snapshot.version if snapshot else None,
+            "documents": len(snapshot) if snapshot else 0,
+            "mapped_bytes": snapshot.nbytes() if snapshot else 0,
+            "swaps": self.swaps,
+        }
@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+
+
+def watermark_key(state: str, metric: str) -> str:
+    return f"{state}:{metric}"
+
+
+class ExpressWatermarks:
+    """
+    Per state/metric high-water marks for incremental Express pulls: the
+    newest ``recorded_at`` ingested, the stations that reported at it, and
+    the validators (ETag, Last-Modified)
+    of the last response. Stored as one small JSON file that is rewritten
+    atomically, so a crash mid-save leaves the previous marks intact.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._marks: dict[str, dict] = {}
+        self.full_refresh_at: float | None = None
+        try:
+            with open(path, encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return
+        self._marks = dict(payload.get("marks") or {})
+        self.full_refresh_at = payload.get("full_refresh_at")
+
+    def get(self, state: str, metric: str) -> dict | None:
+        with self._lock:
+            mark = self._marks.get(watermark_key(state, metric))
+            return dict(mark) if mark else None
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {key: dict(mark) for key, mark in self._marks.items()}
+
+    def update(self, marks: Mapping[str, dict], full_refresh: bool = False) -> None:
+        """Merge ``marks`` (only ever moving ``recorded_at`` forward) and save."""
+        with self._lock:
+            for key, mark in marks.items():
+                current = self._marks.get(key) or {}
+                merged = {**current, **{k: v for k, v in mark.items() if v}}
+                if str(current.get("recorded_at") or "") > str(mark.get("recorded_at") or ""):
+                    merged["recorded_at"] = current["recorded_at"]
+                    merged["stations"] = current.get("stations") or []
+                self._marks[key] = merged
+            if full_refresh:
+                self.full_refresh_at = time.time()
+            self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"full_refresh_at": self.full_refresh_at, "marks": self._marks}, handle)
+        os.replace(tmp_path, self.path)
+
+    def full_refresh_due(self, interval_seconds: float) -> bool:
+        full_refresh_at = self.full_refresh_at
+        return full_refresh_at is None or time.time() - full_refresh_at >= interval_seconds
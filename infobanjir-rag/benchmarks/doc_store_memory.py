@@ -0,0 +1,97 @@
+"""
+Compare resident memory of the document cache as dicts vs the column store.
+
+Builds a synthetic Chroma payload, turns it into the cache the way
+load_documents does, drops the payload and reports the bytes still held
+(tracemalloc), plus build time and a full scan of ``doc.get("state")``.
+
+    python -m benchmarks.doc_store_memory --docs 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app.doc_store import DocumentStore
+from app.rag_store import _build_rows, _to_cached_doc
+from benchmarks.embed_backends import sample_docs
+
+
+def make_payload(docs: list[dict]) -> dict:
+    # Copy the strings so the cache under test owns them, as it would when
+    # they come out of a Chroma payload that is then released.
+    ids, texts, metas = _build_rows(docs)
+    return {
+        "ids": ["".join(doc_id) for doc_id in ids],
+        "documents": ["".join(text) for text in texts],
+        "metadatas": [
+            {key: "".join(value) if isinstance(value, str) else value for key, value in meta.items()}
+            for meta in metas
+        ],
+    }
+
+
+def as_dicts(payload: dict) -> list[dict]:
+    """The previous cache layout: one dict per row with a full copy of its metadata."""
+    docs = []
+    for doc_id, text, meta in zip(payload["ids"], payload["documents"], payload["metadatas"]):
+        doc = dict(meta or {})
+        doc["id"] = doc_id
+        doc["text"] = text
+        if doc.get("state"):
+            doc["state"] = str(doc["state"]).upper()
+        docs.append(doc)
+    return docs
+
+
+def as_store(payload: dict) -> DocumentStore:
+    return DocumentStore.from_rows(
+        _to_cached_doc(doc_id, text, meta)
+        for doc_id, text, meta in zip(payload["ids"], payload["documents"], payload["metadatas"])
+    )
+
+
+def measure(docs: list[dict], build) -> tuple[int, float, float]:
+    payload = make_payload(docs)
+    start = time.perf_counter()
+    build(payload)
+    build_seconds = time.perf_counter() - start
+    del payload
+
+    # Measured separately: tracing every allocation distorts the timing.
+    gc.collect()
+    tracemalloc.start()
+    payload = make_payload(docs)
+    cache = build(payload)
+    del payload
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    states = {doc.get("state") for doc in cache}
+    scan_seconds = time.perf_counter() - start
+    assert states
+    return retained, build_seconds, scan_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    docs = sample_docs(args.docs)
+    print(f"{'cache':<14}{'retained MB':>12}{'bytes/doc':>11}{'build s':>9}{'scan s':>8}")
+    results = {}
+    for name, build in (("dicts", as_dicts), ("column store", as_store)):
+        retained, build_seconds, scan_seconds = measure(docs, build)
+        results[name] = retained
+        print(
+            f"{name:<14}{retained / 1e6:>12.1f}{retained / len(docs):>11.0f}"
+            f"{build_seconds:>9.2f}{scan_seconds:>8.3f}"
+        )
+    print(f"reduction: {results['dicts'] / max(1, results['column store']):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare embedding backends against the torch baseline.
+
+Reports encode throughput per backend and how closely each backend's vectors
+agree with torch (per-row cosine similarity and top-k neighbour overlap), so
+a quantized backend can be checked before setting EMBED_BACKEND.
+
+    python -m benchmarks.embed_backends --texts 2000 --backends torch onnx onnx-int8
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.embeddings import load_embedder
+from app.ingest import build_docs_from_rain, build_docs_from_water
+from app.state_codes import CANONICAL_STATE_CODES
+
+
+def sample_docs(count: int, seed: int = 7) -> list[dict]:
+    """Synthetic rainfall/water-level documents shaped like the real ingest output."""
+    rng = random.Random(seed)
+    rain_items = []
+    water_items = []
+    for i in range(count // 2 + 1):
+        state = rng.choice(CANONICAL_STATE_CODES)
+        recorded_at = f"2026-02-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"
+        rain_items.append(
+            {
+                "station_id": f"R{i}",
+                "station_name": f"Station {i}",
+                "district": f"District {i % 40}",
+                "state": state,
+                "recorded_at": recorded_at,
+                "rain_mm": round(rng.uniform(0, 120), 1),
+            }
+        )
+        water_items.append(
+            {
+                "station_id": f"W{i}",
+                "station_name": f"River Station {i}",
+                "district": f"District {i % 40}",
+                "state": state,
+                "recorded_at": recorded_at,
+                "river_level_m": round(rng.uniform(0, 15), 2),
+            }
+        )
+    docs = build_docs_from_rain(rain_items) + build_docs_from_water(water_items)
+    return docs[:count]
+
+
+def sample_texts(count: int, seed: int = 7) -> list[str]:
+    return [doc["text"] for doc in sample_docs(count, seed)]
+
+
+def encode(backend: str, texts: list[str], batch_size: int) -> tuple[np.ndarray, float]:
+    model = load_embedder(backend)
+    model.encode(texts[:batch_size], normalize_embeddings=True)  # warm-up
+    start = time.perf_counter()
+    vectors = model.encode(texts, normalize_embeddings=True, batch_size=batch_size)
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - start
+
+
+def topk_overlap(baseline: np.ndarray, candidate: np.ndarray, queries: int, k: int) -> float:
+    overlaps = []
+    for row in range(min(queries, len(baseline))):
+        expected = set(np.argsort(-(baseline @ baseline[row]))[:k])
+        actual = set(np.argsort(-(candidate @ candidate[row]))[:k])
+        overlaps.append(len(expected & actual) / k)
+    return float(np.mean(overlaps)) if overlaps else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--queries", type=int, default=100, help="rows used for top-k agreement")
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    texts = sample_texts(args.texts)
+    baseline, baseline_seconds = encode("torch", texts, args.batch_size)
+
+    print(f"{'backend':<12}{'texts/s':>10}{'speedup':>9}{'cos mean':>10}{'cos min':>9}{'top-k':>8}")
+    for backend in args.backends:
+        if backend == "torch":
+            vectors, seconds = baseline, baseline_seconds
+        else:
+            vectors, seconds = encode(backend, texts, args.batch_size)
+        cosine = np.sum(baseline * vectors, axis=1)
+        print(
+            f"{backend:<12}{len(texts) / seconds:>10.1f}{baseline_seconds / seconds:>8.2f}x"
+            f"{cosine.mean():>10.4f}{cosine.min():>9.4f}"
+            f"{topk_overlap(baseline, vectors, args.queries, args.k):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from app.answer_cache import AnswerCache, SemanticAnswerCache, answer_key
+
+
+def test_answer_key_depends_on_context_model_and_prompt_version():
+    base = answer_key("Flood risk?", "ctx", "ollama:mistral", "1", "2026-02-10")
+    assert base == answer_key("flood risk", "ctx", "ollama:mistral", "1", "2026-02-10")
+    assert base != answer_key("flood risk", "other ctx", "ollama:mistral", "1", "2026-02-10")
+    assert base != answer_key("flood risk", "ctx", "ollama:llama3", "1", "2026-02-10")
+    assert base != answer_key("flood risk", "ctx", "ollama:mistral", "2", "2026-02-10")
+
+
+def test_cache_evicts_by_size_and_ttl(monkeypatch):
+    now = {"t": 100.0}
+    monkeypatch.setattr("app.answer_cache.time.monotonic", lambda: now["t"])
+    cache = AnswerCache(max_size=2, ttl_seconds=10)
+    cache.put("a", "A", generation=1, llm_ms=500.0)
+    cache.put("b", "B", generation=1, llm_ms=500.0)
+    cache.put("c", "C", generation=1, llm_ms=500.0)
+    assert cache.get("a", 1) is None
+    assert cache.get("c", 1) == "C"
+
+    now["t"] += 11
+    assert cache.get("b", 1) is None
+    stats = cache.stats()
+    assert stats["expired"] == 1 and stats["saved_llm_ms"] == 500.0
+
+
+def test_cache_drops_entries_from_older_generations():
+    cache = AnswerCache(max_size=8, ttl_seconds=0)
+    cache.put("a", "A", generation=1, llm_ms=1.0)
+    assert cache.get("a", 2) is None
+    # A slow request answered from generation 1 must not repopulate the cache.
+    cache.put("a", "stale", generation=1, llm_ms=1.0)
+    assert cache.get("a", 2) is None
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_semantic_cache_requires_identical_filters_and_threshold():
+    cache = SemanticAnswerCache(max_size=8, ttl_seconds=0, threshold=0.9)
+    filters = ("KTN", None, None, True)
+    cache.put(filters, "Flood risk in Kelantan?", [1.0, 0.0], "High", [{"text": "t"}], generation=1, llm_ms=800.0)
+
+    answer, hits, similarity = cache.get(filters, [0.95, 0.1], generation=1)
+    assert answer == "High" and hits == [{"text": "t"}] and similarity > 0.9
+    assert cache.get(("SEL", None, None, True), [1.0, 0.0], generation=1) is None
+    assert cache.get(filters, [0.5, 0.5], generation=1) is None
+    assert cache.get(filters, [1.0, 0.0], generation=2) is None
+    assert cache.stats()["saved_llm_ms"] == 800.0
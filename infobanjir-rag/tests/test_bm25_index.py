@@ -0,0 +1,73 @@
+from app.bm25_index import Bm25Index, tokenize
+
+
+DOCS = [
+    {"text": "Rainfall reading at Station A in Klang, SEL with 12.5 mm."},
+    {"text": "Water level reading at Station B in Kota Bharu, KTN with 3.1 m."},
+    {"text": "Flood risk in KTN is assessed as High based on latest readings."},
+]
+
+
+def test_tokenize_drops_stop_words_and_punctuation():
+    assert tokenize("What is the flood risk in Kelantan?") == ["flood", "risk", "kelantan"]
+    assert "12.5" in tokenize(DOCS[0]["text"])
+
+
+def test_search_ranks_by_bm25_and_ignores_stop_words():
+    index = Bm25Index.build(DOCS)
+    assert [pos for _, pos in index.search("flood risk in KTN", top_k=3)][0] == 2
+    assert index.search("in the", top_k=3) == []
+
+
+def test_search_respects_candidate_positions():
+    index = Bm25Index.build(DOCS)
+    hits = index.search("KTN", top_k=3, candidates=[0, 2])
+    assert [pos for _, pos in hits] == [2]
+    assert index.search("KTN", top_k=3, candidates=[]) == []
+
+
+def test_updated_is_copy_on_write():
+    index = Bm25Index.build(DOCS)
+    docs = DOCS + [{"text": "Rainfall reading at Station C in Kangar, PLS with 4 mm."}]
+    changes = [(1, DOCS[1]["text"], "Water level reading at Station B, PHG."), (3, None, docs[3]["text"])]
+    successor = index.updated(changes, docs)
+
+    assert [pos for _, pos in successor.search("kangar", top_k=1)] == [3]
+    assert successor.search("bharu", top_k=3) == []
+    assert [pos for _, pos in index.search("bharu", top_k=3)] == [1]
+    assert index.search("kangar", top_k=1) == []
+
+
+def _exhaustive(index, query, top_k):
+    import math
+
+    n_docs = len(index.doc_lengths)
+    avg_length = index.total_length / n_docs
+    scores = {}
+    for term in set(tokenize(query)):
+        posting = index.postings.get(term, {})
+        idf = math.log(1.0 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+        for pos, tf in posting.items():
+            norm = 1.0 - index.b + index.b * index.doc_lengths[pos] / avg_length
+            scores[pos] = scores.get(pos, 0.0) + idf * (tf * (index.k1 + 1.0)) / (tf + index.k1 * norm)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+    return [pos for pos, _ in ranked]
+
+
+def test_search_prunes_common_terms_without_changing_results():
+    states = ["Selangor", "Johor", "Kelantan", "Perlis", "Pahang", "Kedah", "Perak", "Sabah"]
+    docs = [
+        {"text": f"Rainfall reading at Station R{i} in {states[i % 8]} with {i % 37}.5 mm."}
+        if i % 2 else
+        {"text": f"Water level reading at Station W{i} in {states[i % 8]} with {i % 5}.1 m."}
+        for i in range(800)
+    ]
+    index = Bm25Index.build(docs).updated([(3, docs[3]["text"], "Rainfall reading in Selangor Selangor.")], docs)
+
+    for query in ("rainfall reading selangor", "water level kelantan", "station r11 johor", "reading"):
+        assert [pos for _, pos in index.search(query, top_k=10)] == _exhaustive(index, query, 10)
+    stats = {}
+    index.search("rainfall reading selangor", top_k=10, stats=stats)
+    matching = sum(len(index.postings[term]) for term in ("rainfall", "reading", "selangor"))
+    # Only the rare term's postings plus a few accumulators are scored, not every reading.
+    assert stats["scored"] < matching / 3
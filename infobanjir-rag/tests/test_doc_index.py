@@ -0,0 +1,61 @@
+from app.doc_index import DocumentIndex
+
+
+DOCS = [
+    {"state": "SEL", "type": "rainfall", "recorded_date": "2026-02-10", "text": "a"},
+    {"state": "KDH", "type": "rainfall", "recorded_date": "2026-02-11", "text": "b"},
+    {"state": "KED", "type": "water_level", "recorded_date": "2026-02-12", "text": "c"},
+    {"state": "SEL", "type": "flood_risk", "recorded_date": "2026-02-12", "text": "d"},
+    {"state": "SEL", "type": "rainfall", "text": "e"},
+]
+
+
+def test_count_uses_canonical_state_and_type():
+    index = DocumentIndex(DOCS)
+    assert index.count() == 5
+    assert index.count(state="KED") == 2
+    assert index.count(state="kdh") == 2
+    assert index.count(state="SEL", doc_type="Rainfall") == 2
+    assert index.count(recorded_date="2026-02-12") == 2
+    assert index.count(state="PLS") == 0
+
+
+def test_positions_apply_date_range():
+    index = DocumentIndex(DOCS)
+    assert index.positions(date_from="2026-02-11", date_to="2026-02-12") == [1, 2, 3]
+    assert index.positions(state="SEL", date_from="2026-02-11") == [3]
+    # Rows without a date never satisfy a range filter.
+    assert index.positions(state="SEL", date_to="2026-02-10") == [0]
+    assert index.count(state="SEL", date_to="2026-02-12") == 2
+
+
+def test_filter_returns_documents_in_cache_order():
+    index = DocumentIndex(DOCS)
+    hits = index.filter(state="KED")
+    assert [doc["text"] for doc in hits] == ["b", "c"]
+    assert index.filter(state="SEL", doc_type="water_level") == []
+
+
+def test_updated_reindexes_only_changed_rows():
+    index = DocumentIndex(DOCS)
+    docs = [dict(doc) for doc in DOCS]
+    docs[1] = {"state": "SEL", "type": "water_level", "recorded_date": "2026-02-09", "text": "b2"}
+    docs[4] = {**docs[4], "text": "e2"}
+    docs.append({"state": "KED", "type": "rainfall", "recorded_date": "2026-02-11", "text": "f"})
+    successor = index.updated([1, 4, 5], docs)
+    rebuilt = DocumentIndex(docs)
+
+    for filters in (
+        {},
+        {"state": "KDH"},
+        {"state": "SEL"},
+        {"doc_type": "rainfall"},
+        {"recorded_date": "2026-02-11"},
+        {"date_from": "2026-02-09", "date_to": "2026-02-11"},
+        {"state": "SEL", "date_to": "2026-02-10"},
+    ):
+        assert successor.positions(**filters) == rebuilt.positions(**filters)
+        assert successor.count(**filters) == rebuilt.count(**filters)
+    # The previous generation is untouched.
+    assert index.positions(state="KDH") == [1, 2]
+    assert index.count(state="SEL") == 3
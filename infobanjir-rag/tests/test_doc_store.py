@@ -0,0 +1,47 @@
+import math
+
+from app.doc_store import DocumentStore
+
+
+ROWS = [
+    {
+        "id": "rain-1",
+        "text": "Rainfall at Stesen Kangar: 12.5 mm.",
+        "title": "Stesen Kangar",
+        "source": "infobanjir",
+        "type": "rainfall",
+        "state": "PLS",
+        "recorded_at": "2026-02-10T08:00:00Z",
+        "recorded_date": "2026-02-10",
+        "recorded_day": 739657,
+        "recorded_epoch": 1770710400.0,
+        "value": 12.5,
+        "content_hash": "abc",
+    },
+    {"id": "water-1", "text": "Paras air Sungai Golok ✓", "state": "KTN", "recorded_date": "10/02/2026"},
+]
+
+
+def test_rows_round_trip_through_columns():
+    store = DocumentStore.from_rows(ROWS)
+    assert len(store) == 2
+    assert dict(store[0]) == ROWS[0]
+    assert dict(store[1]) == ROWS[1]
+    assert store[1].get("value") is None
+    assert store[-1]["text"].endswith("✓")
+    assert store.distinct("state") == {"PLS", "KTN"}
+
+
+def test_replaced_is_copy_on_write():
+    store = DocumentStore.from_rows(ROWS)
+    updated = store.replaced(
+        {0: {"id": "rain-1", "text": "Rainfall at Stesen Kangar: 0 mm.", "value": 0}},
+        [{"id": "rain-2", "text": "new", "value": math.nan}],
+    )
+    assert store[0]["value"] == 12.5
+    assert updated[0]["text"] == "Rainfall at Stesen Kangar: 0 mm."
+    assert updated[0]["value"] == 0.0 and "state" not in updated[0]
+    assert updated[1]["text"] == ROWS[1]["text"]
+    assert updated.ids() == ["rain-1", "water-1", "rain-2"]
+    assert updated.position("rain-2") == 2 and store.position("rain-2") is None
+    assert updated.position("water-1") == 1
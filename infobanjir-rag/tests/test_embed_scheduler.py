@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from app.embed_scheduler import EmbeddingBatcher
+
+
+def test_concurrent_submits_share_one_encode_call():
+    calls = []
+    release = threading.Event()
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(encode, max_batch_size=16, max_wait_seconds=0.2)
+    results = {}
+
+    def worker(text):
+        release.wait()
+        results[text] = batcher.submit([text])
+
+    threads = [threading.Thread(target=worker, args=(text,)) for text in ("a", "bb", "ccc")]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == {"a": [[1.0]], "bb": [[2.0]], "ccc": [[3.0]]}
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["a", "bb", "ccc"]
+    assert batcher.stats()["max_batch_size_seen"] == 3
+
+
+def test_large_requests_are_split_by_max_batch_size():
+    calls = []
+
+    def encode(texts):
+        calls.append(len(texts))
+        return [[float(i)] for i, _ in enumerate(texts)]
+
+    batcher = EmbeddingBatcher(encode, max_batch_size=2, max_wait_seconds=0.0)
+
+    vectors = batcher.submit(["a", "b", "c", "d", "e"])
+
+    assert len(vectors) == 5
+    assert max(calls) <= 2
+    assert sum(calls) == 5
+
+
+def test_encode_errors_reach_the_caller():
+    def encode(texts):
+        raise ValueError("model failed")
+
+    batcher = EmbeddingBatcher(encode, max_batch_size=4, max_wait_seconds=0.0)
+
+    with pytest.raises(ValueError, match="model failed"):
+        batcher.submit(["a"])
@@ -0,0 +1,45 @@
+import app.rag_store as store
+from app.embedding_cache import EmbeddingCache, content_hash
+
+
+def test_content_hash_depends_on_model_and_text():
+    assert content_hash("a", "m1") == content_hash("a", "m1")
+    assert content_hash("a", "m1") != content_hash("b", "m1")
+    assert content_hash("a", "m1") != content_hash("a", "m2")
+
+
+def test_cache_returns_only_matching_hashes(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    cache.put_many(["d1", "d2"], ["h1", "h2"], [[0.5, 0.25], [1.0, 0.0]])
+
+    found = cache.get_many(["d1", "d2", "d3"], ["h1", "changed", "h3"])
+
+    assert found == {"d1": [0.5, 0.25]}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_prune_drops_ids_not_kept(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    cache.put_many(["d1", "d2"], ["h1", "h2"], [[1.0], [2.0]])
+
+    assert cache.prune({"d2"}) == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_embed_documents_only_embeds_new_or_changed_texts(monkeypatch, tmp_path):
+    embedded = []
+
+    def fake_embed_texts(texts):
+        embedded.append(list(texts))
+        return [[float(len(text)), 0.0] for text in texts]
+
+    monkeypatch.setattr(store, "EMBED_CACHE_ENABLED", True)
+    monkeypatch.setattr(store, "_EMBEDDING_CACHE", EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(store, "embed_texts", fake_embed_texts)
+
+    store._embed_documents(["a", "b"], ["one", "two"])
+    vectors = store._embed_documents(["a", "b", "c"], ["one", "two!", "three"])
+
+    assert embedded == [["one", "two"], ["two!", "three"]]
+    assert vectors == [[3.0, 0.0], [4.0, 0.0], [5.0, 0.0]]
@@ -0,0 +1,70 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import app.embeddings as embeddings
+from app.lru_cache import LruCache
+
+
+def test_embed_query_reuses_vectors_for_normalized_questions(monkeypatch):
+    calls = []
+
+    def fake_embed_texts(texts):
+        calls.append(list(texts))
+        return [[0.1, 0.2]]
+
+    monkeypatch.setattr(embeddings, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(embeddings, "_QUERY_EMBEDDINGS", LruCache(8))
+
+    first = embeddings.embed_query("Flood risk in Kelantan?")
+    second = embeddings.embed_query("  flood risk   in KELANTAN ")
+
+    assert first == second == [0.1, 0.2]
+    assert calls == [["Flood risk in Kelantan?"]]
+    stats = embeddings.get_query_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LruCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_load_embedder_rejects_unknown_backend(monkeypatch):
+    # None in sys.modules makes the import fail, so the name must be checked first.
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    with pytest.raises(RuntimeError, match="Unsupported embedding backend"):
+        embeddings.load_embedder("tensorrt")
+
+
+def test_onnx_int8_backend_loads_quantized_file(monkeypatch):
+    created = {}
+
+    def fake_sentence_transformer(name, **kwargs):
+        created["name"] = name
+        created["kwargs"] = kwargs
+        return object()
+
+    monkeypatch.setitem(
+        sys.modules,
+        "sentence_transformers",
+        SimpleNamespace(SentenceTransformer=fake_sentence_transformer),
+    )
+    monkeypatch.setattr(embeddings, "EMBED_ONNX_INT8_FILE", "onnx/model_qint8_avx512.onnx")
+
+    embeddings.load_embedder("onnx-int8")
+
+    assert created["kwargs"] == {
+        "backend": "onnx",
+        "model_kwargs": {"file_name": "onnx/model_qint8_avx512.onnx"},
+    }
+    assert embeddings.embedding_model_id("onnx-int8").endswith(":onnx-int8")
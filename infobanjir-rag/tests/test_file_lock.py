@@ -0,0 +1,54 @@
+import multiprocessing
+import time
+
+import pytest
+
+from app.file_lock import ReadWriteFileLock
+
+
+def _hold_exclusive(path, ready, release):
+    lock = ReadWriteFileLock(path)
+    with lock.exclusive():
+        ready.set()
+        release.wait(10)
+
+
+def test_shared_holders_coexist_and_exclusive_waits(tmp_path):
+    lock = ReadWriteFileLock(str(tmp_path / "x.lock"))
+    events = []
+    with lock.shared():
+        # A second reader with its own descriptor is not blocked by the first.
+        with ReadWriteFileLock(lock.path).shared(timeout=0.5):
+            events.append("second reader")
+        with pytest.raises(TimeoutError):
+            with ReadWriteFileLock(lock.path).exclusive(timeout=0.05):
+                pass
+    with lock.exclusive(timeout=0.5):
+        # Reentrant on the same thread.
+        with lock.shared():
+            events.append("nested")
+    assert events == ["second reader", "nested"]
+    stats = lock.stats()
+    assert stats["shared"]["acquired"] == 1
+    assert stats["exclusive"]["acquired"] == 1
+    assert stats["exclusive"]["held"] == 0
+
+
+def test_lock_is_released_when_the_holder_process_dies(tmp_path):
+    path = str(tmp_path / "x.lock")
+    ctx = multiprocessing.get_context("fork")
+    ready, release = ctx.Event(), ctx.Event()
+    holder = ctx.Process(target=_hold_exclusive, args=(path, ready, release))
+    holder.start()
+    assert ready.wait(10)
+    lock = ReadWriteFileLock(path)
+    with pytest.raises(TimeoutError):
+        with lock.exclusive(timeout=0.05):
+            pass
+    holder.kill()
+    holder.join()
+    started = time.monotonic()
+    with lock.exclusive(timeout=5):
+        pass
+    assert time.monotonic() - started < 1
+    assert lock.stats()["exclusive"]["timeouts"] == 1
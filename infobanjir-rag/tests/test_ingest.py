@@ -0,0 +1,233 @@
+import json
+import threading
+
+import httpx
+
+import app.ingest as ingest
+from app.state_codes import CANONICAL_STATE_CODES, to_upstream_state_code
+
+
+def _use_transport(monkeypatch, handler):
+    monkeypatch.setattr(ingest, "EXPRESS_BASE_URL", "http://express.test")
+    monkeypatch.setattr(ingest, "_HTTP_CLIENT", httpx.Client(transport=httpx.MockTransport(handler)))
+
+
+def _item(state: str, recorded_at: str = "2026-02-10T08:00:00Z", **values) -> dict:
+    return {"station_id": f"S-{state}", "station_name": f"Station {state}", "state": state, "recorded_at": recorded_at, **values}
+
+
+def test_collect_fans_out_and_keeps_partial_results(monkeypatch):
+    failing = to_upstream_state_code("PLS")
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state = request.url.params["state"]
+        seen.append((request.url.path, state))
+        if state == failing and request.url.path.endswith("water_level"):
+            return httpx.Response(503)
+        if request.url.path.endswith("rain"):
+            return httpx.Response(200, json={"items": [_item(state, rain_mm=5.0)]})
+        return httpx.Response(200, json={"items": [_item(state, river_level_m=1.5)]})
+
+    _use_transport(monkeypatch, handler)
+    pull = ingest.collect_from_express(limit=10)
+
+    assert len(seen) == 2 * len(CANONICAL_STATE_CODES)
+    assert pull.failed_states == ["PLS"]
+    assert len(pull.requests) == 2 * len(CANONICAL_STATE_CODES)
+    assert all("ms" in entry for entry in pull.requests)
+    # Readings that did arrive are kept; the failed state gets no risk summary.
+    assert [doc["type"] for doc in pull.docs if doc["state"] == "PLS"] == ["rainfall"]
+    healthy = len(CANONICAL_STATE_CODES) - 1
+    assert sum(doc["type"] == "flood_risk" for doc in pull.docs) == healthy
+    assert len(pull.docs) == pull.documents == 3 * healthy + 1
+
+
+def test_json_items_are_parsed_incrementally():
+    body = '{"count": 2, "items": [{"a": "x]"}, {"a": 2}], "next_cursor": "c2"}'
+    envelope = {}
+    chunks = (body[i:i + 5] for i in range(0, len(body), 5))
+    assert list(ingest._iter_json_items(chunks, envelope)) == [{"a": "x]"}, {"a": 2}]
+    assert envelope == {"count": 2, "next_cursor": "c2"}
+
+
+def test_only_the_top_level_items_array_is_streamed():
+    body = (
+        '{"meta": {"items": [1]}, "note": "\\"items\\": [", '
+        '"items": [{"a": 1}, {"a": 2.5}], "next_cursor": "c"}'
+    )
+    envelope = {}
+    chunks = (body[i:i + 3] for i in range(0, len(body), 3))
+    assert list(ingest._iter_json_items(chunks, envelope)) == [{"a": 1}, {"a": 2.5}]
+    assert envelope == {"meta": {"items": [1]}, "note": '"items": [', "next_cursor": "c"}
+
+
+def test_iter_express_follows_cursor_pages(monkeypatch):
+    pages = {
+        None: {"items": [_item("SEL", rain_mm=1.0), _item("SEL", rain_mm=2.0)], "next_cursor": "p2"},
+        "p2": {"items": [_item("SEL", rain_mm=3.0)], "next_cursor": "p3"},
+        "p3": {"items": [_item("SEL", rain_mm=4.0)]},
+    }
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        cursor = request.url.params.get("cursor")
+        requested.append((cursor, request.url.params["limit"]))
+        return httpx.Response(200, json=pages[cursor])
+
+    _use_transport(monkeypatch, handler)
+    monkeypatch.setattr(ingest, "EXPRESS_PAGE_SIZE", 2)
+    stats = {}
+    items = list(ingest.iter_express("/api/readings/latest/rain", {"state": "SEL", "limit": 3}, stats))
+    assert [item["rain_mm"] for item in items] == [1.0, 2.0, 3.0]
+    assert requested == [(None, "2"), ("p2", "1")]
+    assert stats["pages"] == 2
+
+
+def test_incremental_pull_uses_watermarks(monkeypatch, tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("rain"):
+            if request.headers.get("If-None-Match") == '"r1"':
+                return httpx.Response(304)
+            items = [_item("SEL", rain_mm=5.0)]
+            return httpx.Response(200, json={"items": items}, headers={"ETag": '"r1"'})
+        items = [_item("SEL", river_level_m=1.5)]
+        if "since" in request.url.params:
+            # Upstream ignores ``since``: the stale reading must be dropped locally.
+            items = [
+                _item("SEL", "2026-02-10T07:00:00Z", river_level_m=1.2),
+                _item("SEL", "2026-02-10T09:00:00Z", river_level_m=2.5),
+            ]
+        # A streamed body, as from a real connection, so downloaded bytes are counted.
+        return httpx.Response(200, stream=httpx.ByteStream(json.dumps({"items": items}).encode()))
+
+    _use_transport(monkeypatch, handler)
+    watermarks = ingest.ExpressWatermarks(str(tmp_path / "marks.json"))
+
+    first = ingest.ExpressPull()
+    docs = list(ingest.stream_from_express(state="SEL", limit=10, pull=first))
+    assert first.report()["mode"] == "full"
+    watermarks.update(first.watermarks, full_refresh=True)
+    assert watermarks.get("SEL", "rain")["etag"] == '"r1"'
+
+    reloaded = ingest.ExpressWatermarks(str(tmp_path / "marks.json"))
+    assert reloaded.get("SEL", "water_level")["recorded_at"] == "2026-02-10T08:00:00Z"
+    assert not reloaded.full_refresh_due(3600)
+
+    requests.clear()
+    second = ingest.ExpressPull()
+    new_docs = list(
+        ingest.stream_from_express(state="SEL", limit=10, pull=second, watermarks=reloaded, baseline=docs)
+    )
+    assert all(request.url.params["since"] == "2026-02-10T08:00:00Z" for request in requests)
+    report = second.report()
+    assert report["mode"] == "incremental"
+    assert report["not_modified"] == 1
+    assert report["rows_skipped"] == 1
+    assert report["bytes_downloaded"] > 0
+    assert [doc["type"] for doc in new_docs] == ["water_level", "flood_risk"]
+    # The risk summary still sees the stored rainfall reading.
+    assert "5.00 mm" in new_docs[-1]["text"]
+    reloaded.update(second.watermarks)
+    assert reloaded.get("SEL", "water_level")["recorded_at"] == "2026-02-10T09:00:00Z"
+    assert reloaded.get("SEL", "rain")["etag"] == '"r1"'
+
+
+def test_incremental_pull_without_new_readings_yields_nothing(monkeypatch, tmp_path):
+    _use_transport(monkeypatch, lambda request: httpx.Response(304))
+    watermarks = ingest.ExpressWatermarks(str(tmp_path / "marks.json"))
+    watermarks.update({"SEL:rain": {"recorded_at": "2026-02-10T08:00:00Z", "etag": '"r1"'}})
+    pull = ingest.ExpressPull()
+    baseline = ingest.build_docs_from_rain([_item("SEL", rain_mm=5.0)])
+    assert list(ingest.stream_from_express(state="SEL", pull=pull, watermarks=watermarks, baseline=baseline)) == []
+    assert pull.new_readings == 0 and pull.failed_states == []
+
+
+def test_repeated_incremental_cycles_yield_nothing_new(monkeypatch, tmp_path):
+    boundary = "2026-02-10T08:00:00Z"
+    readings = [_item("SEL", boundary, rain_mm=5.0)]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # Upstream ignores ``since`` and keeps returning the boundary readings.
+        if request.url.path.endswith("rain"):
+            return httpx.Response(200, json={"items": readings})
+        return httpx.Response(200, json={"items": []})
+
+    _use_transport(monkeypatch, handler)
+    watermarks = ingest.ExpressWatermarks(str(tmp_path / "marks.json"))
+    first = ingest.ExpressPull()
+    baseline = list(ingest.stream_from_express(state="SEL", pull=first))
+    watermarks.update(first.watermarks, full_refresh=True)
+
+    # A second station reports late at the same instant: it is new once.
+    readings.append({**_item("SEL", boundary, rain_mm=7.0), "station_id": "S-SEL-2"})
+    late = ingest.ExpressPull()
+    docs = list(ingest.stream_from_express(state="SEL", pull=late, watermarks=watermarks, baseline=baseline))
+    assert [doc["id"] for doc in docs if doc["type"] == "rainfall"] == [f"rain-S-SEL-2-{boundary}"]
+    watermarks.update(late.watermarks)
+    baseline += docs
+
+    for _ in range(2):
+        pull = ingest.ExpressPull()
+        assert list(ingest.stream_from_express(state="SEL", pull=pull, watermarks=watermarks, baseline=baseline)) == []
+        assert pull.new_readings == 0 and pull.rows_skipped == 2
+        watermarks.update(pull.watermarks)
+
+
+def test_incremental_risk_is_seeded_from_the_latest_window(monkeypatch, tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("rain"):
+            return httpx.Response(200, json={"items": [_item("SEL", "2026-02-10T10:00:00Z", rain_mm=2.0)]})
+        return httpx.Response(200, json={"items": []})
+
+    _use_transport(monkeypatch, handler)
+    watermarks = ingest.ExpressWatermarks(str(tmp_path / "marks.json"))
+    watermarks.update({"SEL:rain": {"recorded_at": "2026-02-10T09:00:00Z"}})
+    baseline = ingest.build_docs_from_rain([
+        _item("SEL", "2026-02-01T08:00:00Z", rain_mm=90.0),
+        _item("SEL", "2026-02-10T08:00:00Z", rain_mm=3.0),
+        _item("SEL", "2026-02-10T09:00:00Z", rain_mm=4.0),
+    ])
+    pull = ingest.ExpressPull()
+    docs = list(ingest.stream_from_express(state="SEL", limit=2, pull=pull, watermarks=watermarks, baseline=baseline))
+    # The new reading and the newest stored one fill the window; the old 90 mm peak is out.
+    assert "4.00 mm" in docs[-1]["text"]
+    assert "90.00" not in docs[-1]["text"]
+
+
+def test_stream_reports_unexpected_worker_errors(monkeypatch):
+    real_iter_express = ingest.iter_express
+
+    def flaky_iter_express(path, params, stats, headers=None):
+        if params["state"] == to_upstream_state_code("PLS"):
+            # Not a mapping: ``item.get`` raises AttributeError inside the worker.
+            yield 1
+            return
+        yield from real_iter_express(path, params, stats, headers=headers)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state = request.url.params["state"]
+        if request.url.path.endswith("rain"):
+            return httpx.Response(200, json={"items": [_item(state, rain_mm=5.0)]})
+        return httpx.Response(200, json={"items": [_item(state, river_level_m=1.5)]})
+
+    _use_transport(monkeypatch, handler)
+    monkeypatch.setattr(ingest, "iter_express", flaky_iter_express)
+    pull = ingest.ExpressPull()
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.setdefault("docs", list(ingest.stream_from_express(limit=10, pull=pull))),
+        daemon=True,
+    )
+    worker.start()
+    worker.join(5)
+
+    assert not worker.is_alive()
+    assert pull.failed_states == ["PLS"]
+    failed = [entry for entry in pull.requests if entry["state"] == "PLS"]
+    assert failed[0]["error"].startswith("AttributeError")
+    assert not any(doc["state"] == "PLS" for doc in result["docs"])
+    assert "PLS:rain" not in pull.watermarks
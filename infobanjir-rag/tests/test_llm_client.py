@@ -9,7 +9,7 @@ class FakeOllamaAdapter:
     created_with = None
     generate_called_with = None
 
-    def __init__(self, base_url, model, timeout, keep_alive, retries):
+    def __init__(self, base_url, model, timeout, keep_alive, retries, pool_size=None):
         FakeOllamaAdapter.created_with = {
             "base_url": base_url,
             "model": model,
@@ -149,3 +149,17 @@ def test_plan_query_rejects_invalid_planner_output(monkeypatch):
 
     with pytest.raises(ValidationError):
         llm_client.plan_query("Do something unsupported")
+
+
+def test_get_adapter_reuses_one_adapter_per_settings(monkeypatch):
+    from app import llm_client
+
+    monkeypatch.setattr(llm_client, "LLM_PROVIDER", "ollama")
+    monkeypatch.setattr(llm_client, "OLLAMA_BASE_URL", "http://registry-test")
+    monkeypatch.setattr(llm_client, "OllamaAdapter", FakeOllamaAdapter)
+
+    first = llm_client.get_adapter()
+    assert llm_client.get_adapter() is first
+
+    monkeypatch.setattr(llm_client, "OLLAMA_MODEL", "other-model")
+    assert llm_client.get_adapter() is not first
@@ -0,0 +1,285 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.answer_cache import AnswerCache, SemanticAnswerCache
+from app.llm_models import LlmResponse, LlmStreamChunk
+
+
+DOCS = [
+    {"id": "r1", "type": "flood_risk", "state": "KTN", "source": "derived_heuristic",
+     "text": "Flood risk in KTN is assessed as High.", "value": 70.0},
+    {"id": "w1", "type": "water_level", "state": "SEL", "source": "express",
+     "text": "Water level reading at Station A in Klang, SEL."},
+]
+
+
+def _patch_retrieval(monkeypatch):
+    semantic_calls = []
+
+    def fake_semantic_batch(query_embeddings, top_k, state=None, doc_type=None, **kwargs):
+        semantic_calls.append({"n": len(query_embeddings), "state": state, "doc_type": doc_type})
+        matches = [
+            doc for doc in DOCS
+            if (state is None or doc["state"] == state) and (doc_type is None or doc["type"] == doc_type)
+        ]
+        return [list(matches) for _ in query_embeddings]
+
+    monkeypatch.setattr(main, "RAG_USE_LLM", False)
+    monkeypatch.setattr(main, "is_embedder_ready", lambda: True)
+    monkeypatch.setattr(main, "load_documents", lambda: DOCS)
+    monkeypatch.setattr(main, "embed_query", lambda question: [1.0, 0.0])
+    monkeypatch.setattr(main, "embed_queries", lambda questions: [[1.0, 0.0] for _ in questions])
+    monkeypatch.setattr(main, "retrieve_semantic_batch", fake_semantic_batch)
+    monkeypatch.setattr(main, "retrieve_keyword", lambda *args, **kwargs: [])
+    monkeypatch.setattr(main, "_ANSWER_CACHE", AnswerCache(max_size=16, ttl_seconds=60))
+    monkeypatch.setattr(main, "_SEMANTIC_CACHE", SemanticAnswerCache(max_size=16, ttl_seconds=60, threshold=0.9))
+    return semantic_calls
+
+
+def test_rag_ask_returns_summary_and_citations(monkeypatch):
+    _patch_retrieval(monkeypatch)
+    client = TestClient(main.app)
+
+    response = client.post(
+        "/rag/ask",
+        json={"question": "Flood risk in Kelantan?"},
+        headers={"X-Correlation-ID": "abc"},
+    )
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["request_id"] == "abc"
+    assert "Kelantan (KTN)" in body["answer"]
+    assert body["citations"][0]["source"] == "derived_heuristic"
+
+
+def test_rag_ask_batch_groups_questions_sharing_filters(monkeypatch):
+    semantic_calls = _patch_retrieval(monkeypatch)
+    client = TestClient(main.app)
+
+    response = client.post(
+        "/rag/ask/batch",
+        json={"questions": [
+            "Flood risk in Kelantan?",
+            "Is there a flood warning in Kelantan",
+            "Water level in Selangor",
+        ]},
+    )
+
+    results = response.json()["results"]
+    assert response.status_code == 200
+    assert len(results) == 3
+    assert "Kelantan (KTN)" in results[0]["answer"]
+    assert results[2]["citations"][0]["snippet"].startswith("Water level reading at Station A")
+    assert {"n": 2, "state": "KTN", "doc_type": "flood_risk"} in semantic_calls
+    assert {"n": 1, "state": "SEL", "doc_type": None} in semantic_calls
+
+
+def test_rag_ask_batch_rejects_empty_question_list(monkeypatch):
+    _patch_retrieval(monkeypatch)
+    client = TestClient(main.app)
+
+    response = client.post("/rag/ask/batch", json={"questions": []})
+
+    assert response.status_code == 422
+
+
+def test_rag_ask_uses_keyword_only_until_embedder_is_ready(monkeypatch):
+    semantic_calls = _patch_retrieval(monkeypatch)
+    monkeypatch.setattr(main, "is_embedder_ready", lambda: False)
+    monkeypatch.setattr(main, "embed_query", lambda question: pytest.fail("embedder must not be used"))
+    monkeypatch.setattr(main, "retrieve_keyword", lambda *args, **kwargs: [DOCS[0]])
+    client = TestClient(main.app)
+
+    response = client.post("/rag/ask", json={"question": "Flood risk in Kelantan?"})
+
+    assert response.status_code == 200
+    assert semantic_calls == []
+    assert response.json()["citations"][0]["source"] == "derived_heuristic"
+
+
+def test_ready_reports_503_until_components_are_warm(monkeypatch):
+    monkeypatch.setattr(main, "is_embedder_ready", lambda: False)
+    monkeypatch.setattr(main, "is_collection_ready", lambda: True)
+    client = TestClient(main.app)
+
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["components"] == {"embedder": False, "vector_store": True}
+
+    monkeypatch.setattr(main, "is_embedder_ready", lambda: True)
+    assert client.get("/ready").status_code == 200
+
+
+def _sse_frames(body: str) -> list[tuple[str, dict]]:
+    frames = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+def test_rag_ask_stream_sends_citations_tokens_then_usage(monkeypatch):
+    _patch_retrieval(monkeypatch)
+    monkeypatch.setattr(main, "RAG_USE_LLM", True)
+
+    def fake_stream(question, context):
+        assert "Flood risk in KTN" in context
+        yield LlmStreamChunk(token="Risk ")
+        yield LlmStreamChunk(token="is high.")
+        yield LlmStreamChunk(done=True, final=LlmResponse(
+            response="Risk is high.", input_tokens=12, output_tokens=4,
+            provider_name="ollama", llm_model="mistral", response_latency=1.0,
+        ))
+
+    monkeypatch.setattr(main, "stream_llm", fake_stream)
+    client = TestClient(main.app)
+
+    response = client.post("/rag/ask/stream", json={"question": "Flood risk in Kelantan?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = _sse_frames(response.text)
+    assert [event for event, _ in frames] == ["citations", "token", "token", "usage"]
+    assert frames[0][1]["citations"][0]["source"] == "derived_heuristic"
+    assert "".join(data["text"] for event, data in frames if event == "token") == "Risk is high."
+    assert frames[-1][1]["input_tokens"] == 12 and frames[-1][1]["output_tokens"] == 4
+
+
+def test_rag_ask_stream_falls_back_when_llm_fails_before_first_token(monkeypatch):
+    _patch_retrieval(monkeypatch)
+    monkeypatch.setattr(main, "RAG_USE_LLM", True)
+
+    def failing_stream(question, context):
+        raise RuntimeError("ollama down")
+        yield
+
+    monkeypatch.setattr(main, "stream_llm", failing_stream)
+    client = TestClient(main.app)
+
+    frames = _sse_frames(client.post("/rag/ask/stream", json={"question": "Flood risk in Kelantan?"}).text)
+
+    assert [event for event, _ in frames] == ["citations", "token", "usage"]
+    assert frames[1][1]["text"].startswith("LLM unavailable; ")
+    assert frames[2][1]["streamed"] is False
+
+
+def test_rag_ask_reuses_cached_answer_until_generation_changes(monkeypatch):
+    _patch_retrieval(monkeypatch)
+    monkeypatch.setattr(main, "RAG_USE_LLM", True)
+    monkeypatch.setattr(main, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(main, "SEMANTIC_CACHE_ENABLED", False)
+    generation = {"number": 3}
+    monkeypatch.setattr(main, "get_cache_generation", lambda: generation["number"])
+    calls = []
+
+    def fake_call_llm(question, context):
+        calls.append(question)
+        return LlmResponse(
+            response=f"answer {len(calls)}", input_tokens=1, output_tokens=1,
+            provider_name="ollama", llm_model="mistral", response_latency=1.0,
+        )
+
+    monkeypatch.setattr(main, "call_llm", fake_call_llm)
+    client = TestClient(main.app)
+
+    first = client.post("/rag/ask", json={"question": "Flood risk in Kelantan?"}).json()
+    second = client.post("/rag/ask", json={"question": "  flood risk in KELANTAN "}).json()
+    assert first["answer"] == second["answer"] == "answer 1"
+    assert len(calls) == 1
+
+    generation["number"] = 4
+    third = client.post("/rag/ask", json={"question": "Flood risk in Kelantan?"}).json()
+    assert third["answer"] == "answer 2"
+    stats = main._ANSWER_CACHE.stats()
+    assert stats["hits"] == 1 and stats["invalidated"] == 1
+
+
+def test_rag_ask_serves_paraphrases_from_semantic_cache(monkeypatch):
+    semantic_calls = _patch_retrieval(monkeypatch)
+    monkeypatch.setattr(main, "RAG_USE_LLM", True)
+    monkeypatch.setattr(main, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(main, "get_cache_generation", lambda: 1)
+    vectors = {
+        "Flood risk in Kelantan?": [1.0, 0.0],
+        "Is Kelantan at risk of flooding now?": [0.98, 0.2],
+        "Flood risk in Selangor?": [0.98, 0.2],
+        "Water level in Kelantan?": [0.0, 1.0],
+    }
+    monkeypatch.setattr(main, "embed_query", lambda question: vectors[question])
+    calls = []
+
+    def fake_call_llm(question, context):
+        calls.append(question)
+        return LlmResponse(
+            response=f"answer for {question}", input_tokens=1, output_tokens=1,
+            provider_name="ollama", llm_model="mistral", response_latency=1.0,
+        )
+
+    monkeypatch.setattr(main, "call_llm", fake_call_llm)
+    client = TestClient(main.app)
+
+    first = client.post("/rag/ask", json={"question": "Flood risk in Kelantan?"}).json()
+    retrievals = len(semantic_calls)
+    paraphrase = client.post("/rag/ask", json={"question": "Is Kelantan at risk of flooding now?"}).json()
+
+    assert paraphrase["answer"] == first["answer"]
+    assert paraphrase["citations"] == first["citations"]
+    assert len(semantic_calls) == retrievals
+    assert calls == ["Flood risk in Kelantan?"]
+
+    # Similar wording but a different state, or a different question, is not reused.
+    client.post("/rag/ask", json={"question": "Flood risk in Selangor?"})
+    client.post("/rag/ask", json={"question": "Water level in Kelantan?"})
+    assert len(calls) == 3
+    assert main._SEMANTIC_CACHE.stats()["hits"] == 1
+
+
+def test_concurrent_identical_asks_share_one_generation(monkeypatch):
+    import threading
+
+    _patch_retrieval(monkeypatch)
+    monkeypatch.setattr(main, "RAG_USE_LLM", True)
+    monkeypatch.setattr(main, "_ASK_FLIGHTS", main.SingleFlight())
+    release = threading.Event()
+    calls = []
+
+    def slow_call_llm(question, context):
+        calls.append(question)
+        release.wait(5)
+        return LlmResponse(
+            response="shared answer", input_tokens=1, output_tokens=1,
+            provider_name="ollama", llm_model="mistral", response_latency=1.0,
+        )
+
+    monkeypatch.setattr(main, "call_llm", slow_call_llm)
+    client = TestClient(main.app)
+    responses = {}
+
+    def ask(request_id, question):
+        responses[request_id] = client.post(
+            "/rag/ask", json={"question": question}, headers={"X-Correlation-ID": request_id}
+        ).json()
+
+    threads = [
+        threading.Thread(target=ask, args=(f"req-{i}", "Flood risk in Kelantan?" if i % 2 else "flood risk in kelantan"))
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for _ in range(5000):
+        if main._ASK_FLIGHTS.stats()["coalesced"] == 3:
+            break
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert {body["answer"] for body in responses.values()} == {"shared answer"}
+    assert sorted(body["request_id"] for body in responses.values()) == [f"req-{i}" for i in range(4)]
+    assert main._ASK_FLIGHTS.stats()["max_waiters"] == 3
@@ -20,6 +20,11 @@ class FakeResponse:
         return self._payload
 
 
+def patch_post(monkeypatch, fake_post):
+    # The adapter posts through its pooled session.
+    monkeypatch.setattr(requests.Session, "post", lambda self, **kwargs: fake_post(**kwargs))
+
+
 def make_adapter(retries=2):
     return OllamaAdapter(
         base_url="http://localhost:11434",
@@ -59,7 +64,7 @@ def test_generate_calls_ollama_chat_and_maps_response(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     result = make_adapter().generate(make_prompt())
 
@@ -97,7 +102,7 @@ def test_generate_adds_json_format_only_when_requested(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     make_adapter().generate(make_prompt(), json_mode=True)
 
@@ -118,7 +123,7 @@ def test_generate_uses_configured_model_when_response_model_missing(monkeypatch)
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     result = make_adapter().generate(make_prompt())
 
@@ -147,7 +152,7 @@ def test_generate_retries_timeout_then_succeeds(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     result = make_adapter(retries=1).generate(make_prompt())
 
@@ -162,7 +167,7 @@ def test_generate_raises_timeout_after_retries_exhausted(monkeypatch):
         calls["count"] += 1
         raise requests.Timeout("timed out")
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     with pytest.raises(requests.Timeout):
         make_adapter(retries=2).generate(make_prompt())
@@ -192,7 +197,7 @@ def test_generate_retries_connection_error_then_succeeds(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     result = make_adapter(retries=1).generate(make_prompt())
 
@@ -222,7 +227,7 @@ def test_generate_retries_5xx_then_succeeds(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     result = make_adapter(retries=1).generate(make_prompt())
 
@@ -252,7 +257,7 @@ def test_generate_retries_429_then_succeeds(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     result = make_adapter(retries=1).generate(make_prompt())
 
@@ -267,7 +272,7 @@ def test_generate_does_not_retry_404(monkeypatch):
         calls["count"] += 1
         return FakeResponse(status_code=404)
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     with pytest.raises(requests.HTTPError):
         make_adapter(retries=2).generate(make_prompt())
@@ -286,7 +291,134 @@ def test_generate_raises_validation_error_for_invalid_ollama_shape(monkeypatch):
             }
         )
 
-    monkeypatch.setattr("app.llm_adapters.ollama.requests.post", fake_post)
+    patch_post(monkeypatch, fake_post)
 
     with pytest.raises(ValidationError):
         make_adapter(retries=0).generate(make_prompt())
+
+
+def test_adapter_reuses_pooled_connections():
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b'{"models": []}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    adapter = OllamaAdapter(
+        base_url=f"http://127.0.0.1:{server.server_port}",
+        model="llama3.2:3b",
+        timeout=5,
+        keep_alive="10m",
+        retries=0,
+    )
+    try:
+        assert all(adapter.check_ollama_health() for _ in range(3))
+        stats = adapter.connection_stats()
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 2
+    finally:
+        adapter.close()
+        server.shutdown()
+        server.server_close()
+
+
+class FakeStreamResponse(FakeResponse):
+    def __init__(self, lines, status_code=200):
+        super().__init__(status_code=status_code)
+        self._lines = lines
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def test_generate_stream_yields_tokens_then_usage(monkeypatch):
+    captured = {}
+
+    def fake_post(url, json, timeout, stream):
+        captured["json"] = json
+        captured["stream"] = stream
+        return FakeStreamResponse([
+            b'{"model":"llama3.2:3b","message":{"role":"assistant","content":"Flood "},"done":false}',
+            b"",
+            b'{"model":"llama3.2:3b","message":{"role":"assistant","content":"risk is low."},"done":false}',
+            b'{"model":"llama3.2:3b","message":{"role":"assistant","content":""},"done":true,'
+            b'"total_duration":2000000,"prompt_eval_count":30,"eval_count":6}',
+        ])
+
+    patch_post(monkeypatch, fake_post)
+
+    chunks = list(make_adapter().generate_stream(make_prompt()))
+
+    assert captured["json"]["stream"] is True and captured["stream"] is True
+    assert [chunk.token for chunk in chunks if chunk.token] == ["Flood ", "risk is low."]
+    final = chunks[-1]
+    assert final.done
+    assert final.final.response == "Flood risk is low."
+    assert final.final.input_tokens == 30 and final.final.output_tokens == 6
+    assert final.final.response_latency == 2.0
+
+
+def test_generate_stream_retries_connection_error_before_first_token(monkeypatch):
+    calls = {"count": 0}
+
+    def fake_post(url, json, timeout, stream):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise requests.ConnectionError("connection failed")
+        return FakeStreamResponse([b'{"message":{"content":"ok"},"done":true}'])
+
+    patch_post(monkeypatch, fake_post)
+
+    chunks = list(make_adapter(retries=1).generate_stream(make_prompt()))
+
+    assert calls["count"] == 2
+    assert chunks[0].token == "ok"
+    assert chunks[-1].final.llm_model == "llama3.2:3b"
+
+
+def test_generate_stream_closes_failed_responses_before_retrying(monkeypatch):
+    responses = [
+        FakeStreamResponse([], status_code=503),
+        FakeStreamResponse([], status_code=429),
+        FakeStreamResponse([b'{"message":{"content":"ok"},"done":true}']),
+    ]
+    pending = iter(responses)
+    patch_post(monkeypatch, lambda url, json, timeout, stream: next(pending))
+
+    chunks = list(make_adapter(retries=2).generate_stream(make_prompt()))
+
+    assert chunks[0].token == "ok"
+    assert responses[0].closed and responses[1].closed
+
+
+def test_generate_stream_closes_the_response_it_gives_up_on(monkeypatch):
+    failed = FakeStreamResponse([], status_code=500)
+    patch_post(monkeypatch, lambda url, json, timeout, stream: failed)
+
+    with pytest.raises(requests.HTTPError):
+        list(make_adapter(retries=0).generate_stream(make_prompt()))
+    assert failed.closed
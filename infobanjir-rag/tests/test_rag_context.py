@@ -1,4 +1,4 @@
-from app.rag_context import build_context, build_summary_from_hits, format_state, infer_state_from_question
+from app.rag_context import build_context, build_summary_from_hits, format_state, infer_state_from_question, normalize_question
 from app.state_codes import to_upstream_state_code
 
 
@@ -43,3 +43,7 @@ def test_to_upstream_state_code_uses_expected_aliases():
     assert to_upstream_state_code("SBH") == "SAB"
     assert to_upstream_state_code("KED") == "KDH"
     assert to_upstream_state_code("Sabah") == "SAB"
+
+
+def test_normalize_question_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_question("  Flood risk in  Selangor? ") == "flood risk in selangor"
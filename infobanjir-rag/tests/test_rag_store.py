@@ -1,11 +1,454 @@
 import app.rag_store as store
+from app.snapshot import SnapshotReader
 
 
 def test_retrieve_keyword_finds_match():
-    store._DOCUMENTS_CACHE = [
+    store._publish_documents([
         {"text": "Rainfall reading in Selangor with 5 mm."},
         {"text": "Water level reading in Johor."},
-    ]
+    ])
     hits = store.retrieve_keyword("rainfall selangor", top_k=3)
     assert hits
     assert "Rainfall" in hits[0]["text"]
+
+
+class FakeCollection:
+    name = "readings"
+
+    def __init__(self):
+        self.rows = {}
+        self.upserted = []
+        self.deleted = []
+        self.gets = []
+
+    def get(self, ids=None, include=None, limit=None, offset=0, where=None):
+        self.gets.append({"ids": ids, "include": include, "limit": limit, "where": where})
+        keys = [doc_id for doc_id in (ids if ids is not None else self.rows) if doc_id in self.rows]
+        if where is not None:
+            allowed = where["state"]["$in"]
+            keys = [k for k in keys if self.rows[k][1].get("state") in allowed]
+        keys = keys[offset:offset + limit] if limit is not None else keys
+        return {
+            "ids": keys,
+            "documents": [self.rows[k][0] for k in keys],
+            "metadatas": [self.rows[k][1] for k in keys],
+            "embeddings": [self.rows[k][2] for k in keys],
+        }
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.upserted.append(list(ids))
+        for doc_id, text, meta, vector in zip(ids, documents, metadatas, embeddings):
+            self.rows[doc_id] = (text, meta, vector)
+
+    def delete(self, ids):
+        self.deleted.append(list(ids))
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+    def count(self):
+        return len(self.rows)
+
+
+def _use_fake_collection(monkeypatch, tmp_path):
+    collection = FakeCollection()
+    monkeypatch.setattr(store, "CHROMA_PERSIST_DIR", str(tmp_path))
+    monkeypatch.setattr(store, "EMBED_CACHE_ENABLED", False)
+    snapshot_dir = str(tmp_path / "snapshots")
+    monkeypatch.setattr(store, "SNAPSHOT_DIR", snapshot_dir)
+    monkeypatch.setattr(store, "_SNAPSHOT_READER", SnapshotReader(snapshot_dir, check_interval=0.0))
+    monkeypatch.setattr(store, "_get_collection", lambda: collection)
+    monkeypatch.setattr(store, "embed_texts", lambda texts: [[1.0, 0.0] for _ in texts])
+    store._reset_cache()
+    return collection
+
+
+def test_delta_replace_only_writes_churn(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    docs = [
+        {"id": "a", "text": "Rainfall reading A", "state": "SEL", "recorded_at": "2026-02-10T00:00:00Z"},
+        {"id": "b", "text": "Rainfall reading B", "state": "SEL", "recorded_at": "2026-02-10T00:00:00Z"},
+        {"id": "c", "text": "Rainfall reading C", "state": "JHR", "recorded_at": "2026-02-10T00:00:00Z"},
+    ]
+    first = store.ingest_documents(docs, replace=True, delta=True)
+    assert first == {"added": 3, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    refreshed = [docs[0], {**docs[1], "text": "Rainfall reading B changed"}, {"id": "d", "text": "New"}]
+    second = store.ingest_documents(refreshed, replace=True, delta=True)
+
+    assert second == {"added": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+    assert collection.upserted[-1] == ["b", "d"]
+    assert collection.deleted == [["c"]]
+    assert sorted(collection.rows) == ["a", "b", "d"]
+
+
+def test_delta_append_keeps_other_rows(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    store.ingest_documents([{"id": "a", "text": "one"}, {"id": "b", "text": "two"}], delta=True)
+
+    counts = store.ingest_documents([{"id": "a", "text": "one"}], delta=True)
+
+    assert counts == {"added": 0, "updated": 0, "deleted": 0, "unchanged": 1}
+    assert sorted(collection.rows) == ["a", "b"]
+
+
+def test_where_clause_pushes_date_range_as_day_ordinals():
+    where = store._build_where_clause(state="KTN", date_from="2026-02-10", date_to="2026-02-12")
+    assert where == {
+        "$and": [
+            {"state": {"$in": ["KTN", "KEL"]}},
+            {"recorded_day": {"$gte": 739657}},
+            {"recorded_day": {"$lte": 739659}},
+        ]
+    }
+
+
+def test_build_rows_stores_numeric_dates():
+    _, _, metas = store._build_rows(
+        [{"id": "a", "text": "t", "recorded_at": "2026-02-10T08:00:00Z"}]
+    )
+    assert metas[0]["recorded_date"] == "2026-02-10"
+    assert metas[0]["recorded_day"] == 739657
+    assert metas[0]["recorded_epoch"] == 1770710400.0
+
+
+def test_ingest_publishes_snapshot_only_on_change(monkeypatch, tmp_path):
+    _use_fake_collection(monkeypatch, tmp_path)
+    docs = [
+        {"id": "a", "text": "Rainfall in Selangor", "state": "SEL", "type": "rainfall", "value": 5},
+        {"id": "b", "text": "Water level in Johor", "state": "JHR", "type": "water_level"},
+    ]
+    store.ingest_documents(docs, replace=True, delta=True)
+    snapshot = store.get_snapshot()
+    assert snapshot.version == 1
+    assert [snapshot.doc_id(row) for row in range(len(snapshot))] == ["a", "b"]
+    assert snapshot.embeddings.shape == (2, 2)
+
+    store.ingest_documents(docs, replace=True, delta=True)
+    assert store.get_snapshot().version == 1
+    store.ingest_documents(docs[:1], replace=True, delta=True)
+    assert len(store.get_snapshot()) == 1
+
+
+def test_small_candidate_sets_are_scored_exactly(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    vectors = {"Perlis rain": [1.0, 0.0], "Perlis river": [0.6, 0.8], "Johor rain": [1.0, 0.0]}
+    monkeypatch.setattr(store, "embed_texts", lambda texts: [vectors[text] for text in texts])
+    store.ingest_documents(
+        [
+            {"id": "p1", "text": "Perlis rain", "state": "PLS", "type": "rainfall"},
+            {"id": "p2", "text": "Perlis river", "state": "PLS", "type": "water_level"},
+            {"id": "j1", "text": "Johor rain", "state": "JHR", "type": "rainfall"},
+        ],
+        replace=True,
+        delta=True,
+    )
+
+    def broken_query(**kwargs):
+        raise RuntimeError("Cannot return the results in a contigious 2D array")
+
+    collection.query = broken_query
+    monkeypatch.setattr(store, "RAG_EXACT_SEARCH_THRESHOLD", 10)
+    hits = store.retrieve_semantic_batch([[0.0, 1.0]], top_k=5, state="PLS", min_score=-1.0)[0]
+    assert [hit["text"] for hit in hits] == ["Perlis river", "Perlis rain"]
+    assert hits[0]["state"] == "PLS" and hits[0]["type"] == "water_level"
+    hits = store.retrieve_semantic_batch([[0.0, 1.0]], top_k=5, state="PLS", min_score=0.5)[0]
+    assert [hit["text"] for hit in hits] == ["Perlis river"]
+
+    # Large sets use HNSW, but an index error still falls back to exact scoring.
+    monkeypatch.setattr(store, "RAG_EXACT_SEARCH_THRESHOLD", 0)
+    hits = store.retrieve_semantic_batch([[1.0, 0.0]], top_k=1, doc_type="rainfall")[0]
+    assert [hit["text"] for hit in hits] == ["Perlis rain"]
+    assert store.get_stats()["semantic_planner"]["hnsw_fallbacks"] >= 1
+
+
+def test_ingest_publishes_a_new_cache_generation(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    docs = [
+        {"id": "a", "text": "Rainfall in Selangor", "state": "SEL", "type": "rainfall"},
+        {"id": "b", "text": "Water level in Johor", "state": "JHR", "type": "water_level"},
+    ]
+    store.ingest_documents(docs, replace=True, delta=True)
+    first = store.load_documents()
+    generation = store.get_cache_stats()["generation"]
+
+    def no_reads(**kwargs):
+        raise AssertionError("request path must not reload the collection")
+
+    docs[1]["text"] = "Water level in Johor rising"
+    store.ingest_documents(docs, replace=True, delta=True)
+    monkeypatch.setattr(collection, "get", no_reads)
+    stats = store.get_cache_stats()
+    assert stats["generation"] == generation + 1
+    assert stats["documents"] == 2
+    assert store.retrieve_keyword("rising", top_k=1)[0]["id"] == "b"
+    # Readers holding the previous generation keep a consistent view.
+    assert first[1]["text"] == "Water level in Johor"
+
+
+def test_replace_ingest_swaps_to_a_fresh_collection(monkeypatch, tmp_path):
+    monkeypatch.setattr(store, "CHROMA_PERSIST_DIR", str(tmp_path))
+    monkeypatch.setattr(store, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(store, "SNAPSHOT_ENABLED", False)
+    monkeypatch.setattr(store, "_CHROMA_CLIENT", None)
+    monkeypatch.setattr(store, "_CHROMA_COLLECTION", None)
+    monkeypatch.setattr(store, "embed_texts", lambda texts: [[1.0, 0.0] for _ in texts])
+    drop_old_collections = store._drop_old_collections
+    monkeypatch.setattr(store, "_drop_old_collections", lambda *args: [])
+    store._reset_cache()
+    row = {"title": "Station", "source": "test", "state": "SEL", "type": "rainfall", "value": 1.0}
+    docs = [{**row, "id": "a", "text": "Rainfall in Selangor"}]
+
+    store.ingest_documents(docs, replace=True)
+    first = store._get_collection()
+    assert first.name == "readings_v1"
+    counts = store.ingest_documents(docs + [{**row, "id": "b", "text": "Water level in Johor"}], replace=True)
+    # Counts are diffed against the previous collection, as in the delta path.
+    assert counts == {"added": 1, "updated": 0, "deleted": 0, "unchanged": 1}
+    second = store._get_collection()
+    assert second.name == "readings_v2"
+    # The previous version stays queryable until it is garbage-collected.
+    assert first.count() == 1 and second.count() == 2
+
+    # Another worker sees the swap through the alias file.
+    monkeypatch.setattr(store, "_CHROMA_COLLECTION", first)
+    monkeypatch.setattr(store, "_ACTIVE_COLLECTION_MTIME", None)
+    assert store._get_collection().name == "readings_v2"
+
+    # The legacy unversioned collection counts as version 0.
+    assert sorted(drop_old_collections("readings_v2")) == ["readings", "readings_v1"]
+    assert [c.name for c in store._get_client().list_collections()] == ["readings_v2"]
+
+    counts = store.ingest_documents([{**row, "id": "b", "text": "Water level in Johor, rising"}], replace=True)
+    assert counts == {"added": 0, "updated": 1, "deleted": 1, "unchanged": 0}
+
+
+def test_replace_keeps_rows_of_states_that_failed_to_fetch(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    docs = [
+        {"id": "a", "text": "Rainfall in Selangor", "state": "SEL", "type": "rainfall"},
+        {"id": "b", "text": "Rainfall in Perlis", "state": "PLS", "type": "rainfall"},
+    ]
+    store.ingest_documents(docs, replace=True, delta=True)
+    counts = store.ingest_documents(docs[:1], replace=True, delta=True, preserve_states={"PLS"})
+    assert counts["deleted"] == 0
+    assert set(collection.rows) == {"a", "b"}
+
+
+def test_ingest_consumes_a_generator_in_chunks(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    consumed = []
+
+    def docs():
+        for i in range(5):
+            consumed.append(i)
+            yield {"id": f"d{i}", "text": f"Reading {i}", "state": "SEL", "type": "rainfall"}
+
+    counts = store.ingest_documents(docs(), replace=True, delta=True, chunk_size=2)
+    assert counts["added"] == 5
+    assert collection.upserted == [["d0", "d1"], ["d2", "d3"], ["d4"]]
+    assert len(store.load_documents()) == 5
+
+
+def test_ingest_fetches_and_embeds_outside_the_ingest_lock(monkeypatch, tmp_path):
+    import threading
+
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    monkeypatch.setattr(store, "SNAPSHOT_ENABLED", False)
+
+    def lock_free() -> bool:
+        # flock is per open file, so probe from another thread with a fresh descriptor.
+        result = []
+
+        def probe():
+            try:
+                with store._get_ingest_lock().exclusive(timeout=0):
+                    result.append(True)
+            except TimeoutError:
+                result.append(False)
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join(5)
+        return result[0]
+
+    seen = []
+
+    def docs():
+        for i in range(3):
+            seen.append(("fetch", lock_free()))
+            yield {"id": f"d{i}", "text": f"Reading {i}", "state": "SEL", "type": "rainfall"}
+
+    def embed(texts):
+        seen.append(("embed", lock_free()))
+        return [[1.0, 0.0] for _ in texts]
+
+    upsert = collection.upsert
+
+    def locked_upsert(**kwargs):
+        seen.append(("upsert", lock_free()))
+        upsert(**kwargs)
+
+    monkeypatch.setattr(store, "embed_texts", embed)
+    collection.upsert = locked_upsert
+    counts = store.ingest_documents(docs(), replace=True, delta=True, chunk_size=2)
+
+    assert counts["added"] == 3
+    assert seen == [
+        ("fetch", True), ("fetch", True), ("embed", True), ("fetch", True), ("embed", True),
+        ("upsert", False), ("upsert", False),
+    ]
+
+
+def test_ingest_follows_max_batch_size_and_retries_chunks(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    collection._client = type("Client", (), {"max_batch_size": 2})()
+    monkeypatch.setattr(store, "INGEST_RETRY_BACKOFF_SECONDS", 0.0)
+    upsert = collection.upsert
+    failures = []
+
+    def flaky_upsert(**kwargs):
+        if kwargs["ids"] == ["d2", "d3"] and not failures:
+            failures.append(kwargs["ids"])
+            raise RuntimeError("database is locked")
+        upsert(**kwargs)
+
+    collection.upsert = flaky_upsert
+    docs = [{"id": f"d{i}", "text": f"Reading {i}"} for i in range(5)]
+    counts = store.ingest_documents(docs, chunk_size=100)
+
+    assert counts["added"] == 5
+    assert collection.upserted == [["d0", "d1"], ["d2", "d3"], ["d4"]]
+    progress = store.get_ingest_progress()
+    assert progress["chunk_size"] == 2
+    assert progress["chunks_written"] == 3 and progress["rows_written"] == 5
+    assert progress["retries"] == 1 and not progress["running"]
+
+
+def test_cold_load_never_replaces_a_generation_published_meanwhile(monkeypatch, tmp_path):
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    monkeypatch.setattr(store, "SNAPSHOT_ENABLED", False)
+    # The read lock timed out, so the cold read runs alongside the ingest.
+    monkeypatch.setattr(store, "RAG_READ_LOCK_ENABLED", False)
+    doc = {"id": "a", "text": "Rainfall reading A", "state": "SEL", "type": "rainfall"}
+    store.ingest_documents([doc], replace=True, delta=True)
+    get = collection.get
+
+    def racing_get(ingest):
+        def read(*args, **kwargs):
+            stale = get(*args, **kwargs)
+            collection.get = get
+            ingest()
+            return stale
+        return read
+
+    store._reset_cache()
+    collection.get = racing_get(
+        lambda: store.ingest_documents([{**doc, "text": "Rainfall reading A changed"}], replace=True, delta=True)
+    )
+    assert [d["text"] for d in store.load_documents()] == ["Rainfall reading A changed"]
+
+    # An append into a cold process publishes nothing, but still makes the racing read stale.
+    store._reset_cache()
+    collection.get = racing_get(lambda: store.ingest_documents([{**doc, "id": "b", "text": "Reading B"}]))
+    assert [d["id"] for d in store.load_documents()] == ["a"]
+    assert store._CACHE is None
+    assert [d["id"] for d in store.load_documents()] == ["a", "b"]
+
+
+def test_cold_load_without_the_read_lock_is_only_provisional(monkeypatch, tmp_path):
+    import threading
+
+    collection = _use_fake_collection(monkeypatch, tmp_path)
+    monkeypatch.setattr(store, "SNAPSHOT_ENABLED", False)
+    store.ingest_documents([{"id": "a", "text": "Rainfall reading A", "state": "SEL"}], replace=True, delta=True)
+    store._reset_cache()
+    reads = []
+    get = collection.get
+
+    def counting_get(*args, **kwargs):
+        reads.append(kwargs.get("where"))
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(collection, "get", counting_get)
+    monkeypatch.setattr(store, "RAG_READ_LOCK_ENABLED", True)
+    monkeypatch.setattr(store, "RAG_READ_LOCK_TIMEOUT_SECONDS", 0.05)
+    held, release = threading.Event(), threading.Event()
+
+    def other_ingest():
+        with store._get_ingest_lock().exclusive():
+            held.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=other_ingest, daemon=True)
+    writer.start()
+    held.wait(5)
+    try:
+        for _ in range(3):
+            assert [d["id"] for d in store.load_documents()] == ["a"]
+            store.get_keyword_index()
+        assert store._CACHE is None
+        # Later requests retry the lock without waiting and reuse the provisional read.
+        assert len(reads) == 1
+    finally:
+        release.set()
+        writer.join(5)
+    store.load_documents()
+    assert store._CACHE is not None
+    assert len(reads) == 2
+
+
+def test_append_ingest_updates_loaded_cache_by_changed_rows(monkeypatch, tmp_path):
+    _use_fake_collection(monkeypatch, tmp_path)
+    monkeypatch.setattr(store, "SNAPSHOT_ENABLED", False)
+    docs = [
+        {"id": "a", "text": "Rainfall in Selangor", "state": "SEL", "type": "rainfall"},
+        {"id": "b", "text": "Rainfall in Johor", "state": "JHR", "type": "rainfall"},
+    ]
+    store.ingest_documents(docs, replace=True, delta=True)
+    assert store.get_document_index().count(state="SEL") == 1
+
+    def no_full_decode(self):
+        raise AssertionError("append ingest decoded every cached id")
+
+    monkeypatch.setattr(store.DocumentStore, "ids", no_full_decode)
+    store.ingest_documents([
+        {"id": "b", "text": "Water level in Selangor", "state": "SEL", "type": "water_level"},
+        {"id": "c", "text": "Rainfall in Perlis", "state": "PLS", "type": "rainfall"},
+    ])
+    index = store.get_document_index()
+    assert index.positions(state="SEL") == [0, 1]
+    assert index.count(state="JHR") == 0 and index.count(doc_type="rainfall") == 2
+    assert [doc["id"] for doc in index.filter(state="PLS")] == ["c"]
+
+
+def test_append_ingest_publishes_a_snapshot_delta(monkeypatch, tmp_path):
+    _use_fake_collection(monkeypatch, tmp_path)
+    docs = [{"id": f"d{i}", "text": f"Rainfall reading {i}", "state": "SEL", "type": "rainfall"} for i in range(8)]
+    store.ingest_documents(docs, replace=True, delta=True)
+    assert store.get_snapshot().version == 1
+
+    def no_full_export(collection):
+        raise AssertionError("append ingest re-exported the whole collection")
+
+    monkeypatch.setattr(store, "_publish_snapshot", no_full_export)
+    monkeypatch.setattr(store, "embed_texts", lambda texts: [[0.0, 1.0] for _ in texts])
+    store.ingest_documents([{"id": "d9", "text": "Water level reading", "state": "JHR", "type": "water_level"}])
+    snapshot = store.get_snapshot()
+    assert snapshot.version == 2 and len(snapshot) == 9
+    vectors, found = store._candidate_embeddings(["d0", "d9"])
+    assert found == [0, 1]
+    assert vectors.tolist() == [[1.0, 0.0], [0.0, 1.0]]
+
+
+def test_copy_states_pages_through_only_the_preserved_states():
+    source, target = FakeCollection(), FakeCollection()
+    for i in range(5):
+        source.rows[f"p{i}"] = (f"Perlis {i}", {"state": "PLS"}, [1.0, 0.0])
+        source.rows[f"s{i}"] = (f"Selangor {i}", {"state": "SEL"}, [0.0, 1.0])
+
+    copied = store._copy_states(source, target, {"PLS"}, skip_ids={"p1"}, batch_size=2)
+
+    assert copied == ["p0", "p2", "p3", "p4"]
+    assert set(target.rows) == set(copied)
+    assert all(get["limit"] == 2 and get["where"] is not None for get in source.gets)
+    assert len(source.gets) == 3
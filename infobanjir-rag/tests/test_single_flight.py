@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from app.single_flight import SingleFlight
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def _run_concurrently(flight, key, fn, callers):
+    results = [None] * callers
+    errors = [None] * callers
+
+    def worker(i):
+        try:
+            results[i] = flight.do(key, fn, label="question")
+        except Exception as exc:
+            errors[i] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(callers)]
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads, results, errors = _run_concurrently(flight, "k", slow, callers=5)
+    threads[0].start()
+    _wait_until(lambda: calls)
+    for thread in threads[1:]:
+        thread.start()
+    _wait_until(lambda: flight.stats()["waiters"].get("question") == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {result for result, _ in results} == {"answer"}
+    stats = flight.stats()
+    assert stats["executions"] == 1 and stats["coalesced"] == 4 and stats["max_waiters"] == 4
+    assert stats["in_flight"] == 0
+
+    # A finished key is forgotten: the next caller runs again.
+    assert flight.do("k", lambda: "fresh") == ("fresh", False)
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("ollama down")
+
+    threads, _, errors = _run_concurrently(flight, "k", failing, callers=2)
+    threads[0].start()
+    started.wait(5)
+    threads[1].start()
+    _wait_until(lambda: flight.stats()["waiters"].get("question") == 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+    def next_call():
+        raise ValueError("next call runs")
+
+    with pytest.raises(ValueError):
+        flight.do("k", next_call)
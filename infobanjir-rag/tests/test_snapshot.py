@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+
+from app.snapshot import SnapshotReader, publish_snapshot, read_current_version
+
+
+METAS = [
+    {"state": "sel", "type": "Rainfall", "recorded_day": 20491, "value": 5.0},
+    {"state": "KED", "type": "water_level", "recorded_day": 20492},
+    {"state": "SEL", "type": "rainfall"},
+]
+
+
+def test_publish_round_trip(tmp_path):
+    vectors = np.arange(6, dtype=np.float32).reshape(3, 2)
+    version = publish_snapshot(str(tmp_path), ["a", "bé", "c"], METAS, vectors)
+    assert version == 1
+    assert read_current_version(str(tmp_path)) == 1
+
+    snapshot = SnapshotReader(str(tmp_path), check_interval=0.0).current()
+    assert len(snapshot) == 3
+    assert [snapshot.doc_id(row) for row in range(3)] == ["a", "bé", "c"]
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert snapshot.embeddings.dtype == np.float16
+    np.testing.assert_allclose(snapshot.embeddings, vectors)
+    assert snapshot.state[0] == snapshot.state[2] == snapshot.state_code("SEL")
+    assert snapshot.type_code("RAINFALL") == snapshot.type[0]
+    assert snapshot.state_code("PLS") is None
+    assert list(snapshot.recorded_day) == [20491, 20492, 0]
+    assert snapshot.value[0] == 5.0 and np.isnan(snapshot.value[1])
+
+
+def test_reader_swaps_versions_and_old_ones_are_collected(tmp_path):
+    base = str(tmp_path)
+    reader = SnapshotReader(base, check_interval=3600.0)
+    assert reader.current() is None
+
+    publish_snapshot(base, ["a"], METAS[:1], [[1.0, 0.0]])
+    first = reader.refresh()
+    publish_snapshot(base, ["a", "b"], METAS[:2], [[1.0, 0.0], [0.0, 1.0]])
+    # Within the check interval the reader keeps serving the mapped version.
+    assert reader.current() is first
+    assert len(reader.refresh()) == 2
+    assert reader.stats()["swaps"] == 2
+
+    publish_snapshot(base, ["c"], METAS[2:], [[0.5, 0.5]], keep=2)
+    assert sorted(name for name in os.listdir(base) if name.startswith("v")) == ["v2", "v3"]
+    # A mapping of a collected version stays readable.
+    assert first.doc_id(0) == "a"
+
+
+def test_delta_publish_links_the_base_and_shadows_changed_rows(tmp_path):
+    from app.snapshot import publish_snapshot_delta
+
+    base = str(tmp_path)
+    ids = [f"doc-{i}" for i in range(20)]
+    vectors = np.tile(np.array([[1.0, 0.0]], dtype=np.float32), (20, 1))
+    publish_snapshot(base, ids, [{"state": "SEL"}] * 20, vectors)
+
+    version = publish_snapshot_delta(
+        base, ["doc-3", "new"], [{"state": "JHR"}, {"state": "PLS"}], [[0.0, 1.0], [0.5, 0.5]], deleted_ids=["doc-7"]
+    )
+    assert version == 2
+    assert os.stat(tmp_path / "v1" / "embeddings.npy").st_ino == os.stat(tmp_path / "v2" / "embeddings.npy").st_ino
+    snapshot = SnapshotReader(base, check_interval=0.0).current()
+    assert isinstance(snapshot.base.sorted_ids, np.memmap)
+    rows = snapshot.rows(["doc-0", "doc-3", "doc-7", "new", "missing", "x" * 100])
+    assert rows[0] == 0
+    # The deleted id is tombstoned; unknown and over-long ids are simply absent.
+    assert rows[2] == rows[4] == rows[5] == -1
+    assert [snapshot.doc_id(row) for row in (rows[1], rows[3])] == ["doc-3", "new"]
+    np.testing.assert_allclose(snapshot.vector(rows[1]), [0.0, 1.0])
+    assert len(snapshot) == 20
+
+    # Deltas accumulate; a re-added id comes back and the delta's state column survives.
+    publish_snapshot_delta(base, ["doc-7"], [{"state": "KTN"}], [[0.0, 1.0]])
+    snapshot = SnapshotReader(base, check_interval=0.0).current()
+    assert all(row >= 20 for row in snapshot.rows(["doc-3", "new", "doc-7"]))
+    assert snapshot.delta.meta(snapshot.rows(["new"])[0] - 20)["state"] == "PLS"
+    # A delta larger than the ratio allows is refused so the caller exports in full.
+    assert publish_snapshot_delta(base, ids[:5], [{}] * 5, vectors[:5], max_ratio=0.25) is None